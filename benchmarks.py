@@ -0,0 +1,417 @@
+"""
+================================================================================
+WEDABAY AIRPORT ABSENCE CENTER - BENCHMARKS
+================================================================================
+Performance guards for slot_app.
+
+    python benchmarks.py startup            # cold import + rerun overhead
+    python benchmarks.py startup --check    # exit 1 when a budget is exceeded
+    python benchmarks.py pipeline --output bench.json
+                                            # per-stage timings at 1x/10x/100x
+    python benchmarks.py compare old.json new.json
+                                            # diff two pipeline runs
+================================================================================
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, "slot_app.py")
+
+# Modules that must not be loaded just by importing / rerunning the app
+LAZY_MODULES = ["plotly", "xlsxwriter", "PIL"]
+
+# Budgets used by --check (seconds)
+COLD_IMPORT_BUDGET = 1.0  # slot_app on top of streamlit
+RERUN_BUDGET = 0.5
+
+# Pipeline benchmark defaults; 1x roughly matches the production sheet
+PIPELINE_SCALES = [1, 10, 100]
+PIPELINE_DAYS = 30
+PIPELINE_PUNCHES_PER_DAY = 4
+PIPELINE_SEED = 20240601
+# Divisions whose members also work night shifts (punch out after midnight)
+OVERNIGHT_DIVISIONS = ("AMC & TERMINAL", "PKP-PK", "AVSEC")
+# compare: flag stages that got slower by more than this ratio
+REGRESSION_RATIO = 1.2
+
+
+def measure_cold_import(repeats: int = 3) -> Dict[str, Any]:
+    """
+    Import slot_app in fresh interpreters. Streamlit is imported first and
+    timed separately (some Streamlit versions pull in plotly/PIL themselves),
+    so the numbers and the heavy-module check cover what slot_app adds.
+    """
+    probe = (
+        "import sys, time, json;"
+        "t0 = time.perf_counter();"
+        "import streamlit;"
+        "t1 = time.perf_counter();"
+        "before = set(sys.modules);"
+        "import slot_app;"
+        "t2 = time.perf_counter();"
+        f"heavy = [m for m in {LAZY_MODULES!r} if m in sys.modules and m not in before];"
+        "print(json.dumps({'streamlit': t1 - t0, 'app': t2 - t1, 'heavy': heavy}))"
+    )
+    streamlit_timings: List[float] = []
+    app_timings: List[float] = []
+    heavy: List[str] = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", probe], cwd=APP_DIR,
+            capture_output=True, text=True, check=True
+        )
+        payload = json.loads(result.stdout.strip().splitlines()[-1])
+        streamlit_timings.append(payload["streamlit"])
+        app_timings.append(payload["app"])
+        heavy = payload["heavy"]
+    return {
+        "streamlit_import_s": min(streamlit_timings),
+        "cold_import_s": min(app_timings),
+        "cold_import_median_s": statistics.median(app_timings),
+        "eager_heavy_modules": heavy,
+    }
+
+
+def measure_reruns(reruns: int = 10) -> Dict[str, Any]:
+    """Time script reruns of the login page with Streamlit's AppTest harness."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_SCRIPT, default_timeout=60)
+    started = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - started
+
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "first_run_s": first,
+        "rerun_median_s": statistics.median(timings),
+        "rerun_max_s": max(timings),
+    }
+
+
+def run_startup(args) -> int:
+    results = measure_cold_import(args.repeats)
+    results.update(measure_reruns(args.reruns))
+    print(json.dumps(results, indent=2))
+
+    if not args.check:
+        return 0
+    failures = []
+    if results["cold_import_s"] > COLD_IMPORT_BUDGET:
+        failures.append(f"cold import {results['cold_import_s']:.2f}s > {COLD_IMPORT_BUDGET}s")
+    if results["rerun_median_s"] > RERUN_BUDGET:
+        failures.append(f"rerun {results['rerun_median_s']:.3f}s > {RERUN_BUDGET}s")
+    if results["eager_heavy_modules"]:
+        failures.append(f"eagerly imported: {', '.join(results['eager_heavy_modules'])}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+# ------------------------------------------------------------------ pipeline
+
+def scale_registry(slot_app, scale: int) -> Dict[str, List[str]]:
+    """
+    Re-register every division with its members cloned `scale` times
+    ("Name", "Name #2", ...). Returns division name -> members.
+    """
+    slot_app.DivisionRegistry._divisions.clear()
+    slot_app.initialize_divisions()
+    slot_app.initialize_shift_rules()
+    rosters = {}
+    for division in list(slot_app.DivisionRegistry.get_all().values()):
+        members = [
+            name if copy == 1 else f"{name} #{copy}"
+            for copy in range(1, scale + 1) for name in division.members
+        ]
+        if scale > 1:
+            slot_app.DivisionRegistry.register(
+                slot_app.DivisionConfig(
+                    division.name, division.color, division.icon, division.code,
+                    members=members, description=division.description, priority=division.priority,
+                )
+            )
+        rosters[division.name] = members
+    return rosters
+
+
+def generate_synthetic(
+    out_dir: str,
+    rosters: Dict[str, List[str]],
+    start: date,
+    days: int,
+    punches_per_day: int = PIPELINE_PUNCHES_PER_DAY,
+    seed: int = PIPELINE_SEED,
+    absent_rate: float = 0.08,
+    duplicate_rate: float = 0.03,
+    overnight_rate: float = 0.15,
+    permit_rate: float = 0.02,
+) -> Dict[str, Any]:
+    """
+    Write a synthetic punch log and status sheet in the Google Sheets CSV
+    layouts. Covers the Friday prayer-break pattern, double taps on the
+    reader (duplicates within a minute) and night shifts in
+    OVERNIGHT_DIVISIONS that punch out the next morning.
+    """
+    rng = random.Random(seed)
+    attendance_path = os.path.join(out_dir, "attendance.csv")
+    status_path = os.path.join(out_dir, "status.csv")
+    punches = 0
+    permits = 0
+
+    def slots(day: date) -> List[tuple]:
+        if day.weekday() == 4:  # Jumat: istirahat panjang untuk sholat Jumat
+            return [(7, 0, 20), (11, 45, 10), (13, 30, 25), (17, 0, 30)]
+        return [(7, 0, 20), (11, 35, 20), (12, 45, 30), (16, 5, 60)]
+
+    with open(attendance_path, "w", newline="") as fa, open(status_path, "w", newline="") as fs:
+        att = csv.writer(fa)
+        status = csv.writer(fs)
+        att.writerow(["Person Name", "Event Time"])
+        status.writerow(["Nama Karyawan", "Tanggal", "Keterangan"])
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            base = datetime.combine(day, datetime.min.time())
+            for division_name, members in rosters.items():
+                night_capable = division_name in OVERNIGHT_DIVISIONS
+                for name in members:
+                    roll = rng.random()
+                    if roll < permit_rate:
+                        status.writerow([name, day.isoformat(), rng.choice(["izin", "sakit", "cuti"])])
+                        permits += 1
+                        continue
+                    if roll < permit_rate + absent_rate:
+                        continue
+                    if night_capable and rng.random() < overnight_rate:
+                        times = [base + timedelta(hours=19, minutes=rng.randint(0, 20)),
+                                 base + timedelta(days=1, hours=7, minutes=rng.randint(0, 15))]
+                    else:
+                        chosen = slots(day)[:max(1, punches_per_day)]
+                        times = [base + timedelta(hours=h, minutes=m + rng.randint(0, jitter))
+                                 for h, m, jitter in chosen]
+                        for extra in range(punches_per_day - len(chosen)):
+                            times.append(base + timedelta(hours=rng.randint(6, 18), minutes=rng.randint(0, 59)))
+                    for t in times:
+                        t = t + timedelta(seconds=rng.randint(0, 59))
+                        att.writerow([name, t.strftime("%Y-%m-%d %H:%M:%S")])
+                        punches += 1
+                        if rng.random() < duplicate_rate:
+                            att.writerow([name, (t + timedelta(seconds=rng.randint(1, 40))).strftime("%Y-%m-%d %H:%M:%S")])
+                            punches += 1
+
+    return {
+        "attendance_path": attendance_path,
+        "status_path": status_path,
+        "punches": punches,
+        "permits": permits,
+        "employees": sum(len(m) for m in rosters.values()),
+        "attendance_bytes": os.path.getsize(attendance_path),
+    }
+
+
+def measure_stage(func: Callable[[], Any], repeats: int, before: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Best-of-N wall time, then one extra run under tracemalloc for the peak."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        if before:
+            before()
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    rows = None
+    if hasattr(result, "__len__") and not isinstance(result, (str, bytes)):
+        rows = len(result[0]) if isinstance(result, tuple) else len(result)
+    return {
+        "best_s": min(timings),
+        "median_s": statistics.median(timings),
+        "peak_mb": peak / (1024 * 1024),
+        "rows": rows,
+    }
+
+
+def bench_scale(slot_app, scale: int, args, work_dir: str) -> Dict[str, Any]:
+    """Generate data at one scale and time every pipeline stage on it."""
+    rosters = scale_registry(slot_app, scale)
+    start = date(2025, 1, 6)  # Monday
+    data = generate_synthetic(
+        work_dir, rosters, start, args.days, args.punches_per_day, args.seed + scale
+    )
+    attendance_repo = slot_app.AttendanceRepository(data["attendance_path"])
+    status_repo = slot_app.StatusRepository(data["status_path"])
+    slot_app.SnapshotManager.configure(attendance_repo, status_repo)
+    snapshot = slot_app.SnapshotManager.refresh()
+    data["resident_bytes_per_punch"] = slot_app.PunchLog.bytes_per_punch(snapshot.attendance)
+
+    service = slot_app.AttendanceService(attendance_repo, status_repo)
+    analytics = slot_app.AnalyticsService(attendance_repo)
+    exporter = slot_app.ExcelExporter()
+    friday = start + timedelta(days=4)
+    df_day = service.get_attendance_for_date(friday)
+    report, status_dict = service.build_complete_report(friday)
+    range_end = start + timedelta(days=min(args.days, 7) - 1)
+    cold_store = lambda: slot_app.DailySummaryStore.invalidate()
+
+    stages = {
+        "fetch_attendance": lambda: attendance_repo.fetch(),
+        "fetch_status": lambda: status_repo.fetch(),
+        "snapshot_refresh": lambda: slot_app.SnapshotManager.refresh(),
+        "attendance_for_date": lambda: service.get_attendance_for_date(friday),
+        "extract_time_ranges": lambda: service.extract_time_ranges(df_day),
+        "build_complete_report_cold": (lambda: service.build_complete_report(friday), cold_store),
+        "build_complete_report_warm": lambda: service.build_complete_report(friday),
+        "calculate_metrics": lambda: service.calculate_metrics(report, status_dict),
+        "detect_anomalies": lambda: analytics.detect_anomalies(df_day),
+        "build_table_frame": lambda: service.build_table_frame(report, status_dict),
+        "excel_daily": lambda: exporter.create_attendance_report(report, status_dict, friday).getvalue(),
+        "csv_range_week": (
+            lambda: b"".join(slot_app.StreamingExporter.iter_csv(service.iter_range_table(start, range_end))),
+            cold_store,
+        ),
+    }
+    results = {}
+    for name, stage in stages.items():
+        if args.stages and name not in args.stages:
+            continue
+        func, before = stage if isinstance(stage, tuple) else (stage, None)
+        results[name] = measure_stage(func, args.repeats, before)
+        print(f"  {scale:>4}x {name:<28} {results[name]['best_s'] * 1000:10.1f} ms "
+              f"{results[name]['peak_mb']:8.1f} MB", file=sys.stderr)
+    return {"data": {k: v for k, v in data.items() if not k.endswith("_path")}, "stages": results}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_pipeline(args) -> int:
+    sys.path.insert(0, APP_DIR)
+    import pandas as pd
+    import slot_app
+
+    # Snapshots are refreshed explicitly per scale; keep TTL reloads out of stage timings
+    slot_app.AppConstants.CACHE_TTL_SECONDS = float("inf")
+    # and do not persist multi-scale synthetic snapshots next to the app
+    slot_app.DataSourceConfig.SNAPSHOT_CACHE_DIR = ""
+
+    report = {
+        "benchmark": "pipeline",
+        "revision": git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "params": {
+            "days": args.days, "punches_per_day": args.punches_per_day,
+            "seed": args.seed, "repeats": args.repeats,
+        },
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="wedabay-bench-") as work_dir:
+        for scale in args.scales:
+            report["scales"][str(scale)] = bench_scale(slot_app, scale, args, work_dir)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+def run_compare(args) -> int:
+    """Print per-stage ratios new/old; exit 1 with --check on regressions."""
+    with open(args.baseline) as f:
+        old = json.load(f)
+    with open(args.candidate) as f:
+        new = json.load(f)
+    if old.get("params") != new.get("params"):
+        print("warning: runs used different parameters", file=sys.stderr)
+
+    regressions = []
+    print(f"{'scale':>5} {'stage':<28} {'old ms':>10} {'new ms':>10} {'ratio':>7} {'peak MB':>15}")
+    for scale, scale_new in new["scales"].items():
+        scale_old = old["scales"].get(scale)
+        if scale_old is None:
+            continue
+        for stage, result in scale_new["stages"].items():
+            before = scale_old["stages"].get(stage)
+            if before is None:
+                continue
+            ratio = result["best_s"] / before["best_s"] if before["best_s"] else float("inf")
+            flag = " !" if ratio > REGRESSION_RATIO else ""
+            print(f"{scale:>4}x {stage:<28} {before['best_s'] * 1000:10.1f} {result['best_s'] * 1000:10.1f} "
+                  f"{ratio:7.2f} {before['peak_mb']:7.1f}->{result['peak_mb']:<7.1f}{flag}")
+            if flag:
+                regressions.append(f"{stage} @ {scale}x")
+    if args.check and regressions:
+        print(f"FAIL: slower than {REGRESSION_RATIO}x: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="slot_app benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    startup = commands.add_parser("startup", help="cold start and rerun overhead")
+    startup.add_argument("--repeats", type=int, default=3, help="fresh-interpreter imports")
+    startup.add_argument("--reruns", type=int, default=10, help="timed script reruns")
+    startup.add_argument("--check", action="store_true", help="fail when a budget is exceeded")
+    startup.set_defaults(handler=run_startup)
+
+    pipeline = commands.add_parser("pipeline", help="per-stage timings on synthetic data")
+    pipeline.add_argument("--scales", type=int, nargs="+", default=PIPELINE_SCALES, help="employee multipliers")
+    pipeline.add_argument("--days", type=int, default=PIPELINE_DAYS, help="days of history")
+    pipeline.add_argument("--punches-per-day", type=int, default=PIPELINE_PUNCHES_PER_DAY)
+    pipeline.add_argument("--seed", type=int, default=PIPELINE_SEED)
+    pipeline.add_argument("--repeats", type=int, default=3, help="timed runs per stage")
+    pipeline.add_argument("--stages", nargs="*", help="only run these stages")
+    pipeline.add_argument("--output", help="write JSON here instead of stdout")
+    pipeline.set_defaults(handler=run_pipeline)
+
+    compare = commands.add_parser("compare", help="compare two pipeline JSON results")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--check", action="store_true", help=f"fail on >{REGRESSION_RATIO}x slowdowns")
+    compare.set_defaults(handler=run_compare)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+================================================================================
+WEDABAY AIRPORT ABSENCE CENTER - NAME ALIASES
+================================================================================
+Offline maintenance of the name alias table used by slot_app.NameResolver.
+
+    python name_aliases.py unmatched        # names matching no division member
+    python name_aliases.py suggest          # fuzzy pass, stores suggestions
+    python name_aliases.py suggest --dry-run
+    python name_aliases.py accept --min-score 0.95
+                                            # promote suggestions to aliases
+    python name_aliases.py accept "MUH RIZAL"
+
+Sources default to DataSourceConfig (WEDABAY_ATTENDANCE_SOURCE /
+WEDABAY_STATUS_SOURCE); the alias file is WEDABAY_NAME_ALIASES.
+================================================================================
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+
+
+def load_unmatched(slot_app, attendance_source: str, status_source: str):
+    """Fetch both sources once and list the names NameResolver cannot resolve."""
+    slot_app.initialize_divisions()
+    slot_app.initialize_shift_rules()
+    attendance = slot_app.AttendanceRepository(attendance_source).fetch()
+    status = slot_app.StatusRepository(status_source).fetch()
+    if attendance is None:
+        raise SystemExit("attendance source could not be loaded")
+    return slot_app.NameResolver.unmatched(attendance, status)
+
+
+def print_rows(rows: List[tuple], header: tuple) -> None:
+    widths = [max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(str(value).ljust(width) for value, width in zip(row, widths)))
+
+
+def run_unmatched(args) -> int:
+    import slot_app
+
+    df = load_unmatched(slot_app, args.attendance, args.status)
+    if df.empty:
+        print("All names match a division member.")
+        return 0
+    print_rows(
+        [(r.Name, r.Source, r.Punches, r.Suggestion or "-") for r in df.itertuples()],
+        ("name", "source", "count", "suggestion"),
+    )
+    return 0
+
+
+def run_suggest(args) -> int:
+    import slot_app
+
+    resolver = slot_app.NameResolver
+    df = load_unmatched(slot_app, args.attendance, args.status)
+    found = resolver.suggest(df["Name"].tolist(), cutoff=args.cutoff)
+    print_rows(
+        [(name, target, f"{score:.3f}") for name, (target, score) in sorted(found.items())] or [("-", "-", "-")],
+        ("name", "suggestion", "score"),
+    )
+    print(f"\n{len(found)} suggestion(s) for {df['Name'].nunique()} unmatched name(s)")
+    if args.dry_run:
+        return 0
+    # Suggestions for names that are no longer unmatched are dropped
+    aliases, _ = resolver.load_aliases()
+    resolver.save_aliases(aliases, found)
+    print(f"written to {slot_app.DataSourceConfig.NAME_ALIASES_PATH}")
+    return 0
+
+
+def run_accept(args) -> int:
+    import slot_app
+
+    resolver = slot_app.NameResolver
+    _, suggestions = resolver.load_aliases()
+    if resolver.last_error:
+        print(f"cannot read alias file: {resolver.last_error}", file=sys.stderr)
+        return 1
+    names = args.names or [
+        name for name, (_, score) in suggestions.items() if score >= args.min_score
+    ]
+    unknown = [name for name in names if name not in suggestions]
+    if unknown:
+        print(f"no stored suggestion for: {', '.join(unknown)}", file=sys.stderr)
+    count = resolver.accept(names)
+    print(f"{count} alias(es) accepted")
+    return 1 if unknown else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import slot_app
+
+    config = slot_app.DataSourceConfig
+    parser = argparse.ArgumentParser(description="slot_app name alias maintenance")
+    parser.add_argument("--attendance", default=config.ATTENDANCE_SOURCE, help="attendance source")
+    parser.add_argument("--status", default=config.STATUS_SOURCE, help="status source")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    unmatched = commands.add_parser("unmatched", help="list names matching no division member")
+    unmatched.set_defaults(handler=run_unmatched)
+
+    suggest = commands.add_parser("suggest", help="fuzzy-match unmatched names (offline batch)")
+    suggest.add_argument("--cutoff", type=float, default=slot_app.AppConstants.NAME_SUGGESTION_CUTOFF)
+    suggest.add_argument("--dry-run", action="store_true", help="print only, keep the alias file")
+    suggest.set_defaults(handler=run_suggest)
+
+    accept = commands.add_parser("accept", help="promote stored suggestions to aliases")
+    accept.add_argument("names", nargs="*", help="names to accept (default: all above --min-score)")
+    accept.add_argument("--min-score", type=float, default=1.0)
+    accept.set_defaults(handler=run_accept)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
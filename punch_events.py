@@ -0,0 +1,128 @@
+"""
+================================================================================
+WEDABAY AIRPORT ABSENCE CENTER - LOCAL PUNCH EVENT FEED
+================================================================================
+Development stand-in for the punch event feed consumed by
+slot_app.PunchEventStream. Not imported by the app.
+
+    python punch_events.py --port 8765
+        then run the app with
+        WEDABAY_EVENT_STREAM=1 WEDABAY_WEBSOCKET_URL=http://127.0.0.1:8765/events
+
+Each stdin line "Person Name,YYYY-MM-DD HH:MM:SS" is broadcast as one punch;
+an empty time stamps the punch with the current time.
+================================================================================
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+PERSON_NAME = "Person Name"
+EVENT_TIME = "Event Time"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class LocalPunchEventServer:
+    """
+    Minimal SSE server standing in for the punch event feed in local
+    testing. Point WEDABAY_WEBSOCKET_URL at http://127.0.0.1:<port>/events
+    and call publish() to push punches to every connected client.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._clients: List["queue.Queue[Optional[str]]"] = []
+        self._clients_lock = threading.Lock()
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/events':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                inbox: "queue.Queue[Optional[str]]" = queue.Queue()
+                with server._clients_lock:
+                    server._clients.append(inbox)
+                try:
+                    while True:
+                        try:
+                            message = inbox.get(timeout=15)
+                        except queue.Empty:
+                            message = ''  # keep-alive comment
+                        if message is None:
+                            return
+                        frame = f"data: {message}\n\n" if message else ": ping\n\n"
+                        self.wfile.write(frame.encode('utf-8'))
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with server._clients_lock:
+                        server._clients.remove(inbox)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/events"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self) -> "LocalPunchEventServer":
+        self._thread.start()
+        return self
+
+    def publish(self, person_name: str, event_time: datetime) -> None:
+        """Broadcast one punch to all connected subscribers."""
+        message = json.dumps({
+            PERSON_NAME: person_name,
+            EVENT_TIME: event_time.strftime(DATETIME_FORMAT),
+        })
+        with self._clients_lock:
+            for inbox in self._clients:
+                inbox.put(message)
+
+    def stop(self) -> None:
+        with self._clients_lock:
+            for inbox in self._clients:
+                inbox.put(None)
+        self.httpd.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="local punch event feed for slot_app")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    server = LocalPunchEventServer(args.host, args.port).start()
+    print(f"serving {server.url} (one 'name,time' per line, Ctrl-D to stop)", file=sys.stderr)
+    try:
+        for line in sys.stdin:
+            name, _, stamp = line.strip().partition(",")
+            if not name:
+                continue
+            try:
+                event_time = datetime.strptime(stamp.strip(), DATETIME_FORMAT) if stamp.strip() else datetime.now()
+            except ValueError:
+                print(f"bad time: {stamp.strip()!r} (expected {DATETIME_FORMAT})", file=sys.stderr)
+                continue
+            server.publish(name.strip(), event_time)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+"""
+================================================================================
+WEDABAY AIRPORT ABSENCE CENTER - REPORTING API
+================================================================================
+Lightweight ASGI application serving attendance data to machine consumers
+without the Streamlit UI. Shares repositories, services and the process-wide
+snapshot with slot_app.
+
+Run with any ASGI server, e.g.:
+    uvicorn slot_api:app --host 0.0.0.0 --port 8080
+================================================================================
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from slot_app import (
+    AnalyticsService,
+    AppConstants,
+    AppMetrics,
+    AttendanceRepository,
+    AttendanceService,
+    DataSourceConfig,
+    DivisionRegistry,
+    NameResolver,
+    PersonnelSearchIndex,
+    ShiftRuleEngine,
+    SnapshotManager,
+    SnapshotPoller,
+    StatusRepository,
+    StreamingExporter,
+    initialize_divisions,
+    initialize_shift_rules,
+)
+
+JSON_MIME = "application/json"
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+CSV_MIME = "text/csv"
+PARQUET_MIME = "application/vnd.apache.parquet"
+PROMETHEUS_MIME = "text/plain; version=0.0.4; charset=utf-8"
+
+MAX_RANGE_DAYS = 366
+RESPONSE_CACHE_ENTRIES = 256
+
+
+class ApiError(Exception):
+    """Error mapped to an HTTP status code and JSON body."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ReportingApi:
+    """
+    Minimal ASGI router over the attendance services.
+    JSON (default) or Arrow IPC responses, ETag revalidation based on the
+    per-day snapshot versions, and streamed range exports.
+    """
+
+    def __init__(self):
+        initialize_divisions()
+        initialize_shift_rules()
+        self.attendance_repo = AttendanceRepository(
+            DataSourceConfig.ATTENDANCE_SOURCE, timeout=DataSourceConfig.ATTENDANCE_TIMEOUT_SECONDS
+        )
+        self.status_repo = StatusRepository(
+            DataSourceConfig.STATUS_SOURCE, timeout=DataSourceConfig.STATUS_TIMEOUT_SECONDS
+        )
+        self.attendance_service = AttendanceService(self.attendance_repo, self.status_repo)
+        self.analytics_service = AnalyticsService(self.attendance_repo)
+        SnapshotManager.configure(self.attendance_repo, self.status_repo)
+
+        self.prefix = urlparse(DataSourceConfig.API_BASE_URL).path.rstrip("/")
+        self.routes: Dict[str, Callable] = {
+            "/health": self.health,
+            "/metrics": self.metrics,
+            "/reports/daily": self.daily_report,
+            "/metrics/daily": self.daily_metrics,
+            "/divisions/stats": self.division_stats,
+            "/anomalies": self.anomalies,
+            "/exports/range": self.range_export,
+            "/names/unmatched": self.unmatched_names,
+            "/personnel/search": self.personnel_search,
+            "/employees/history": self.employee_history,
+        }
+        self._response_cache: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+
+    # ------------------------------------------------------------------ ASGI
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if self.prefix and path.startswith(self.prefix):
+            path = path[len(self.prefix):] or "/"
+        handler = self.routes.get(path.rstrip("/") or "/")
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+
+        response_started = False
+
+        async def tracked_send(message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            if scope["method"] not in ("GET", "HEAD"):
+                raise ApiError(405, "Method not allowed")
+            if handler is None:
+                raise ApiError(404, f"Unknown endpoint: {scope['path']}")
+            await handler(tracked_send, query, headers, scope["method"] == "HEAD")
+        except Exception as e:
+            if response_started:
+                raise  # mid-stream: a second response is not allowed, abort the connection
+            if isinstance(e, ApiError):
+                await self._send_json(send, e.status, {"error": e.message})
+            else:
+                await self._send_json(send, 500, {"error": str(e)})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                SnapshotPoller.ensure_started()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                SnapshotPoller.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ------------------------------------------------------------- endpoints
+
+    async def health(self, send, query, headers, head_only) -> None:
+        snapshot = await asyncio.to_thread(SnapshotManager.current)
+        stale = snapshot.origin == "disk" or SnapshotManager.failures() > 0
+        await self._send_json(send, 200, {
+            "status": "ok" if snapshot.attendance is not None and not stale else "degraded",
+            "version": AppConstants.APP_VERSION,
+            "generation": snapshot.generation,
+            "loaded_at": snapshot.loaded_at.isoformat(),
+            "fetched_at": snapshot.fetched_at.isoformat() if snapshot.fetched_at else None,
+            "origin": snapshot.origin,
+            "last_error": SnapshotManager.last_error,
+            "fetches_sources": SnapshotManager.fetches_sources(),
+        })
+
+    async def metrics(self, send, query, headers, head_only) -> None:
+        """Prometheus text exposition of the shared process metrics."""
+        body = AppMetrics.render().encode("utf-8")
+        await self._send_body(send, 200, body, PROMETHEUS_MIME, None, head_only)
+
+    async def daily_report(self, send, query, headers, head_only) -> None:
+        target = self._parse_date(query, "date")
+
+        def build():
+            df, status_dict = self.attendance_service.build_complete_report(target)
+            table = self.attendance_service.build_table_frame(df, status_dict)
+            table.insert(0, AppConstants.COL_DATE, target.strftime(AppConstants.DATE_FORMAT))
+            return table
+
+        await self._send_cached_frame(send, headers, head_only, query, [target], build)
+
+    async def daily_metrics(self, send, query, headers, head_only) -> None:
+        target = self._parse_date(query, "date")
+
+        def build():
+            df, status_dict = self.attendance_service.build_complete_report(target)
+            metrics = self.attendance_service.calculate_metrics(df, status_dict)
+            metrics["date"] = target.strftime(AppConstants.DATE_FORMAT)
+            return metrics
+
+        await self._send_cached_json(send, headers, head_only, "/metrics/daily", query, [target], build)
+
+    async def division_stats(self, send, query, headers, head_only) -> None:
+        target = self._parse_date(query, "date")
+        build = lambda: self.analytics_service.get_division_statistics(target)
+        await self._send_cached_json(send, headers, head_only, "/divisions/stats", query, [target], build)
+
+    async def anomalies(self, send, query, headers, head_only) -> None:
+        target = self._parse_date(query, "date")
+        try:
+            threshold = int(query.get("threshold_hours", 12))
+        except ValueError:
+            raise ApiError(400, "threshold_hours must be an integer")
+
+        end = self._parse_date(query, "end") if "end" in query else target
+        if end < target or (end - target).days + 1 > MAX_RANGE_DAYS:
+            raise ApiError(400, f"end must be within {MAX_RANGE_DAYS} days after date")
+        days = [target + timedelta(days=i) for i in range((end - target).days + 1)]
+
+        def build():
+            if end != target:
+                return self.analytics_service.scan_anomalies(target, end, threshold_hours=threshold)
+            df_day = self.attendance_service.get_attendance_for_date(target)
+            if df_day is None or df_day.empty:
+                return []
+            return self.analytics_service.detect_anomalies(df_day, threshold_hours=threshold)
+
+        await self._send_cached_json(send, headers, head_only, "/anomalies", query, days, build)
+
+    async def range_export(self, send, query, headers, head_only) -> None:
+        start = self._parse_date(query, "start")
+        end = self._parse_date(query, "end")
+        if start > end:
+            raise ApiError(400, "start must not be after end")
+        if (end - start).days + 1 > MAX_RANGE_DAYS:
+            raise ApiError(400, f"range is limited to {MAX_RANGE_DAYS} days")
+
+        fmt = query.get("format", "csv")
+        writers = {
+            "csv": (CSV_MIME, StreamingExporter.iter_csv),
+            "parquet": (PARQUET_MIME, StreamingExporter.iter_parquet),
+            "arrow": (ARROW_MIME, _iter_arrow),
+        }
+        if fmt not in writers:
+            raise ApiError(400, "format must be one of csv, parquet, arrow")
+        mime, writer = writers[fmt]
+
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        etag = await asyncio.to_thread(self._etag, "/exports/range", query, days)
+        if headers.get("if-none-match") == etag:
+            await self._send_not_modified(send, etag)
+            return
+
+        filename = f"attendance_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.{fmt}"
+        chunk = None
+        if not head_only:
+            # Build the first chunk before committing to a 200, so early
+            # failures still get a proper error response
+            chunks = iter(writer(self.attendance_service.iter_range_table(start, end)))
+            chunk = await asyncio.to_thread(next, chunks, None)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": self._headers(mime, etag, extra=[
+                (b"content-disposition", f'attachment; filename="{filename}"'.encode()),
+            ]),
+        })
+        while chunk is not None:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            chunk = await asyncio.to_thread(next, chunks, None)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def personnel_search(self, send, query, headers, head_only) -> None:
+        """Ranked cross-division name search (?q=..., optional limit)."""
+        try:
+            limit = int(query.get("limit", AppConstants.SEARCH_MAX_RESULTS))
+        except ValueError:
+            raise ApiError(400, "limit must be an integer")
+        hits = PersonnelSearchIndex.search(query.get("q", ""), limit=max(1, limit))
+        await self._send_json(send, 200, {"results": [hit.__dict__ for hit in hits]})
+
+    async def employee_history(self, send, query, headers, head_only) -> None:
+        """Day-by-day timeline of one employee (?name=...&start=...&end=...)."""
+        name = query.get("name", "")
+        if name not in DivisionRegistry.get_member_index():
+            raise ApiError(404, f"Unknown employee: {name}")
+        start = self._parse_date(query, "start")
+        end = self._parse_date(query, "end")
+        if start > end:
+            raise ApiError(400, "start must not be after end")
+        if (end - start).days + 1 > MAX_RANGE_DAYS:
+            raise ApiError(400, f"range is limited to {MAX_RANGE_DAYS} days")
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+        def build():
+            timeline, _ = self.attendance_service.build_employee_history(name, start, end)
+            timeline[AppConstants.COL_DATE] = [day.strftime(AppConstants.DATE_FORMAT) for day in timeline[AppConstants.COL_DATE]]
+            return timeline
+
+        await self._send_cached_frame(send, headers, head_only, query, days, build, path="/employees/history")
+
+    async def unmatched_names(self, send, query, headers, head_only) -> None:
+        """Punch / status names matching no division member (see NameResolver)."""
+        def build():
+            snapshot = SnapshotManager.current()
+            df = NameResolver.unmatched(snapshot.attendance, snapshot.status)
+            df["Last Punch"] = df["Last Punch"].dt.strftime(AppConstants.DATETIME_FORMAT)
+            return df.astype(object).where(df.notna(), None).to_dict("records")
+
+        payload = await asyncio.to_thread(build)
+        await self._send_json(send, 200, {"unmatched": payload, "alias_error": NameResolver.last_error})
+
+    # --------------------------------------------------------------- helpers
+
+    @staticmethod
+    def _parse_date(query: Dict[str, str], name: str) -> date:
+        value = query.get(name)
+        if not value:
+            raise ApiError(400, f"missing query parameter: {name}")
+        try:
+            return datetime.strptime(value, AppConstants.DATE_FORMAT).date()
+        except ValueError:
+            raise ApiError(400, f"{name} must be a YYYY-MM-DD date")
+
+    def _etag(self, path: str, query: Dict[str, str], days: Iterable[date]) -> str:
+        """Weak validator over the endpoint, its parameters and the days it reads."""
+        snapshot = SnapshotManager.current()
+        digest = hashlib.md5(path.encode())
+        digest.update(json.dumps(sorted(query.items())).encode())
+        digest.update(str(DivisionRegistry.version()).encode())
+        for day in days:
+            digest.update(f"{day}:{snapshot.day_versions.get(day, '')}:{ShiftRuleEngine.day_signature(day)};".encode())
+        return f'W/"{digest.hexdigest()}"'
+
+    async def _send_cached_json(self, send, headers, head_only, path, query, days, build) -> None:
+        etag = await asyncio.to_thread(self._etag, path, query, days)
+        if headers.get("if-none-match") == etag:
+            await self._send_not_modified(send, etag)
+            return
+        cached = self._response_cache.get(etag)
+        if cached is None:
+            payload = await asyncio.to_thread(build)
+            cached = (json.dumps(payload, default=_json_default).encode("utf-8"), JSON_MIME)
+            self._remember(etag, cached)
+        await self._send_body(send, 200, cached[0], cached[1], etag, head_only)
+
+    async def _send_cached_frame(self, send, headers, head_only, query, days, build, path="/reports/daily") -> None:
+        wants_arrow = ARROW_MIME in headers.get("accept", "")
+        path = f"{path}#arrow" if wants_arrow else path
+        etag = await asyncio.to_thread(self._etag, path, query, days)
+        if headers.get("if-none-match") == etag:
+            await self._send_not_modified(send, etag)
+            return
+        cached = self._response_cache.get(etag)
+        if cached is None:
+            frame = await asyncio.to_thread(build)
+            if wants_arrow:
+                cached = (b"".join(_iter_arrow([frame])), ARROW_MIME)
+            else:
+                cached = (frame.to_json(orient="records").encode("utf-8"), JSON_MIME)
+            self._remember(etag, cached)
+        await self._send_body(send, 200, cached[0], cached[1], etag, head_only)
+
+    def _remember(self, etag: str, entry: Tuple[bytes, str]) -> None:
+        self._response_cache[etag] = entry
+        while len(self._response_cache) > RESPONSE_CACHE_ENTRIES:
+            self._response_cache.popitem(last=False)
+
+    @staticmethod
+    def _headers(mime: str, etag: Optional[str] = None, extra: Optional[List] = None) -> List:
+        headers = [(b"content-type", mime.encode()), (b"cache-control", b"no-cache")]
+        if etag:
+            headers.append((b"etag", etag.encode()))
+        return headers + (extra or [])
+
+    async def _send_body(self, send, status: int, body: bytes, mime: str, etag: Optional[str], head_only: bool) -> None:
+        headers = self._headers(mime, etag, extra=[(b"content-length", str(len(body)).encode())])
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if head_only else body})
+
+    async def _send_json(self, send, status: int, payload: Any) -> None:
+        body = json.dumps(payload, default=_json_default).encode("utf-8")
+        await self._send_body(send, status, body, JSON_MIME, None, False)
+
+    async def _send_not_modified(self, send, etag: str) -> None:
+        await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag.encode())]})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def _iter_arrow(frames):
+    """Yield Arrow IPC stream bytes, one record batch group per frame."""
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    writer = None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, table.schema)
+        writer.write_table(table)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+def _json_default(value: Any) -> Any:
+    """JSON encoder for dates, timestamps and numpy scalars."""
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+app = ReportingApi()
@@ -9,31 +9,53 @@ Architecture: Clean Architecture with MVC Pattern
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+from pandas.api.types import union_categoricals
 from datetime import time, datetime, timedelta
 import io
-import xlsxwriter
 import streamlit.components.v1 as components
-from typing import Dict, List, Tuple, Optional, Any
-from dataclasses import dataclass, field
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple, Optional, Any
+from dataclasses import dataclass, field, replace
+from contextlib import contextmanager
 from enum import Enum
 from abc import ABC, abstractmethod
+import os
+import re
+import glob
 import json
 import hashlib
-from functools import lru_cache
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
+import bisect
+import difflib
+import unicodedata
+import html
+import pickle
+import shutil
+import queue
+import random
+import gzip
+import zlib
+import ssl
+import http.client
+import urllib.error
+import urllib.request
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import tempfile
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from collections import Counter, OrderedDict, deque
+from functools import lru_cache, wraps
 import base64
-import uuid
-import base64 # <--- Pastikan ini ada
+import time as time_module
 
-# Tambahkan fungsi ini untuk membaca file gambar lokal
-def get_base64_image(image_path):
-    try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except FileNotFoundError:
-        return None
+# Heavy optional-at-render-time dependencies (plotly, xlsxwriter, PIL) are
+# imported inside the views that use them, keeping reruns and cold start light.
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+logger = logging.getLogger(__name__)
 
 # ================================================================================
 # SECTION 1: CONFIGURATION & CONSTANTS LAYER
@@ -57,11 +79,23 @@ class AppConstants:
     COL_EMPLOYEE_NAME = 'Nama Karyawan'
     COL_DATE = 'Tanggal'
     COL_STATUS = 'Keterangan'
+    COL_DATE_END = 'Tanggal Selesai'  # optional in the status sheet: last day of a leave interval
+    COL_EPOCH_DAY = 'Hari_Ke'  # int32 days since 1970-01-01 (punch log)
+    COL_MINUTE = 'Menit_Ke'  # int16 minute of day 0..1439 (punch log)
+    COL_SHIFT_DAY = 'Hari_Shift'  # int32 epoch day of the shift instance the punch belongs to
+    COL_SHIFT = 'Shift'  # report column: SHIFT_NIGHT for sessions crossing midnight
+    SHIFT_NIGHT = 'MALAM'
     
     # Time Thresholds
     LATE_THRESHOLD = time(7, 5, 0)
     EARLY_ARRIVAL = time(6, 0, 0)
     
+    # Shift Sessionization (divisions with an OvernightPolicy)
+    SHIFT_GAP_HOURS = 14  # max gap between evening punch and next-morning checkout
+    NIGHT_SHIFT_START = "18:00"  # a session starting at/after this may cross midnight
+    NIGHT_SHIFT_END = "10:00"  # next-day punches before this may close it
+    OVERNIGHT_DIVISIONS = ("AMC & TERMINAL", "PKP-PK", "AVSEC")  # 24/7 divisions
+    
     # Cache Configuration
     CACHE_TTL_SECONDS = 10
     MAX_CACHE_ENTRIES = 100
@@ -70,12 +104,35 @@ class AppConstants:
     SIDEBAR_STATE = "expanded"
     LAYOUT_MODE = "wide"
     CARDS_PER_ROW = 4
+    TABLE_PAGE_SIZE = 500  # rows per page in table view
+    HISTORY_DEFAULT_DAYS = 365  # default range of the employee history view
+    
+    # Status / permit intervals
+    MAX_LEAVE_DAYS = 366  # longer intervals are cut (guards against typos in the end date)
+    
+    # Name Reconciliation (see NameResolver)
+    NAME_SUGGESTION_CUTOFF = 0.85  # min similarity for offline alias suggestions
+    
+    # Personnel Search (see PersonnelSearchIndex)
+    SEARCH_MAX_RESULTS = 20
+    SEARCH_MIN_SIMILARITY = 0.5  # share of query trigrams a misspelled match must contain
+    
+    # Summary Store
+    SUMMARY_STORE_MAX_DAYS = 400  # per-day reports kept in memory (LRU)
     
     # Data Refresh Intervals
     AUTO_REFRESH_INTERVAL = 30  # seconds
+    REFRESH_BACKOFF_MAX = 600  # cap for exponential backoff after failed refreshes
+    SNAPSHOT_STALE_AFTER = 120  # show the staleness badge when data is older than this
+    SNAPSHOT_WINDOW_DAYS = 62  # days kept in memory when the SQL engine serves older history
+    LIVE_CHECK_INTERVAL = 5  # seconds between live-mode generation checks
+    EVENT_BATCH_SECONDS = 1.0  # punch events are applied in batches
     
     # Export Settings
     EXCEL_ENGINE = 'xlsxwriter'
+    
+    # Ingestion
+    INGEST_CHUNK_ROWS = 50_000  # raw CSV rows parsed and compacted at a time
     DATE_FORMAT = '%Y-%m-%d'
     TIME_FORMAT = '%H:%M'
     DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
@@ -148,9 +205,59 @@ class DataSourceConfig:
     # Google Forms
     REPORT_FORM_URL = "https://docs.google.com/forms/d/e/1FAIpQLSeopdaE-lyOtFd2TUr5C3K2DWE3Syt2PaKoXMp0cmWKIFnijw/viewform?usp=header"
     
+    # Active sources (see DataSources.resolve for the accepted forms).
+    # Default to the published sheets; point at local files/DBs for offline use.
+    ATTENDANCE_SOURCE = os.environ.get("WEDABAY_ATTENDANCE_SOURCE", ATTENDANCE_SHEET_URL)
+    STATUS_SOURCE = os.environ.get("WEDABAY_STATUS_SOURCE", STATUS_SHEET_URL)
+    
     # API Endpoints (for future expansion)
     API_BASE_URL = "https://api.wedabay.airport/v1"
-    WEBSOCKET_URL = "wss://ws.wedabay.airport/notifications"
+    
+    # Prometheus-style metrics endpoint (bound to localhost)
+    METRICS_HOST = os.environ.get("WEDABAY_METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.environ.get("WEDABAY_METRICS_PORT", "9464"))
+    # Each worker process binds the first free port of METRICS_PORT ..
+    # METRICS_PORT + METRICS_PORT_SPAN - 1; scrape every port of the range
+    METRICS_PORT_SPAN = int(os.environ.get("WEDABAY_METRICS_PORT_SPAN", "16"))
+    FETCH_TIMEOUT_SECONDS = 30
+    # Shared HTTP client (HttpClient): read timeout is the source's timeout
+    HTTP_CONNECT_TIMEOUT_SECONDS = 5
+    HTTP_RETRIES = 2  # extra attempts after connection errors / 429 / 5xx
+    HTTP_RETRY_BACKOFF_SECONDS = 0.5  # base of the jittered exponential backoff
+    # Per-source timeouts (HTTP: read timeout of one attempt); a refresh waits
+    # for all attempts of a fetch, see SourceAdapter.wait_seconds
+    ATTENDANCE_TIMEOUT_SECONDS = float(os.environ.get("WEDABAY_ATTENDANCE_TIMEOUT", FETCH_TIMEOUT_SECONDS))
+    STATUS_TIMEOUT_SECONDS = float(os.environ.get("WEDABAY_STATUS_TIMEOUT", FETCH_TIMEOUT_SECONDS))
+    
+    # Last good snapshot persisted here for cold starts / outages ("" disables)
+    SNAPSHOT_CACHE_DIR = os.environ.get(
+        "WEDABAY_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+    )
+    
+    # Multi-worker deployments: directory shared by all server processes
+    # (see SharedSnapshot; "" disables). Role: "auto" (elected via a lock
+    # file), "refresher" or "reader".
+    SHARED_SNAPSHOT_DIR = os.environ.get("WEDABAY_SHARED_DIR", "")
+    SHARED_SNAPSHOT_ROLE = os.environ.get("WEDABAY_SHARED_ROLE", "auto")
+    
+    # Alias table for punch-device / status-sheet name variants (see NameResolver)
+    NAME_ALIASES_PATH = os.environ.get(
+        "WEDABAY_NAME_ALIASES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_aliases.json")
+    )
+    
+    # Optional JSON file with shift rules per division/weekday (see ShiftRuleEngine)
+    SHIFT_RULES_PATH = os.environ.get("WEDABAY_SHIFT_RULES", "")
+    
+    # Optional embedded SQL engine over a local columnar (Parquet) copy of the
+    # punch history: "duckdb" to enable (needs the duckdb package)
+    SQL_ENGINE = os.environ.get("WEDABAY_SQL_ENGINE", "")
+    COLUMNAR_STORE_DIR = os.environ.get(
+        "WEDABAY_COLUMNAR_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "columnar")
+    )
+    
+    # Punch event stream: ws(s):// for websocket, http(s):// for SSE
+    WEBSOCKET_URL = os.environ.get("WEDABAY_WEBSOCKET_URL", "wss://ws.wedabay.airport/notifications")
+    EVENT_STREAM_ENABLED = os.environ.get("WEDABAY_EVENT_STREAM", "0") == "1"
 
 
 class DivisionRegistry:
@@ -160,12 +267,23 @@ class DivisionRegistry:
     """
     
     _divisions: Dict[str, DivisionConfig] = {}
+    _member_index: Optional[Dict[str, DivisionConfig]] = None
+    _version: int = 0
     
     @classmethod
     def register(cls, division: DivisionConfig) -> None:
         """Register a new division configuration."""
         # MODIFIED: Overwrite existing keys to prevent Duplicate Error on Reload
+        if cls._divisions.get(division.name) == division:
+            return  # identical re-registration on rerun, keep derived caches
         cls._divisions[division.name] = division
+        cls._member_index = None
+        cls._version += 1
+    
+    @classmethod
+    def version(cls) -> int:
+        """Monotonic counter bumped on every registration (for derived caches)."""
+        return cls._version
     
     @classmethod
     def get(cls, name: str) -> Optional[DivisionConfig]:
@@ -177,13 +295,24 @@ class DivisionRegistry:
         """Get all registered divisions."""
         return cls._divisions.copy()
     
+    @classmethod
+    def get_member_index(cls) -> Dict[str, DivisionConfig]:
+        """
+        Member name -> division lookup, built once per registry version.
+        First registration wins, same as the old linear scan.
+        """
+        if cls._member_index is None:
+            index: Dict[str, DivisionConfig] = {}
+            for division in cls._divisions.values():
+                for member in division.members:
+                    index.setdefault(member, division)
+            cls._member_index = index
+        return cls._member_index
+    
     @classmethod
     def find_by_member(cls, member_name: str) -> Optional[DivisionConfig]:
         """Find division by member name."""
-        for division in cls._divisions.values():
-            if member_name in division.members:
-                return division
-        return None
+        return cls.get_member_index().get(member_name)
     
     @classmethod
     def get_all_members(cls) -> List[str]:
@@ -200,6 +329,564 @@ class DivisionRegistry:
         return list(dict.fromkeys(members))
 
 
+class NameResolver:
+    """
+    Reconciles employee names across the punch log (Person Name), the status
+    sheet (Nama Karyawan) and DivisionConfig.members.
+    
+    Every spelling is reduced to a normalized key (accents stripped, case
+    folded, punctuation and extra spaces dropped). Keys resolve to an integer
+    employee id (position in DivisionRegistry.get_all_members) through the
+    members themselves plus a persisted alias table. Lookups are exact key
+    matches only; fuzzy matching runs offline in batch (suggest, see
+    name_aliases.py) and is stored as suggestions until accepted as aliases.
+    
+    Alias file (DataSourceConfig.NAME_ALIASES_PATH):
+        {"aliases": {"Variant Name": "Registry Name"},
+         "suggestions": {"Variant Name": ["Registry Name", 0.91]}}
+    """
+    
+    UNMATCHED = -1
+    
+    _lock = threading.Lock()
+    _state: Optional[Tuple[int, float]] = None  # (registry version, alias file mtime)
+    _index: Tuple[List[str], Dict[str, int]] = ([], {})  # (id -> member, key -> id)
+    _resolved: Dict[str, int] = {}  # raw spelling -> id, memo per index
+    _aliases: Dict[str, str] = {}
+    _suggestions: Dict[str, Tuple[str, float]] = {}
+    last_error: Optional[str] = None
+    
+    @staticmethod
+    def normalize(name: Any) -> str:
+        """Join key: "Muh.  Ma'ruf " and "MUH MARUF" both become "muh maruf"."""
+        text = unicodedata.normalize("NFKD", str(name))
+        text = "".join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+        text = re.sub(r"['’`]", "", text)
+        return " ".join(re.findall(r"[^\W_]+", text))
+    
+    @classmethod
+    def _alias_mtime(cls) -> float:
+        try:
+            return os.path.getmtime(DataSourceConfig.NAME_ALIASES_PATH)
+        except OSError:
+            return 0.0
+    
+    @classmethod
+    def _ensure(cls) -> Tuple[List[str], Dict[str, int]]:
+        """Key index, rebuilt when the registry or the alias file changed."""
+        state = (DivisionRegistry.version(), cls._alias_mtime())
+        if state == cls._state:
+            return cls._index
+        with cls._lock:
+            if state != cls._state:
+                aliases, suggestions = cls.load_aliases()
+                members = DivisionRegistry.get_all_members()
+                keys: Dict[str, int] = {}
+                for employee_id, member in enumerate(members):
+                    keys.setdefault(cls.normalize(member), employee_id)
+                # Registry spellings win over aliases with the same key
+                for variant, target in aliases.items():
+                    employee_id = keys.get(cls.normalize(target))
+                    if employee_id is not None:
+                        keys.setdefault(cls.normalize(variant), employee_id)
+                cls._index = (members, keys)
+                cls._resolved = {}
+                cls._aliases, cls._suggestions = aliases, suggestions
+                cls._state = state
+        return cls._index
+    
+    @classmethod
+    def load_aliases(cls) -> Tuple[Dict[str, str], Dict[str, Tuple[str, float]]]:
+        """Aliases and pending suggestions from the alias file (empty when missing or invalid)."""
+        path = DataSourceConfig.NAME_ALIASES_PATH
+        cls.last_error = None
+        if not path or not os.path.exists(path):
+            return {}, {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            aliases = {str(k): str(v) for k, v in payload.get("aliases", {}).items()}
+            suggestions = {
+                str(k): (str(v[0]), float(v[1])) for k, v in payload.get("suggestions", {}).items()
+            }
+            return aliases, suggestions
+        except (OSError, ValueError, TypeError, AttributeError, IndexError) as e:
+            cls.last_error = f"{path}: {e}"
+            return {}, {}
+    
+    @classmethod
+    def save_aliases(cls, aliases: Dict[str, str], suggestions: Dict[str, Tuple[str, float]]) -> None:
+        """Write the alias file atomically (picked up by every process via its mtime)."""
+        path = DataSourceConfig.NAME_ALIASES_PATH
+        payload = {
+            "aliases": dict(sorted(aliases.items())),
+            "suggestions": {k: [v[0], round(v[1], 3)] for k, v in sorted(suggestions.items())},
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    
+    @classmethod
+    def accept(cls, names) -> int:
+        """Turn stored suggestions for these names into aliases; returns how many."""
+        with cls._lock:
+            aliases, suggestions = cls.load_aliases()
+            accepted = [name for name in names if name in suggestions]
+            for name in accepted:
+                aliases[name] = suggestions.pop(name)[0]
+            if accepted:
+                cls.save_aliases(aliases, suggestions)
+        return len(accepted)
+    
+    @classmethod
+    def employee_id(cls, name: Any) -> int:
+        """Employee id for any spelling, UNMATCHED when neither a member nor an alias."""
+        members, keys = cls._ensure()
+        resolved = cls._resolved
+        employee_id = resolved.get(name)
+        if employee_id is None:
+            employee_id = keys.get(cls.normalize(name), cls.UNMATCHED)
+            resolved[name] = employee_id
+        return employee_id
+    
+    @classmethod
+    def employee_ids(cls, names) -> np.ndarray:
+        """Vectorized employee_id; resolves each distinct spelling once."""
+        codes, uniques = pd.factorize(pd.Series(names, dtype=object), use_na_sentinel=True)
+        lookup = np.fromiter((cls.employee_id(n) for n in uniques), dtype=np.int32, count=len(uniques))
+        ids = np.full(len(codes), cls.UNMATCHED, dtype=np.int32)
+        ids[codes >= 0] = lookup[codes[codes >= 0]]
+        return ids
+    
+    @classmethod
+    def canonical(cls, name: Any) -> str:
+        """Registry spelling for a name; unmatched names are returned stripped, as they are."""
+        members, _ = cls._ensure()
+        employee_id = cls.employee_id(name)
+        return members[employee_id] if employee_id != cls.UNMATCHED else str(name).strip()
+    
+    @classmethod
+    def canonicalize(cls, names: pd.Series) -> pd.Categorical:
+        """
+        Name column (categorical or strings) with every variant replaced by its
+        registry spelling. Works on the categories, so cost is per distinct name.
+        """
+        values = pd.Categorical(names)
+        categories = list(values.categories)
+        mapped = [cls.canonical(name) for name in categories]
+        if mapped == categories:
+            return values
+        merged = pd.Index(pd.unique(np.asarray(mapped, dtype=object)))
+        remap = np.append(merged.get_indexer(mapped), -1)  # code -1 (NaN) stays -1
+        return pd.Categorical.from_codes(remap[values.codes], categories=merged)
+    
+    @classmethod
+    def unmatched(cls, attendance: Optional[pd.DataFrame], status: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Names that resolve to no employee, with their punch / status counts,
+        last punch and the stored offline suggestion (if any).
+        """
+        columns = ['Name', 'Source', 'Punches', 'Last Punch', 'Suggestion', 'Score']
+        rows = []
+        cls._ensure()
+        suggestions = cls._suggestions
+        if attendance is not None and not attendance.empty:
+            persons = attendance[AppConstants.COL_PERSON_NAME]
+            grouped = attendance.groupby(persons, observed=True)[AppConstants.COL_EVENT_TIME].agg(['size', 'max'])
+            ids = cls.employee_ids(grouped.index)
+            for name, (count, last) in grouped[ids == cls.UNMATCHED].iterrows():
+                suggestion = suggestions.get(name, ("", None))
+                rows.append((name, 'punch', int(count), last, suggestion[0], suggestion[1]))
+        if status is not None and not status.empty:
+            counts = status[AppConstants.COL_EMPLOYEE_NAME].value_counts()
+            ids = cls.employee_ids(counts.index)
+            for name, count in counts[ids == cls.UNMATCHED].items():
+                suggestion = suggestions.get(name, ("", None))
+                rows.append((name, 'status', int(count), pd.NaT, suggestion[0], suggestion[1]))
+        df = pd.DataFrame(rows, columns=columns)
+        # datetime64 even when empty or status-only (object column otherwise)
+        df['Last Punch'] = pd.to_datetime(df['Last Punch'], errors='coerce')
+        return df.sort_values(['Source', 'Punches'], ascending=[True, False], ignore_index=True)
+    
+    @classmethod
+    def suggest(cls, names, cutoff: float = AppConstants.NAME_SUGGESTION_CUTOFF) -> Dict[str, Tuple[str, float]]:
+        """
+        Offline batch pass: best registry match per unmatched name, scored on
+        the normalized keys (also with tokens sorted, for swapped name order).
+        Too slow for the lookup path by design; run it from name_aliases.py.
+        """
+        members, keys = cls._ensure()
+        candidates = {cls.normalize(member): member for member in reversed(members)}
+        sorted_keys = {" ".join(sorted(key.split())): key for key in candidates}
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        result: Dict[str, Tuple[str, float]] = {}
+        for name in dict.fromkeys(names):
+            if cls.employee_id(name) != cls.UNMATCHED:
+                continue
+            key = cls.normalize(name)
+            if not key:
+                continue
+            best, best_score = None, cutoff
+            for variant, target in ((key, candidates), (" ".join(sorted(key.split())), sorted_keys)):
+                matcher.set_seq2(variant)
+                for candidate in target:
+                    matcher.set_seq1(candidate)
+                    if matcher.real_quick_ratio() < best_score or matcher.quick_ratio() < best_score:
+                        continue
+                    score = matcher.ratio()
+                    if score >= best_score:
+                        member_key = target[candidate] if target is sorted_keys else candidate
+                        best, best_score = candidates[member_key], score
+            if best is not None:
+                result[name] = (best, best_score)
+        return result
+
+
+@dataclass
+class PerfSpan:
+    """One timed operation inside a rerun (or a background task)."""
+    name: str
+    start_ms: float
+    duration_ms: float = 0.0
+    depth: int = 0
+    rows: Optional[int] = None
+    cache: Optional[str] = None  # 'hit' / 'miss'
+
+
+class PerfMonitor:
+    """
+    Lightweight instrumentation for the hot paths.
+    Spans are collected per script rerun (thread-local, the script thread of
+    the session) and stored in that session's history on end_run(); spans
+    from background threads go to a shared ring buffer. Overhead is one
+    perf_counter pair per span.
+    """
+    
+    HISTORY_SIZE = 20
+    BACKGROUND_SIZE = 200
+    
+    _local = threading.local()
+    _background: "deque[PerfSpan]" = deque(maxlen=BACKGROUND_SIZE)
+    _cache_counters: Dict[str, Dict[str, int]] = {}
+    _counters_lock = threading.Lock()
+    
+    @classmethod
+    def begin_run(cls) -> None:
+        cls._local.spans = []
+        cls._local.stack = []
+        cls._local.started = time_module.perf_counter()
+    
+    @classmethod
+    def end_run(cls, label: str) -> Optional[Dict[str, Any]]:
+        """Close the rerun and keep it in the session's perf history."""
+        spans = getattr(cls._local, 'spans', None)
+        if spans is None:
+            return None
+        record = {
+            'label': label,
+            'at': datetime.now(),
+            'total_ms': (time_module.perf_counter() - cls._local.started) * 1000,
+            'spans': spans,
+        }
+        cls._local.spans = None
+        try:
+            history = st.session_state.setdefault('perf_history', [])
+            history.append(record)
+            del history[:-cls.HISTORY_SIZE]
+        except Exception:
+            pass  # outside a Streamlit session
+        return record
+    
+    @classmethod
+    @contextmanager
+    def span(cls, name: str):
+        """Time a block: `with PerfMonitor.span("x") as s: ...; s.rows = n`."""
+        spans = getattr(cls._local, 'spans', None)
+        stack = getattr(cls._local, 'stack', None) if spans is not None else None
+        started = time_module.perf_counter()
+        base = cls._local.started if spans is not None else started
+        record = PerfSpan(name, (started - base) * 1000, depth=len(stack) if stack is not None else 0)
+        if stack is not None:
+            stack.append(record)
+        try:
+            yield record
+        finally:
+            record.duration_ms = (time_module.perf_counter() - started) * 1000
+            AppMetrics.span_duration.observe(record.duration_ms / 1000, span=name)
+            if stack is not None:
+                stack.pop()
+                spans.append(record)
+            else:
+                cls._background.append(record)
+    
+    @classmethod
+    def timed(cls, name: str):
+        """Decorator form of span(); records row counts of DataFrame results."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with cls.span(name) as record:
+                    result = func(*args, **kwargs)
+                    frame = result[0] if isinstance(result, tuple) and result else result
+                    if isinstance(frame, pd.DataFrame):
+                        record.rows = len(frame)
+                    return result
+            return wrapper
+        return decorator
+    
+    @classmethod
+    def cache_event(cls, cache_name: str, hit: bool) -> None:
+        """Count a cache lookup and tag the innermost open span."""
+        outcome = 'hit' if hit else 'miss'
+        AppMetrics.cache_requests.inc(cache=cache_name, result=outcome)
+        with cls._counters_lock:
+            counters = cls._cache_counters.setdefault(cache_name, {'hit': 0, 'miss': 0})
+            counters[outcome] += 1
+        stack = getattr(cls._local, 'stack', None)
+        if stack:
+            stack[-1].cache = outcome
+    
+    @classmethod
+    def cache_counters(cls) -> Dict[str, Dict[str, int]]:
+        with cls._counters_lock:
+            return {name: dict(values) for name, values in cls._cache_counters.items()}
+    
+    @classmethod
+    def background_spans(cls) -> List[PerfSpan]:
+        return list(cls._background)
+    
+    @staticmethod
+    def start_profiler(kind: Optional[str]):
+        """Start a one-rerun profiler ('cprofile' or 'pyinstrument')."""
+        if kind == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                kind = 'cprofile'
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return kind, profiler
+        if kind == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return kind, profiler
+        return None
+    
+    @staticmethod
+    def stop_profiler(handle) -> Optional[str]:
+        """Stop a profiler from start_profiler() and return a text report."""
+        if handle is None:
+            return None
+        kind, profiler = handle
+        if kind == 'pyinstrument':
+            profiler.stop()
+            return profiler.output_text(unicode=True, color=False)
+        import pstats
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(40)
+        return output.getvalue()
+
+
+def _prom_label(name: str, value: str) -> str:
+    """Render one label pair with Prometheus escaping."""
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'{name}="{escaped}"'
+
+
+class _Metric:
+    """Base for labelled metrics rendered in Prometheus text format."""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [_prom_label(name, value) for name, value in zip(self.label_names, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+    
+    def _render_value(self, key, value) -> List[str]:
+        return [f"{self.name}{self._label_text(key)} {value}"]
+
+
+class MetricCounter(_Metric):
+    kind = "counter"
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class MetricGauge(_Metric):
+    kind = "gauge"
+    
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class MetricHistogram(_Metric):
+    kind = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            counts = [c + (1 if value <= bound else 0) for c, bound in zip(counts, self.buckets)]
+            self._values[key] = (counts, total + value, count + 1)
+    
+    def _render_value(self, key, value) -> List[str]:
+        counts, total, count = value
+        lines = [
+            f"{self.name}_bucket{self._label_text(key, _prom_label('le', str(bound)))} {c}"
+            for bound, c in zip(self.buckets, counts)
+        ]
+        lines.append(f"{self.name}_bucket{self._label_text(key, _prom_label('le', '+Inf'))} {count}")
+        lines.append(f"{self.name}_sum{self._label_text(key)} {total}")
+        lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+class AppMetrics:
+    """
+    Process-wide Prometheus-style metrics, fed by repositories, services,
+    exporters and PerfMonitor. render() produces the text exposition format.
+    """
+    
+    SESSION_ACTIVE_SECONDS = 300
+    
+    fetch_duration = MetricHistogram(
+        "wedabay_fetch_duration_seconds", "Source download + parse latency", ("source",))
+    fetch_failures = MetricCounter(
+        "wedabay_fetch_failures_total", "Failed source fetches", ("source",))
+    fetch_bytes = MetricCounter(
+        "wedabay_fetch_bytes_total", "Bytes downloaded from sources", ("source",))
+    rows_parsed = MetricCounter(
+        "wedabay_rows_parsed_total", "Rows parsed from sources", ("source",))
+    last_success = MetricGauge(
+        "wedabay_fetch_last_success_timestamp_seconds", "Unix time of the last good fetch", ("source",))
+    cache_requests = MetricCounter(
+        "wedabay_cache_requests_total", "Cache lookups by outcome", ("cache", "result"))
+    report_build = MetricHistogram(
+        "wedabay_report_build_duration_seconds", "Daily report build time (summary store misses)")
+    export_duration = MetricHistogram(
+        "wedabay_export_duration_seconds", "Export generation time", ("format",))
+    span_duration = MetricHistogram(
+        "wedabay_span_duration_seconds", "PerfMonitor span durations", ("span",))
+    http_requests = MetricCounter(
+        "wedabay_http_requests_total", "Source HTTP requests by connection reuse", ("connection",))
+    http_retries = MetricCounter(
+        "wedabay_http_retries_total", "Source HTTP requests retried after an error")
+    active_sessions = MetricGauge(
+        "wedabay_active_sessions", f"Sessions with a rerun in the last {SESSION_ACTIVE_SECONDS}s")
+    
+    _sessions: Dict[str, float] = {}
+    _sessions_lock = threading.Lock()
+    
+    @classmethod
+    def touch_session(cls, session_id: str) -> None:
+        with cls._sessions_lock:
+            cls._sessions[session_id] = time_module.time()
+    
+    @classmethod
+    def render(cls) -> str:
+        cutoff = time_module.time() - cls.SESSION_ACTIVE_SECONDS
+        with cls._sessions_lock:
+            for session_id in [k for k, seen in cls._sessions.items() if seen < cutoff]:
+                del cls._sessions[session_id]
+            cls.active_sessions.set(len(cls._sessions))
+        metrics = [
+            cls.fetch_duration, cls.fetch_failures, cls.fetch_bytes, cls.rows_parsed,
+            cls.last_success, cls.http_requests, cls.http_retries, cls.cache_requests,
+            cls.report_build, cls.export_duration, cls.span_duration, cls.active_sessions,
+        ]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves AppMetrics on http://METRICS_HOST:<port>/metrics (once per process).
+    Metrics are per process: with several workers each binds its own port
+    from the METRICS_PORT_SPAN range (see port), or scrape slot_api's
+    /metrics on every worker.
+    """
+    
+    _server: Optional[ThreadingHTTPServer] = None
+    _start_lock = threading.Lock()
+    port: Optional[int] = None
+    
+    @classmethod
+    def ensure_started(cls, host: str, port: int, span: int = 1) -> bool:
+        with cls._start_lock:
+            if cls._server is not None:
+                return True
+            
+            class _Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = AppMetrics.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                
+                def log_message(self, *args):
+                    pass
+            
+            server = None
+            for candidate in range(port, port + max(span, 1)):
+                try:
+                    server = ThreadingHTTPServer((host, candidate), _Handler)
+                    break
+                except OSError:
+                    continue  # port taken, e.g. by another worker process
+            if server is None:
+                logger.warning(
+                    "metrics endpoint disabled: ports %d-%d on %s are all in use",
+                    port, port + max(span, 1) - 1, host,
+                )
+                return False
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+            cls._server = server
+            cls.port = server.server_address[1]
+            return True
+
+
 # Initialize Division Registry with actual data
 def initialize_divisions():
     """
@@ -248,6 +935,326 @@ def initialize_divisions():
     for division in divisions_data:
         DivisionRegistry.register(division)
 
+
+@dataclass(frozen=True)
+class SlotWindow:
+    """One attendance slot window, HH:MM bounds: [start, end) or [start, end]."""
+    slot: str
+    start: str
+    end: str
+    end_inclusive: bool = False
+    
+    @staticmethod
+    def _seconds(hhmm: str) -> int:
+        hours, minutes = hhmm.split(":")[:2]
+        return int(hours) * 3600 + int(minutes) * 60
+    
+    def contains(self, second_of_day: int) -> bool:
+        start, end = self._seconds(self.start), self._seconds(self.end)
+        return start <= second_of_day < end or (self.end_inclusive and second_of_day == end)
+
+
+@dataclass(frozen=True)
+class ShiftRuleSet:
+    """
+    Ordered slot windows; the first window containing a punch wins
+    (same as the original if/elif chain).
+    """
+    name: str
+    windows: Tuple[SlotWindow, ...]
+    
+    def compile(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Two 1440-entry slot tables (slot index or -1): one for punches on
+        the exact minute (hh:mm:00) and one for the rest of the minute.
+        They only differ at inclusive end bounds.
+        """
+        on_minute = np.full(1440, -1, dtype=np.int8)
+        within_minute = np.full(1440, -1, dtype=np.int8)
+        for minute in range(1440):
+            for table, second in ((on_minute, minute * 60), (within_minute, minute * 60 + 30)):
+                for window in self.windows:
+                    if window.contains(second):
+                        table[minute] = ShiftRuleEngine.SLOTS.index(window.slot)
+                        break
+        return on_minute, within_minute
+    
+    def signature(self) -> str:
+        return hashlib.md5(repr(self).encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class OvernightPolicy:
+    """
+    Sessionization rule for 24/7 divisions: a session that starts at or
+    after night_start may take next-day punches before night_end, as long
+    as each follows the previous punch within gap_hours. A morning punch
+    followed within gap_hours by same-day daytime punches (night_end ..
+    night_start) opens a day shift instead.
+    """
+    gap_hours: float = AppConstants.SHIFT_GAP_HOURS
+    night_start: str = AppConstants.NIGHT_SHIFT_START
+    night_end: str = AppConstants.NIGHT_SHIFT_END
+    
+    @property
+    def start_minute(self) -> int:
+        return SlotWindow._seconds(self.night_start) // 60
+    
+    @property
+    def end_minute(self) -> int:
+        return SlotWindow._seconds(self.night_end) // 60
+
+
+class ShiftRuleEngine:
+    """
+    Declarative slot assignment (Pagi / Siang_1 / Siang_2 / Sore) per
+    division and weekday. Rule sets are compiled once into minute-of-day
+    lookup tables; assigning slots to any number of punches is a single
+    array lookup. Registry pattern like DivisionRegistry: assignments are
+    keyed by (division name or '*', weekday 0=Senin..6=Minggu).
+    """
+    
+    SLOTS = [TimeRanges.MORNING.label, TimeRanges.BREAK_OUT.label, TimeRanges.BREAK_IN.label, TimeRanges.EVENING.label]
+    # Per slot: keep the first punch, except Sore which keeps the last (jam pulang)
+    SLOT_PICK = {TimeRanges.MORNING.label: "first", TimeRanges.BREAK_OUT.label: "first",
+                 TimeRanges.BREAK_IN.label: "first", TimeRanges.EVENING.label: "last"}
+    ANY_DIVISION = "*"
+    
+    _rule_sets: Dict[str, ShiftRuleSet] = {}
+    _assignments: Dict[Tuple[str, int], str] = {}
+    _overnight: Dict[str, OvernightPolicy] = {}
+    _version: int = 0
+    _compiled: Optional[Tuple[List[str], np.ndarray, np.ndarray]] = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def register(cls, rule_set: ShiftRuleSet, divisions=(ANY_DIVISION,), weekdays=range(7)) -> None:
+        """Use rule_set for the given divisions on the given weekdays."""
+        with cls._lock:
+            changed = cls._rule_sets.get(rule_set.name) != rule_set
+            cls._rule_sets[rule_set.name] = rule_set
+            for division in divisions:
+                for weekday in weekdays:
+                    if cls._assignments.get((division, weekday)) != rule_set.name:
+                        cls._assignments[(division, weekday)] = rule_set.name
+                        changed = True
+            if changed:
+                cls._compiled = None
+                cls._version += 1
+    
+    @classmethod
+    def register_overnight(cls, policy: Optional[OvernightPolicy], divisions) -> None:
+        """Sessionize the given divisions across midnight (policy None = calendar days)."""
+        with cls._lock:
+            changed = False
+            for division in divisions:
+                if cls._overnight.get(division) != policy:
+                    if policy is None:
+                        cls._overnight.pop(division, None)
+                    else:
+                        cls._overnight[division] = policy
+                    changed = True
+            if changed:
+                cls._version += 1
+    
+    @classmethod
+    def overnight_policies(cls) -> Dict[str, OvernightPolicy]:
+        if not cls._rule_sets:
+            initialize_shift_rules()
+        return dict(cls._overnight)
+    
+    @classmethod
+    def version(cls) -> int:
+        return cls._version
+    
+    @classmethod
+    def resolve(cls, division: Optional[str], weekday: int) -> ShiftRuleSet:
+        if not cls._rule_sets:
+            initialize_shift_rules()
+        name = cls._assignments.get((division, weekday)) or cls._assignments[(cls.ANY_DIVISION, weekday)]
+        return cls._rule_sets[name]
+    
+    @classmethod
+    def _tables(cls) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Rule set names and stacked (n_rule_sets, 1440) tables, compiled once per version."""
+        if not cls._rule_sets:
+            initialize_shift_rules()
+        compiled = cls._compiled
+        if compiled is None:
+            with cls._lock:
+                names = sorted(cls._rule_sets)
+                tables = [cls._rule_sets[name].compile() for name in names]
+                compiled = (
+                    names,
+                    np.stack([t[0] for t in tables]),
+                    np.stack([t[1] for t in tables]),
+                )
+                cls._compiled = compiled
+        return compiled
+    
+    @classmethod
+    @lru_cache(maxsize=64)
+    def _weekday_signature(cls, weekday: int, version: int, registry_version: int) -> str:
+        divisions = [cls.ANY_DIVISION] + sorted(DivisionRegistry.get_all())
+        parts = [f"{d}={cls.resolve(d, weekday).signature()}" for d in divisions]
+        parts += [f"{d}~{policy}" for d, policy in sorted(cls._overnight.items())]
+        return hashlib.md5("|".join(parts).encode()).hexdigest()
+    
+    @classmethod
+    def day_signature(cls, day: datetime.date) -> str:
+        """Hash of the rules applying on this day; changes only when those rules change."""
+        return cls._weekday_signature(day.weekday(), cls._version, DivisionRegistry.version())
+    
+    @classmethod
+    def slot_codes(cls, df: pd.DataFrame) -> np.ndarray:
+        """Slot index (into SLOTS) per punch of a PunchLog frame, -1 when outside every window."""
+        names, tables_on, tables_within = cls._tables()
+        person_codes, persons = pd.factorize(df[AppConstants.COL_PERSON_NAME])
+        member_index = DivisionRegistry.get_member_index()
+        
+        # Rule set per (person, weekday): resolved once per distinct person, not per punch
+        rule_of = np.empty((len(persons), 7), dtype=np.int16)
+        name_pos = {name: i for i, name in enumerate(names)}
+        for i, person in enumerate(persons):
+            division = member_index.get(person)
+            division_name = division.name if division is not None else None
+            for weekday in range(7):
+                rule_of[i, weekday] = name_pos[cls.resolve(division_name, weekday).name]
+        
+        weekdays = (df[AppConstants.COL_EPOCH_DAY].to_numpy() + 3) % 7  # 1970-01-01 was a Thursday
+        rules = rule_of[person_codes, weekdays]
+        minutes = df[AppConstants.COL_MINUTE].to_numpy()
+        on_minute = df[AppConstants.COL_EVENT_TIME].dt.second.to_numpy() == 0
+        return np.where(on_minute, tables_on[rules, minutes], tables_within[rules, minutes])
+    
+    @classmethod
+    def load_file(cls, path: str) -> None:
+        """
+        Register rules from JSON:
+        {"rule_sets": {"name": [{"slot": "Pagi", "start": "00:00", "end": "11:30"}, ...]},
+         "assignments": [{"rule_set": "name", "divisions": ["ATS"], "weekdays": [0, 1, 2, 3]}],
+         "overnight": [{"divisions": ["AVSEC"], "gap_hours": 14, "night_start": "18:00", "night_end": "10:00"}]}
+        An overnight entry with "enabled": false switches its divisions back to calendar days.
+        """
+        with open(path) as f:
+            config = json.load(f)
+        rule_sets = {
+            name: ShiftRuleSet(name, tuple(SlotWindow(**window) for window in windows))
+            for name, windows in config.get("rule_sets", {}).items()
+        }
+        for rule_set in rule_sets.values():
+            unknown = {w.slot for w in rule_set.windows} - set(cls.SLOTS)
+            if unknown:
+                raise ValueError(f"Unknown slot(s) in rule set {rule_set.name}: {sorted(unknown)}")
+        for assignment in config.get("assignments", []):
+            cls.register(
+                rule_sets[assignment["rule_set"]],
+                divisions=assignment.get("divisions", [cls.ANY_DIVISION]),
+                weekdays=assignment.get("weekdays", range(7)),
+            )
+        for entry in config.get("overnight", []):
+            entry = dict(entry)
+            divisions = entry.pop("divisions")
+            policy = OvernightPolicy(**entry) if entry.pop("enabled", True) else None
+            cls.register_overnight(policy, divisions)
+
+
+def initialize_shift_rules():
+    """
+    Default slot rules (all divisions), then overrides from
+    DataSourceConfig.SHIFT_RULES_PATH when set.
+    """
+    weekday = ShiftRuleSet("hari_biasa", (
+        SlotWindow("Pagi", "00:00", "11:30"),
+        SlotWindow("Siang_1", "11:30", "12:30"),
+        SlotWindow("Siang_2", "12:30", "16:00", end_inclusive=True),
+        SlotWindow("Sore", "16:00", "24:00"),
+    ))
+    # Jumat: istirahat lebih panjang, Siang 2 berhenti tepat 14:00 (STRICT)
+    friday = ShiftRuleSet("jumat", (
+        SlotWindow("Pagi", "00:00", "12:00"),
+        SlotWindow("Siang_1", "12:00", "13:00"),
+        SlotWindow("Siang_2", "13:00", "14:00", end_inclusive=True),
+        SlotWindow("Sore", "17:00", "24:00"),
+    ))
+    ShiftRuleEngine.register(weekday, weekdays=[0, 1, 2, 3, 5, 6])
+    ShiftRuleEngine.register(friday, weekdays=[4])
+    ShiftRuleEngine.register_overnight(OvernightPolicy(), AppConstants.OVERNIGHT_DIVISIONS)
+    if DataSourceConfig.SHIFT_RULES_PATH:
+        ShiftRuleEngine.load_file(DataSourceConfig.SHIFT_RULES_PATH)
+
+
+class ShiftSessionizer:
+    """
+    Assigns each punch to a shift instance, identified by the epoch day it
+    started on. Divisions without an OvernightPolicy use the calendar day.
+    For the others, one sorted sweep per person carries next-morning
+    punches into the previous evening's session (see OvernightPolicy).
+    """
+    
+    SWEEP_BLOCK = 65_536
+    
+    @staticmethod
+    def shift_days(df: pd.DataFrame) -> np.ndarray:
+        """Shift day (int32 epoch day) per row of a PunchLog frame."""
+        days = df[AppConstants.COL_EPOCH_DAY].to_numpy().astype("int32", copy=True)
+        policies = ShiftRuleEngine.overnight_policies()
+        if df.empty or not policies:
+            return days
+        
+        person_codes, persons = pd.factorize(df[AppConstants.COL_PERSON_NAME])
+        member_index = DivisionRegistry.get_member_index()
+        person_policy = [
+            policies.get(member_index[p].name) if p in member_index else None for p in persons
+        ]
+        if not any(person_policy):
+            return days
+        has_policy = np.array([policy is not None for policy in person_policy], dtype=bool)
+        bounds = [
+            (p.start_minute, p.end_minute, p.gap_hours * 3600e9) if p is not None else None
+            for p in person_policy
+        ]
+        rows = np.flatnonzero(has_policy[person_codes])
+        times = df[AppConstants.COL_EVENT_TIME].to_numpy().view("int64")
+        order = rows[np.lexsort((times[rows], person_codes[rows]))]
+        
+        minutes = df[AppConstants.COL_MINUTE].to_numpy()
+        # A morning punch is a day-shift arrival, not last night's checkout,
+        # when the same person punches again later that day (between
+        # night_end and night_start) within the gap
+        night_start_of = np.array([b[0] if b else 0 for b in bounds])[person_codes[order]]
+        night_end_of = np.array([b[1] if b else 0 for b in bounds])[person_codes[order]]
+        gap_of = np.array([b[2] if b else 0 for b in bounds])[person_codes[order]]
+        order_minutes, order_times = minutes[order], times[order]
+        daytime = (order_minutes >= night_end_of) & (order_minutes < night_start_of)
+        first_daytime = pd.Series(np.where(daytime, order_times, np.iinfo("int64").max)).groupby(
+            [person_codes[order], days[order]]
+        ).transform("min").to_numpy()
+        opens_day_shift = (~daytime) & (first_daytime - order_times <= gap_of)
+        
+        prev_person, shift, start_minute, last_time = -1, 0, 0, 0
+        # Blocks keep the Python-level lists small on very large logs
+        for begin in range(0, len(order), ShiftSessionizer.SWEEP_BLOCK):
+            block = order[begin:begin + ShiftSessionizer.SWEEP_BLOCK]
+            assigned = []
+            for person, day, minute, t, day_shift in zip(
+                person_codes[block].tolist(), days[block].tolist(),
+                minutes[block].tolist(), times[block].tolist(),
+                opens_day_shift[begin:begin + ShiftSessionizer.SWEEP_BLOCK].tolist()
+            ):
+                night_start, night_end, max_gap = bounds[person]
+                if person != prev_person:
+                    shift, start_minute = day, minute
+                elif (day == shift + 1 and minute < night_end and not day_shift
+                      and start_minute >= night_start and t - last_time <= max_gap):
+                    pass  # checkout of last night's shift
+                elif day != shift:
+                    shift, start_minute = day, minute
+                assigned.append(shift)
+                prev_person, last_time = person, t
+            days[block] = assigned
+        return days
+
 # ================================================================================
 # SECTION 2: DATA ACCESS LAYER (REPOSITORY PATTERN)
 # ================================================================================
@@ -287,97 +1294,554 @@ class UserRepository:
         return True
 
 
-class DataRepository(ABC):
+class HttpClient:
     """
-    Abstract base class for data repositories.
-    Follows Repository Pattern for data access abstraction.
+    Shared HTTP/1.1 client for source downloads: keep-alive connections
+    pooled per (scheme, host, port), gzip/deflate, separate connect and
+    read timeouts, and retries with jittered exponential backoff on
+    connection errors and 429/5xx. Redirects (the published-sheet URL
+    answers with a 307) are followed through the same pool.
     """
     
-    @abstractmethod
-    def fetch(self) -> Optional[pd.DataFrame]:
-        """Fetch data from source."""
-        pass
+    MAX_IDLE_PER_HOST = 4
+    MAX_REDIRECTS = 5
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    USER_AGENT = f"wedabay-absence-center/{AppConstants.APP_VERSION}"
     
-    @abstractmethod
-    def validate(self, df: pd.DataFrame) -> bool:
-        """Validate fetched data."""
-        pass
+    _idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+    _lock = threading.Lock()
+    _ssl_context: Optional[ssl.SSLContext] = None
     
-    @abstractmethod
-    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Transform raw data to application format."""
-        pass
-
-
-class AttendanceRepository(DataRepository):
-    """
-    Repository for attendance data management.
-    Handles data fetching, validation, and transformation.
-    """
+    @classmethod
+    def get(
+        cls,
+        url: str,
+        read_timeout: float = DataSourceConfig.FETCH_TIMEOUT_SECONDS,
+        connect_timeout: float = DataSourceConfig.HTTP_CONNECT_TIMEOUT_SECONDS,
+        retries: int = DataSourceConfig.HTTP_RETRIES,
+    ) -> Tuple[bytes, int]:
+        """GET url; returns (decoded body, bytes received on the wire)."""
+        attempt = 0
+        while True:
+            try:
+                return cls._get_following_redirects(url, read_timeout, connect_timeout)
+            except (OSError, http.client.HTTPException) as e:
+                status = getattr(e, "status", None)
+                if attempt >= retries or (status is not None and status not in cls.RETRY_STATUSES):
+                    raise
+            attempt += 1
+            AppMetrics.http_retries.inc()
+            time_module.sleep(random.uniform(0, DataSourceConfig.HTTP_RETRY_BACKOFF_SECONDS * 2 ** attempt))
     
-    def __init__(self, url: str):
-        self.url = url
-        self._cache: Optional[pd.DataFrame] = None
-        self._cache_time: Optional[datetime] = None
+    @staticmethod
+    def max_duration(
+        read_timeout: float,
+        connect_timeout: float = DataSourceConfig.HTTP_CONNECT_TIMEOUT_SECONDS,
+        retries: int = DataSourceConfig.HTTP_RETRIES,
+    ) -> float:
+        """Longest a get() that times out on every attempt can take, backoff included."""
+        backoff = sum(DataSourceConfig.HTTP_RETRY_BACKOFF_SECONDS * 2 ** attempt for attempt in range(1, retries + 1))
+        return (retries + 1) * (connect_timeout + read_timeout) + backoff
     
-    @st.cache_data(ttl=AppConstants.CACHE_TTL_SECONDS)
-    def fetch(_self) -> Optional[pd.DataFrame]:
-        """
-        Fetch attendance data from Google Sheets.
-        Uses Streamlit caching for performance optimization.
-        """
-        try:
-            df = pd.read_csv(_self.url)
-            
-            # Standardize column names
-            df.columns = df.columns.str.strip()
-            
-            if not _self.validate(df):
-                st.error("❌ Attendance data validation failed")
-                return None
-            
-            return _self.transform(df)
-            
-        except Exception as e:
-            st.error(f"❌ Failed to fetch attendance data: {str(e)}")
-            return None
+    @classmethod
+    def close_idle(cls) -> None:
+        """Close all pooled connections."""
+        with cls._lock:
+            pools, cls._idle = cls._idle, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+    
+    @classmethod
+    def _get_following_redirects(cls, url: str, read_timeout: float, connect_timeout: float) -> Tuple[bytes, int]:
+        for _ in range(cls.MAX_REDIRECTS + 1):
+            status, headers, body = cls._request(url, read_timeout, connect_timeout)
+            if status in (301, 302, 303, 307, 308) and headers.get("Location"):
+                url = urllib.parse.urljoin(url, headers["Location"])
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(url, status, f"HTTP {status}", headers, None)
+            return cls._decode(body, headers.get("Content-Encoding", "")), len(body)
+        raise urllib.error.HTTPError(url, status, "too many redirects", headers, None)
+    
+    @staticmethod
+    def _decode(body: bytes, encoding: str) -> bytes:
+        encoding = encoding.strip().lower()
+        if encoding == "gzip":
+            return gzip.decompress(body)
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, -zlib.MAX_WBITS)  # raw deflate
+        return body
+    
+    @classmethod
+    def _request(cls, url: str, read_timeout: float, connect_timeout: float):
+        parsed = urllib.parse.urlsplit(url)
+        key = (parsed.scheme, parsed.hostname or "", parsed.port or (443 if parsed.scheme == "https" else 80))
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        headers = {
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+            "User-Agent": cls.USER_AGENT,
+        }
+        
+        conn = cls._checkout(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = cls._connect(key, connect_timeout)
+            conn.sock.settimeout(read_timeout)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+                conn, reused = None, False  # server dropped an idle connection: reconnect once
+            except Exception:
+                conn.close()
+                raise
+        
+        AppMetrics.http_requests.inc(connection="reused" if reused else "new")
+        if response.will_close:
+            conn.close()
+        else:
+            cls._checkin(key, conn)
+        return response.status, response.headers, body
+    
+    @classmethod
+    def _connect(cls, key: Tuple[str, str, int], connect_timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            if cls._ssl_context is None:
+                cls._ssl_context = ssl.create_default_context()
+            conn = http.client.HTTPSConnection(host, port, timeout=connect_timeout, context=cls._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=connect_timeout)
+        conn.connect()
+        return conn
+    
+    @classmethod
+    def _checkout(cls, key) -> Optional[http.client.HTTPConnection]:
+        with cls._lock:
+            pool = cls._idle.get(key)
+            return pool.pop() if pool else None
+    
+    @classmethod
+    def _checkin(cls, key, conn: http.client.HTTPConnection) -> None:
+        with cls._lock:
+            pool = cls._idle.setdefault(key, [])
+            if len(pool) < cls.MAX_IDLE_PER_HOST:
+                pool.append(conn)
+                return
+        conn.close()
+
+
+class SourceAdapter(ABC):
+    """
+    Where a repository's raw rows come from. load() returns the raw frame
+    (sheet column names, no cleaning) and the number of bytes read; the
+    repository keeps the validate/transform contract.
+    """
+    
+    kind = "source"
+    timeout: float = DataSourceConfig.FETCH_TIMEOUT_SECONDS  # seconds; set per source by the repository
+    
+    def __init__(self, location: str):
+        self.location = location
+    
+    @property
+    def wait_seconds(self) -> float:
+        """How long a refresh waits for one fetch of this source (all attempts included)."""
+        return self.timeout
+    
+    @abstractmethod
+    def load(self) -> Tuple[pd.DataFrame, int]:
+        """Read all raw rows from the source."""
+        pass
+    
+    def load_chunks(self, chunk_rows: int, columns=None) -> Tuple[Iterator[pd.DataFrame], int]:
+        """
+        Raw rows in chunks of at most chunk_rows, optionally only the given
+        (stripped) column names. Sources that cannot stream yield one chunk.
+        """
+        df, bytes_read = self.load()
+        if columns is not None:
+            df = df[[c for c in df.columns if c.strip() in columns]]
+        return iter([df]), bytes_read
+    
+    @staticmethod
+    def _csv_chunks(source, chunk_rows: int, columns=None) -> Iterator[pd.DataFrame]:
+        usecols = (lambda c: c.strip() in columns) if columns is not None else None
+        with pd.read_csv(source, chunksize=chunk_rows, usecols=usecols, dtype=str) as reader:
+            yield from reader
+    
+    def describe(self) -> str:
+        return f"{self.kind}:{self.location}"
+
+
+class HttpCsvSource(SourceAdapter):
+    """Published Google Sheets (or any HTTP) CSV export."""
+    
+    kind = "http"
+    
+    @property
+    def wait_seconds(self) -> float:
+        # timeout is HttpClient's per-attempt read timeout; retries come on top
+        return HttpClient.max_duration(self.timeout)
+    
+    def load(self) -> Tuple[pd.DataFrame, int]:
+        data, received = HttpClient.get(self.location, read_timeout=self.timeout)
+        # BytesIO over immutable bytes shares the buffer (no copy before parsing)
+        return pd.read_csv(io.BytesIO(data)), received
+    
+    def load_chunks(self, chunk_rows: int, columns=None) -> Tuple[Iterator[pd.DataFrame], int]:
+        data, received = HttpClient.get(self.location, read_timeout=self.timeout)
+        return self._csv_chunks(io.BytesIO(data), chunk_rows, columns), received
+
+
+class LocalCsvSource(SourceAdapter):
+    """Single CSV file on disk (exports, load-test datasets)."""
+    
+    kind = "csv"
+    
+    def load(self) -> Tuple[pd.DataFrame, int]:
+        return pd.read_csv(self.location), os.path.getsize(self.location)
+    
+    def load_chunks(self, chunk_rows: int, columns=None) -> Tuple[Iterator[pd.DataFrame], int]:
+        return self._csv_chunks(self.location, chunk_rows, columns), os.path.getsize(self.location)
+
+
+class CsvDirectorySource(SourceAdapter):
+    """
+    Directory of CSV drops (e.g. one file per day from the reader).
+    Files are concatenated in name order; unchanged files (same mtime and
+    size) are not re-parsed between loads.
+    """
+    
+    kind = "dir"
+    
+    def __init__(self, location: str, pattern: str = "*.csv"):
+        super().__init__(location)
+        self.pattern = pattern
+        self._parsed: Dict[str, Tuple[Tuple[float, int], pd.DataFrame]] = {}
+    
+    def load(self) -> Tuple[pd.DataFrame, int]:
+        paths = sorted(glob.glob(os.path.join(self.location, self.pattern)))
+        frames = []
+        bytes_read = 0
+        for path in paths:
+            stat = os.stat(path)
+            key = (stat.st_mtime, stat.st_size)
+            cached = self._parsed.get(path)
+            if cached is None or cached[0] != key:
+                cached = (key, pd.read_csv(path))
+                self._parsed[path] = cached
+                bytes_read += stat.st_size
+            frames.append(cached[1])
+        for stale in set(self._parsed) - set(paths):
+            del self._parsed[stale]
+        if not frames:
+            raise FileNotFoundError(f"No files matching {self.pattern} in {self.location}")
+        return pd.concat(frames, ignore_index=True), bytes_read
+
+
+class SqlTableSource(SourceAdapter):
+    """
+    Table (or query) in a SQLite file, or a DuckDB file when the optional
+    duckdb package is installed.
+    """
+    
+    def __init__(self, location: str, table: Optional[str] = None, query: Optional[str] = None, engine: str = "sqlite"):
+        super().__init__(location)
+        if not table and not query:
+            raise ValueError("SQL source needs a table or a query")
+        self.kind = engine
+        self.query = query or f'SELECT * FROM "{table}"'
+    
+    def load(self) -> Tuple[pd.DataFrame, int]:
+        if self.kind == "duckdb":
+            import duckdb  # optional dependency
+            with duckdb.connect(self.location, read_only=True) as conn:
+                df = conn.execute(self.query).df()
+        else:
+            import sqlite3
+            conn = sqlite3.connect(f"file:{urllib.parse.quote(self.location)}?mode=ro", uri=True)
+            try:
+                df = pd.read_sql_query(self.query, conn)
+            finally:
+                conn.close()
+        return df, os.path.getsize(self.location)
+    
+    def load_chunks(self, chunk_rows: int, columns=None) -> Tuple[Iterator[pd.DataFrame], int]:
+        if self.kind == "duckdb":
+            return super().load_chunks(chunk_rows, columns)
+        return self._sqlite_chunks(chunk_rows, columns), os.path.getsize(self.location)
+    
+    def _sqlite_chunks(self, chunk_rows: int, columns=None) -> Iterator[pd.DataFrame]:
+        import sqlite3
+        conn = sqlite3.connect(f"file:{urllib.parse.quote(self.location)}?mode=ro", uri=True)
+        try:
+            for chunk in pd.read_sql_query(self.query, conn, chunksize=chunk_rows):
+                if columns is not None:
+                    chunk = chunk[[c for c in chunk.columns if c.strip() in columns]]
+                yield chunk
+        finally:
+            conn.close()
+
+
+class DataSources:
+    """
+    Resolves a source spec (DataSourceConfig.*_SOURCE) into an adapter:
+    
+        https://...                       HttpCsvSource
+        /data/absen.csv, file:///...      LocalCsvSource
+        /data/drops/ (directory)          CsvDirectorySource
+        sqlite:////data/absen.db?table=t  SqlTableSource (also ?query=...)
+        duckdb:////data/absen.duckdb?table=t
+    """
+    
+    @staticmethod
+    def resolve(spec: Any) -> SourceAdapter:
+        if isinstance(spec, SourceAdapter):
+            return spec
+        spec = str(spec)
+        parsed = urllib.parse.urlparse(spec)
+        if parsed.scheme in ("http", "https"):
+            return HttpCsvSource(spec)
+        if parsed.scheme in ("sqlite", "duckdb"):
+            params = {k: v[-1] for k, v in urllib.parse.parse_qs(parsed.query).items()}
+            # SQLAlchemy-style: sqlite:///relative.db, sqlite:////absolute.db
+            return SqlTableSource(
+                urllib.parse.unquote(parsed.netloc + parsed.path[1:]), table=params.get("table"),
+                query=params.get("query"), engine=parsed.scheme,
+            )
+        path = urllib.parse.unquote(parsed.path) if parsed.scheme == "file" else spec
+        if os.path.isdir(path):
+            return CsvDirectorySource(path)
+        return LocalCsvSource(path)
+
+
+class DataRepository(ABC):
+    """
+    Abstract base class for data repositories.
+    Follows Repository Pattern for data access abstraction.
+    """
+    
+    source: SourceAdapter
+    last_error: Optional[str] = None  # reason of the last failed fetch
+    
+    @abstractmethod
+    def fetch(self) -> Optional[pd.DataFrame]:
+        """Fetch data from source."""
+        pass
+    
+    @abstractmethod
+    def validate(self, df: pd.DataFrame) -> bool:
+        """Validate fetched data."""
+        pass
+    
+    @abstractmethod
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Transform raw data to application format."""
+        pass
+    
+    def _load_source(self, label: str) -> pd.DataFrame:
+        """
+        Load raw rows through the configured adapter, recording latency,
+        bytes and rows in AppMetrics under `label`.
+        """
+        started = time_module.perf_counter()
+        try:
+            df, bytes_read = self.source.load()
+        except Exception:
+            AppMetrics.fetch_failures.inc(source=label)
+            raise
+        AppMetrics.fetch_duration.observe(time_module.perf_counter() - started, source=label)
+        AppMetrics.fetch_bytes.inc(bytes_read, source=label)
+        AppMetrics.rows_parsed.inc(len(df), source=label)
+        AppMetrics.last_success.set(time_module.time(), source=label)
+        return df
+    
+    def _iter_source(self, label: str, chunk_rows: int, columns=None) -> Iterator[pd.DataFrame]:
+        """
+        Chunked variant of _load_source: yields raw chunks (column names
+        stripped), so callers can compact each one before the next is parsed.
+        """
+        started = time_module.perf_counter()
+        rows = 0
+        try:
+            chunks, bytes_read = self.source.load_chunks(chunk_rows, columns)
+            for chunk in chunks:
+                chunk.columns = chunk.columns.str.strip()
+                rows += len(chunk)
+                yield chunk
+        except Exception:
+            AppMetrics.fetch_failures.inc(source=label)
+            raise
+        AppMetrics.fetch_duration.observe(time_module.perf_counter() - started, source=label)
+        AppMetrics.fetch_bytes.inc(bytes_read, source=label)
+        AppMetrics.rows_parsed.inc(rows, source=label)
+        AppMetrics.last_success.set(time_module.time(), source=label)
+
+
+class PunchLog:
+    """
+    Compact in-memory layout of the attendance punch log:
+    
+        Person Name  category  (integer codes)
+        Event Time   datetime64
+        Hari_Ke      int32     epoch day
+        Menit_Ke     int16     minute of day
+    
+    Calendar dates, clock times, hours and day names are derived on demand
+    from the integer columns; filters and groupbys run on the integers.
+    """
+    
+    EPOCH = datetime(1970, 1, 1).date()
+    
+    @classmethod
+    def epoch_day(cls, day: datetime.date) -> int:
+        return (day - cls.EPOCH).days
+    
+    @classmethod
+    def to_date(cls, epoch_day: int) -> datetime.date:
+        return cls.EPOCH + timedelta(days=int(epoch_day))
+    
+    @classmethod
+    def dates(cls, epoch_days) -> List[datetime.date]:
+        """Distinct calendar dates for an array of epoch days, ascending."""
+        return [cls.to_date(d) for d in sorted(pd.unique(epoch_days))]
+    
+    @classmethod
+    def day_mask(cls, df: pd.DataFrame, start: datetime.date, end: Optional[datetime.date] = None) -> pd.Series:
+        """Boolean mask for punches of shifts starting on start (or start..end inclusive)."""
+        days = df[AppConstants.COL_SHIFT_DAY]
+        if end is None:
+            return days == cls.epoch_day(start)
+        return days.between(cls.epoch_day(start), cls.epoch_day(end))
+    
+    @staticmethod
+    def concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenate punch frames keeping the person column categorical.
+        Categories are unioned directly, without an intermediate object column.
+        """
+        frames = [f for f in frames if f is not None and not f.empty]
+        if not frames:
+            return pd.DataFrame()
+        col = AppConstants.COL_PERSON_NAME
+        if len(frames) > 1 and all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            persons = union_categoricals([f[col] for f in frames], ignore_order=True)
+            df = pd.concat([f.drop(columns=col) for f in frames], ignore_index=True)
+            df.insert(0, col, persons)
+            return df
+        df = pd.concat(frames, ignore_index=True)
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str).astype("category")
+        return df
+    
+    @staticmethod
+    def bytes_per_punch(df: Optional[pd.DataFrame]) -> float:
+        """Deep memory usage per row (for benchmarks and the Performance page)."""
+        if df is None or df.empty:
+            return 0.0
+        return float(df.memory_usage(deep=True, index=True).sum()) / len(df)
+
+
+class AttendanceRepository(DataRepository):
+    """
+    Repository for attendance data management.
+    Handles data fetching, validation, and transformation.
+    """
+    
+    def __init__(self, source: Any, timeout: Optional[float] = None):
+        self.source = DataSources.resolve(source)
+        if timeout is not None:
+            self.source.timeout = timeout
+        self.url = self.source.location
+        self._cache: Optional[pd.DataFrame] = None
+        self._cache_time: Optional[datetime] = None
+    
+    @PerfMonitor.timed("repo.attendance.fetch")
+    def fetch(self) -> Optional[pd.DataFrame]:
+        """
+        Fetch attendance data from the configured source (Google Sheets by default).
+        Uncached; callers go through SnapshotManager, which shares the result.
+        Parsed in INGEST_CHUNK_ROWS chunks, each compacted before the next is
+        read, so peak memory is one raw chunk plus the compact log.
+        """
+        try:
+            required = {AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME}
+            parts = []
+            for chunk in self._iter_source("attendance", AppConstants.INGEST_CHUNK_ROWS, columns=required):
+                if not self.validate(chunk):
+                    AppMetrics.fetch_failures.inc(source="attendance")
+                    self.last_error = "Attendance data validation failed"
+                    st.error("❌ Attendance data validation failed")
+                    return None
+                parts.append(self.compact(chunk))
+            if not parts:
+                raise ValueError("Attendance source returned no data")
+            
+            df = PunchLog.concat(parts)
+            if df.empty:
+                df = parts[0]  # keep the columns of an empty source
+            df[AppConstants.COL_SHIFT_DAY] = ShiftSessionizer.shift_days(df)
+            self.last_error = None
+            return df
+            
+        except Exception as e:
+            self.last_error = str(e)
+            st.error(f"❌ Failed to fetch attendance data: {str(e)}")
+            return None
     
     def validate(self, df: pd.DataFrame) -> bool:
         """Validate that required columns exist."""
         required_columns = [AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME]
         return all(col in df.columns for col in required_columns)
     
+    @PerfMonitor.timed("repo.attendance.transform")
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Transform raw attendance data.
-        Applies cleaning, type conversion, and feature engineering.
+        Transform raw attendance data into the compact PunchLog layout,
+        with shift days assigned (ShiftSessionizer).
+        """
+        df = self.compact(df)
+        df[AppConstants.COL_SHIFT_DAY] = ShiftSessionizer.shift_days(df)
+        return df
+    
+    def compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Raw rows (or one chunk of them) to PunchLog columns, without shift
+        days. Rows without a name or a parseable timestamp are dropped.
         """
         # Clean employee names
-        df[AppConstants.COL_PERSON_NAME] = (
-            df[AppConstants.COL_PERSON_NAME]
-            .astype(str)
-            .str.strip()
-        )
-        
-        # Remove empty records
-        df = df[df[AppConstants.COL_PERSON_NAME] != ''].copy()
+        names = df[AppConstants.COL_PERSON_NAME].astype(str).str.strip()
         
         # Parse timestamps
-        df[AppConstants.COL_EVENT_TIME] = pd.to_datetime(
-            df[AppConstants.COL_EVENT_TIME],
-            errors='coerce'
-        )
-        
-        # Extract date and time components
-        df['Tanggal'] = df[AppConstants.COL_EVENT_TIME].dt.date
-        df['Waktu'] = df[AppConstants.COL_EVENT_TIME].dt.time
-        df['Jam'] = df[AppConstants.COL_EVENT_TIME].dt.hour
-        df['Menit'] = df[AppConstants.COL_EVENT_TIME].dt.minute
-        
-        # Add day of week
-        df['Hari'] = df[AppConstants.COL_EVENT_TIME].dt.day_name()
-        
-        return df
+        event_time = pd.to_datetime(df[AppConstants.COL_EVENT_TIME], errors='coerce')
+        
+        # Remove empty / unparseable records
+        keep = ((names != '') & event_time.notna()).values
+        names = names[keep]
+        event_time = event_time[keep]
+        
+        # Integer day / minute columns instead of date, time, hour, minute and day-name objects
+        epoch_days = (event_time.dt.normalize() - pd.Timestamp(PunchLog.EPOCH)) // pd.Timedelta(days=1)
+        return pd.DataFrame({
+            AppConstants.COL_PERSON_NAME: NameResolver.canonicalize(names),
+            AppConstants.COL_EVENT_TIME: event_time.values,
+            AppConstants.COL_EPOCH_DAY: epoch_days.astype("int32").values,
+            AppConstants.COL_MINUTE: (event_time.dt.hour * 60 + event_time.dt.minute).astype("int16").values,
+        })
 
 
 class StatusRepository(DataRepository):
@@ -385,23 +1849,30 @@ class StatusRepository(DataRepository):
     Repository for employee status (permits, leaves) management.
     """
     
-    def __init__(self, url: str):
-        self.url = url
+    def __init__(self, source: Any, timeout: Optional[float] = None):
+        self.source = DataSources.resolve(source)
+        if timeout is not None:
+            self.source.timeout = timeout
+        self.url = self.source.location
     
-    @st.cache_data(ttl=AppConstants.CACHE_TTL_SECONDS)
-    def fetch(_self) -> Optional[pd.DataFrame]:
-        """Fetch status data from Google Sheets."""
+    @PerfMonitor.timed("repo.status.fetch")
+    def fetch(self) -> Optional[pd.DataFrame]:
+        """Fetch status data from the configured source (Google Sheets by default)."""
         try:
-            df = pd.read_csv(_self.url)
+            df = self._load_source("status")
             df = df.rename(columns=lambda x: x.strip())
             
-            if not _self.validate(df):
+            if not self.validate(df):
+                AppMetrics.fetch_failures.inc(source="status")
+                self.last_error = "Status data validation failed"
                 st.warning("⚠️ Status data validation failed")
                 return None
             
-            return _self.transform(df)
+            self.last_error = None
+            return self.transform(df)
             
         except Exception as e:
+            self.last_error = str(e)
             st.warning(f"⚠️ Failed to fetch status data: {str(e)}")
             return None
     
@@ -410,24 +1881,29 @@ class StatusRepository(DataRepository):
         required = [AppConstants.COL_EMPLOYEE_NAME, AppConstants.COL_DATE, AppConstants.COL_STATUS]
         return all(col in df.columns for col in required)
     
+    @PerfMonitor.timed("repo.status.transform")
     def transform(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Transform status data."""
-        # Clean names
-        df[AppConstants.COL_EMPLOYEE_NAME] = (
-            df[AppConstants.COL_EMPLOYEE_NAME]
-            .astype(str)
-            .str.strip()
-        )
+        """
+        Transform status data into one row per entry with a leave interval
+        (Tanggal .. Tanggal Selesai, inclusive; single day when the end is
+        empty or before the start). Rows without a valid start are dropped.
+        """
+        # Clean names, variants mapped to the registry spelling
+        names = df[AppConstants.COL_EMPLOYEE_NAME].astype(str).str.strip()
+        df[AppConstants.COL_EMPLOYEE_NAME] = pd.Series(
+            NameResolver.canonicalize(names), index=df.index
+        ).astype(str)
         
         # Parse dates
-        df[AppConstants.COL_DATE] = pd.to_datetime(
-            df[AppConstants.COL_DATE],
-            format='mixed',
-            dayfirst=False,
-            errors='coerce'
-        ).dt.date # Ensure date format consistency
-        
-        df['Tanggal_Str'] = pd.to_datetime(df[AppConstants.COL_DATE]).dt.strftime(AppConstants.DATE_FORMAT)
+        start = pd.to_datetime(df[AppConstants.COL_DATE], format='mixed', dayfirst=False, errors='coerce')
+        if AppConstants.COL_DATE_END in df.columns:
+            end = pd.to_datetime(df[AppConstants.COL_DATE_END], format='mixed', dayfirst=False, errors='coerce')
+            end = end.where(end >= start, start)
+        else:
+            end = start
+        df = df[start.notna().values].copy()
+        df[AppConstants.COL_DATE] = start[start.notna()].dt.date.values
+        df[AppConstants.COL_DATE_END] = end[start.notna()].dt.date.values
         
         # Standardize status text
         df[AppConstants.COL_STATUS] = (
@@ -440,6 +1916,1231 @@ class StatusRepository(DataRepository):
         return df
 
 
+class StatusIndex:
+    """
+    Interval index over status entries (permits, leave): the statuses of
+    all employees on a day, or for every day of a range, in one lookup.
+    Several entries covering the same employee and day resolve
+    deterministically: the shortest interval wins, then the entry lower
+    in the sheet (so a one-day SAKIT inside a week of CUTI shows SAKIT).
+    Built once per status frame (see of()).
+    """
+    
+    _cached: Optional[Tuple[pd.DataFrame, "StatusIndex"]] = None
+    _lock = threading.Lock()
+    
+    def __init__(self, status: Optional[pd.DataFrame]):
+        if status is None or status.empty:
+            status = pd.DataFrame({
+                AppConstants.COL_EMPLOYEE_NAME: [], AppConstants.COL_STATUS: [],
+                AppConstants.COL_DATE: [], AppConstants.COL_DATE_END: [],
+            })
+        start = np.array([PunchLog.epoch_day(d) for d in status[AppConstants.COL_DATE]], dtype=np.int64)
+        end_dates = status.get(AppConstants.COL_DATE_END, status[AppConstants.COL_DATE])
+        end = np.array([PunchLog.epoch_day(d) for d in end_dates], dtype=np.int64)
+        end = np.minimum(end, start + AppConstants.MAX_LEAVE_DAYS - 1)
+        
+        # Precedence order: longest first, sheet order within a length; later entries win
+        order = np.lexsort((np.arange(len(start)), -(end - start)))
+        self._names = status[AppConstants.COL_EMPLOYEE_NAME].to_numpy(dtype=object)[order]
+        self._texts = status[AppConstants.COL_STATUS].to_numpy(dtype=object)[order]
+        self._start = start[order]
+        self._end = end[order]
+        self._intervals = pd.IntervalIndex.from_arrays(self._start, self._end, closed="both")
+        self._expanded: Optional[pd.DataFrame] = None
+    
+    @classmethod
+    def of(cls, status: Optional[pd.DataFrame]) -> "StatusIndex":
+        """Index for a status frame, reused while the frame is the same object."""
+        cached = cls._cached
+        if cached is not None and cached[0] is status:
+            return cached[1]
+        index = cls(status)
+        with cls._lock:
+            cls._cached = (status, index)
+        return index
+    
+    def on(self, day: datetime.date) -> Dict[str, str]:
+        """Employee -> status on one day."""
+        if not len(self._intervals):
+            return {}
+        hits = self._intervals.contains(PunchLog.epoch_day(day))
+        # Later entries overwrite earlier ones (precedence order)
+        return dict(zip(self._names[hits], self._texts[hits]))
+    
+    def between(self, start_date: datetime.date, end_date: datetime.date) -> Dict[Any, Dict[str, str]]:
+        """Date -> (employee -> status) for every day in start..end that has a status."""
+        if not len(self._intervals):
+            return {}
+        first, last = PunchLog.epoch_day(start_date), PunchLog.epoch_day(end_date)
+        hits = self._intervals.overlaps(pd.Interval(first, last, closed="both"))
+        expanded = self._expand(hits, first, last)
+        result: Dict[Any, Dict[str, str]] = {}
+        for day, names, texts in zip(expanded["day"], expanded["name"], expanded["status"]):
+            result.setdefault(day, {})[names] = texts
+        return result
+    
+    def for_employee(self, name: str, start_date: datetime.date, end_date: datetime.date) -> Dict[Any, str]:
+        """Date -> status of one employee for the days in start..end that have one."""
+        if not len(self._intervals):
+            return {}
+        first, last = PunchLog.epoch_day(start_date), PunchLog.epoch_day(end_date)
+        hits = self._intervals.overlaps(pd.Interval(first, last, closed="both")) & (self._names == name)
+        expanded = self._expand(hits, first, last)
+        return dict(zip(expanded["day"], expanded["status"]))
+    
+    def expanded(self) -> pd.DataFrame:
+        """Resolved (day, name, status) rows for all entries (day versions)."""
+        if self._expanded is None:
+            self._expanded = self._expand(np.ones(len(self._start), dtype=bool), None, None)
+        return self._expanded
+    
+    def _expand(self, hits: np.ndarray, first: Optional[int], last: Optional[int]) -> pd.DataFrame:
+        start, end = self._start[hits], self._end[hits]
+        if first is not None:
+            start, end = np.maximum(start, first), np.minimum(end, last)
+        lengths = end - start + 1
+        entry = np.repeat(np.arange(len(start)), lengths)
+        offset = np.arange(len(entry)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        days = start[entry] + offset
+        rows = pd.DataFrame({
+            "day": days,
+            "name": self._names[hits][entry],
+            "status": self._texts[hits][entry],
+        }).drop_duplicates(subset=["day", "name"], keep="last")
+        rows = rows.sort_values(["day", "name"], kind="stable").reset_index(drop=True)
+        rows["day"] = [PunchLog.to_date(d) for d in rows["day"]]
+        return rows
+
+
+class PersonIndex:
+    """
+    Per-employee index over a PunchLog frame: row offsets sorted by
+    employee id (NameResolver), then shift day and time, plus one
+    [start, end) bound per id. One employee's punches over any range are a
+    slice and two searchsorted calls instead of a full-table filter.
+    Costs 4 bytes per punch; built once per frame and registry version.
+    """
+    
+    _cached: Optional[Tuple[pd.DataFrame, int, "PersonIndex"]] = None
+    _lock = threading.Lock()
+    
+    @PerfMonitor.timed("index.person_build")
+    def __init__(self, attendance: pd.DataFrame):
+        persons = pd.Categorical(attendance[AppConstants.COL_PERSON_NAME])
+        category_ids = np.append(NameResolver.employee_ids(persons.categories), NameResolver.UNMATCHED)
+        ids = category_ids[persons.codes]  # code -1 (missing name) -> UNMATCHED
+        days = attendance[AppConstants.COL_SHIFT_DAY].to_numpy()
+        times = attendance[AppConstants.COL_EVENT_TIME].to_numpy()
+        order = np.lexsort((times, days, ids))
+        self._frame = attendance
+        self._days = days
+        self._order = order.astype(np.int32 if len(order) < 2**31 else np.int64)
+        employee_count = len(DivisionRegistry.get_all_members())
+        self._bounds = np.searchsorted(ids[order], np.arange(employee_count + 1))
+    
+    @classmethod
+    def of(cls, attendance: pd.DataFrame) -> "PersonIndex":
+        """Index for a punch frame, reused while the frame and registry are the same."""
+        version = DivisionRegistry.version()
+        cached = cls._cached
+        if cached is not None and cached[0] is attendance and cached[1] == version:
+            return cached[2]
+        index = cls(attendance)
+        with cls._lock:
+            cls._cached = (attendance, version, index)
+        return index
+    
+    def rows(
+        self, employee_id: int, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None
+    ) -> np.ndarray:
+        """Row offsets of one employee's punches (shift days start..end), in time order."""
+        if not 0 <= employee_id < len(self._bounds) - 1:
+            return self._order[:0]
+        rows = self._order[self._bounds[employee_id]:self._bounds[employee_id + 1]]
+        if start is not None or end is not None:
+            days = self._days[rows]
+            lo = np.searchsorted(days, PunchLog.epoch_day(start), "left") if start is not None else 0
+            hi = np.searchsorted(days, PunchLog.epoch_day(end), "right") if end is not None else len(rows)
+            rows = rows[lo:hi]
+        return rows
+    
+    def punches(
+        self, employee_id: int, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None
+    ) -> pd.DataFrame:
+        """One employee's PunchLog rows (see rows())."""
+        return self._frame.take(self.rows(employee_id, start, end)).reset_index(drop=True)
+
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """
+    Immutable view of all source data at one point in time.
+    day_versions holds a content hash per date so consumers can tell
+    which days changed between two snapshots. fetched_at is when every
+    source last loaded successfully; origin is "live", "disk" (restored
+    last-good copy) or "shared" (SharedSnapshot of the refresher process).
+    """
+    attendance: Optional[pd.DataFrame]
+    status: Optional[pd.DataFrame]
+    loaded_at: datetime
+    generation: int = 0
+    day_versions: Dict[Any, str] = field(default_factory=dict)
+    fetched_at: Optional[datetime] = None
+    origin: str = "live"
+    
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the data was last fetched successfully."""
+        if self.fetched_at is None:
+            return None
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+
+class SnapshotStore:
+    """
+    Last good snapshot on local disk (pickle, atomic replace), keyed by the
+    configured sources so one source never serves another's data.
+    """
+    
+    @staticmethod
+    def _path(key: str) -> Optional[str]:
+        if not DataSourceConfig.SNAPSHOT_CACHE_DIR:
+            return None
+        return os.path.join(DataSourceConfig.SNAPSHOT_CACHE_DIR, f"snapshot-{key}.pkl")
+    
+    @classmethod
+    def save(cls, key: str, snapshot: DataSnapshot) -> None:
+        path = cls._path(key)
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {
+            "attendance": snapshot.attendance,
+            "status": snapshot.status,
+            "day_versions": snapshot.day_versions,
+            "fetched_at": snapshot.fetched_at,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    @classmethod
+    def load(cls, key: str) -> Optional[Dict[str, Any]]:
+        path = cls._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None  # unreadable/old format: behave as if absent
+
+
+class SharedSnapshot:
+    """
+    One snapshot for all server processes (DataSourceConfig.SHARED_SNAPSHOT_DIR).
+    The refresher process (holder of the lock file) fetches the sources and
+    writes every new snapshot as an immutable Arrow IPC file plus a small
+    pickle (status, day versions), then swaps the CURRENT pointer with
+    os.replace. The pointer also carries the refresher's sync state
+    (fetched_at, last_error, failures) and is rewritten after every refresh,
+    even when the data did not change. Other processes only read the
+    pointer and memory-map the Arrow file read-only (zero-copy into
+    pandas), so upstream fetches and punch-log RAM do not grow with the
+    number of workers. When the refresher exits its lock is released and
+    the next reader takes over.
+    """
+    
+    POINTER = "CURRENT"
+    LOCK_FILE = "refresher.lock"
+    KEEP_VERSIONS = 3  # older files are removed; readers still mapping them keep working
+    
+    _lock_fd: Optional[int] = None
+    _guard = threading.Lock()
+    
+    @staticmethod
+    def enabled() -> bool:
+        return bool(DataSourceConfig.SHARED_SNAPSHOT_DIR)
+    
+    @classmethod
+    def is_refresher(cls) -> bool:
+        """True when this process fetches sources for everyone."""
+        role = DataSourceConfig.SHARED_SNAPSHOT_ROLE
+        if role in ("refresher", "reader"):
+            return role == "refresher"
+        with cls._guard:
+            if cls._lock_fd is not None:
+                return True
+            import fcntl  # POSIX only
+            
+            os.makedirs(DataSourceConfig.SHARED_SNAPSHOT_DIR, exist_ok=True)
+            fd = os.open(os.path.join(DataSourceConfig.SHARED_SNAPSHOT_DIR, cls.LOCK_FILE), os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            cls._lock_fd = fd  # held for the life of the process
+            return True
+    
+    @classmethod
+    def pointer(cls) -> Optional[Dict[str, Any]]:
+        """Current version plus sync state, with fetched_at as a datetime (None when unpublished)."""
+        try:
+            with open(os.path.join(DataSourceConfig.SHARED_SNAPSHOT_DIR, cls.POINTER)) as f:
+                pointer = json.load(f)
+            fetched_at = pointer.get("fetched_at")
+            pointer["fetched_at"] = datetime.fromisoformat(fetched_at) if fetched_at else None
+        except (OSError, ValueError, AttributeError, TypeError):
+            return None
+        return pointer if "version" in pointer else None
+    
+    @classmethod
+    def current_version(cls) -> Optional[str]:
+        pointer = cls.pointer()
+        return pointer["version"] if pointer is not None else None
+    
+    @classmethod
+    def update_state(cls, version: str, fetched_at: Optional[datetime], last_error: Optional[str], failures: int) -> None:
+        """Rewrite the pointer with the refresher's sync state, keeping the version."""
+        root = DataSourceConfig.SHARED_SNAPSHOT_DIR
+        fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({
+                    "version": version,
+                    "fetched_at": fetched_at.isoformat() if fetched_at else None,
+                    "last_error": last_error,
+                    "failures": failures,
+                }, f)
+            os.replace(tmp_path, os.path.join(root, cls.POINTER))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    @classmethod
+    def publish(
+        cls, snapshot: DataSnapshot, last_error: Optional[str] = None, failures: int = 0
+    ) -> str:
+        """Write the snapshot's files, then swap the pointer. Returns the version."""
+        import pyarrow as pa
+        
+        root = DataSourceConfig.SHARED_SNAPSHOT_DIR
+        os.makedirs(root, exist_ok=True)
+        version = f"{time_module.time_ns():020d}"
+        attendance = snapshot.attendance if snapshot.attendance is not None else pd.DataFrame()
+        table = pa.Table.from_pandas(attendance, preserve_index=False)
+        with pa.OSFile(os.path.join(root, f"attendance-{version}.arrow.tmp"), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(os.path.join(root, f"attendance-{version}.arrow.tmp"), os.path.join(root, f"attendance-{version}.arrow"))
+        with open(os.path.join(root, f"meta-{version}.pkl.tmp"), "wb") as f:
+            pickle.dump({
+                "status": snapshot.status,
+                "day_versions": snapshot.day_versions,
+                "fetched_at": snapshot.fetched_at,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(os.path.join(root, f"meta-{version}.pkl.tmp"), os.path.join(root, f"meta-{version}.pkl"))
+        
+        cls.update_state(version, snapshot.fetched_at, last_error, failures)
+        cls._remove_old(root)
+        return version
+    
+    @classmethod
+    def _remove_old(cls, root: str) -> None:
+        versions = sorted(
+            name[len("meta-"):-len(".pkl")] for name in os.listdir(root)
+            if name.startswith("meta-") and name.endswith(".pkl")
+        )
+        for version in versions[:-cls.KEEP_VERSIONS]:
+            for name in (f"attendance-{version}.arrow", f"meta-{version}.pkl"):
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    pass
+    
+    @classmethod
+    def load(cls, version: str) -> Dict[str, Any]:
+        """Memory-map a published version (frames are read-only)."""
+        import pyarrow as pa
+        
+        root = DataSourceConfig.SHARED_SNAPSHOT_DIR
+        source = pa.memory_map(os.path.join(root, f"attendance-{version}.arrow"), "r")
+        table = pa.ipc.open_file(source).read_all()
+        with open(os.path.join(root, f"meta-{version}.pkl"), "rb") as f:
+            payload = pickle.load(f)
+        payload["attendance"] = table.to_pandas(split_blocks=True) if table.num_columns else None
+        return payload
+
+
+class ColumnarStore:
+    """
+    Punch history as Parquet files partitioned by month
+    (COLUMNAR_STORE_DIR/month=YYYY-MM/punches.parquet), rows sorted by day
+    so row-group statistics allow date pushdown. sync() rewrites only the
+    months whose day versions changed.
+    """
+    
+    MANIFEST = "manifest.json"
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def glob_pattern() -> str:
+        return os.path.join(DataSourceConfig.COLUMNAR_STORE_DIR, "month=*", "*.parquet")
+    
+    @classmethod
+    def sync(cls, attendance: Optional[pd.DataFrame], day_versions: Dict[Any, str]) -> List[str]:
+        """
+        Write changed months; returns the month keys rewritten.
+        attendance must be the full, untrimmed history (with its day
+        versions): months it does not cover are deleted.
+        """
+        if attendance is None or attendance.empty:
+            return []
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        root = DataSourceConfig.COLUMNAR_STORE_DIR
+        month_versions: Dict[str, List[str]] = {}
+        for day, version in day_versions.items():
+            month_versions.setdefault(day.strftime("%Y-%m"), []).append(f"{day}:{version}")
+        month_hash = {
+            month: hashlib.md5("|".join(sorted(parts)).encode()).hexdigest()
+            for month, parts in month_versions.items()
+        }
+        
+        with cls._lock:
+            manifest_path = os.path.join(root, cls.MANIFEST)
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+            changed = [m for m, h in month_hash.items() if manifest.get(m) != h]
+            if not changed and set(manifest) == set(month_hash):
+                return []
+            
+            frame = attendance
+            months = pd.Series(
+                pd.to_datetime(frame[AppConstants.COL_SHIFT_DAY].to_numpy(), unit="D").strftime("%Y-%m")
+            )
+            for month in changed:
+                part = frame[(months == month).values]
+                table = pa.table({
+                    "person": pa.array(part[AppConstants.COL_PERSON_NAME].astype(str).values, pa.string()),
+                    "event_time": pa.array(part[AppConstants.COL_EVENT_TIME].values, pa.timestamp("us")),
+                    "day": pa.array(part[AppConstants.COL_SHIFT_DAY].values, pa.int32()).cast(pa.date32()),
+                }).sort_by([("day", "ascending"), ("person", "ascending")])
+                month_dir = os.path.join(root, f"month={month}")
+                os.makedirs(month_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=month_dir, suffix=".parquet.tmp")
+                os.close(fd)
+                try:
+                    pq.write_table(table, tmp_path, row_group_size=64_000)
+                    os.replace(tmp_path, os.path.join(month_dir, "punches.parquet"))
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            for month in set(manifest) - set(month_hash):
+                shutil.rmtree(os.path.join(root, f"month={month}"), ignore_errors=True)
+            
+            os.makedirs(root, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(month_hash, f)
+                os.replace(tmp_path, manifest_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return changed
+
+
+class SqlAnalytics:
+    """
+    History-wide queries pushed down to an embedded DuckDB over
+    ColumnarStore. Date predicates prune month partitions and Parquet row
+    groups, so only the requested range is read. enabled() is False when
+    SQL_ENGINE is unset or duckdb is not installed; callers fall back to
+    pandas on the in-memory snapshot.
+    """
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _duckdb_available() -> bool:
+        try:
+            import duckdb  # noqa: F401  (optional dependency)
+        except ImportError:
+            return False
+        return True
+    
+    @classmethod
+    def enabled(cls) -> bool:
+        return DataSourceConfig.SQL_ENGINE == "duckdb" and cls._duckdb_available()
+    
+    @classmethod
+    def has_data(cls) -> bool:
+        return cls.enabled() and bool(glob.glob(ColumnarStore.glob_pattern()))
+    
+    @staticmethod
+    def _query(sql: str, params: List[Any], relations: Optional[Dict[str, pd.DataFrame]] = None) -> pd.DataFrame:
+        import duckdb
+        
+        with duckdb.connect() as conn:
+            pattern = ColumnarStore.glob_pattern().replace("'", "''")  # DDL takes no parameters
+            conn.execute(f"CREATE VIEW punches AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)")
+            for name, frame in (relations or {}).items():
+                conn.register(name, frame)
+            return conn.execute(sql, params).df()
+    
+    @staticmethod
+    def _range_params(start_date: datetime.date, end_date: datetime.date) -> List[Any]:
+        return [start_date.strftime("%Y-%m"), end_date.strftime("%Y-%m"), start_date, end_date]
+    
+    RANGE_FILTER = "month BETWEEN ? AND ? AND day BETWEEN ? AND ?"
+    
+    @classmethod
+    @PerfMonitor.timed("sql.punches_between")
+    def punches_between(cls, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
+        """Raw punches in the sheet's column layout (Person Name, Event Time)."""
+        return cls._query(
+            f'SELECT person AS "{AppConstants.COL_PERSON_NAME}", event_time AS "{AppConstants.COL_EVENT_TIME}" '
+            f"FROM punches WHERE {cls.RANGE_FILTER} ORDER BY event_time",
+            cls._range_params(start_date, end_date),
+        )
+    
+    @classmethod
+    @PerfMonitor.timed("sql.employee_punches")
+    def employee_punches(cls, person: str, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
+        """punches_between for one person."""
+        return cls._query(
+            f'SELECT person AS "{AppConstants.COL_PERSON_NAME}", event_time AS "{AppConstants.COL_EVENT_TIME}" '
+            f"FROM punches WHERE {cls.RANGE_FILTER} AND person = ? ORDER BY event_time",
+            cls._range_params(start_date, end_date) + [person],
+        )
+    
+    @classmethod
+    @PerfMonitor.timed("sql.weekly_trends")
+    def weekly_trends(cls, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
+        return cls._query(
+            "SELECT year(event_time) AS Year, week(event_time) AS Week, "
+            "count(DISTINCT person) AS Unique_Employees, count(*) AS Total_Events "
+            f"FROM punches WHERE {cls.RANGE_FILTER} GROUP BY 1, 2 ORDER BY 1, 2",
+            cls._range_params(start_date, end_date),
+        )
+    
+    @classmethod
+    @PerfMonitor.timed("sql.division_presence")
+    def division_presence(cls, target_date: datetime.date, members: pd.DataFrame) -> Dict[str, int]:
+        """Distinct present members per division; members has name/division columns."""
+        result = cls._query(
+            "SELECT m.division, count(DISTINCT p.person) AS present "
+            "FROM punches p JOIN members m ON p.person = m.name "
+            f"WHERE {cls.RANGE_FILTER} GROUP BY 1",
+            cls._range_params(target_date, target_date),
+            relations={"members": members},
+        )
+        return dict(zip(result['division'], result['present']))
+    
+    @classmethod
+    @PerfMonitor.timed("sql.large_gaps")
+    def large_gaps(cls, start_date: datetime.date, end_date: datetime.date, threshold_hours: float) -> pd.DataFrame:
+        """Consecutive punches of one person further apart than the threshold."""
+        return cls._query(
+            "SELECT person, prev_time AS time1, event_time AS time2, "
+            "epoch(event_time - prev_time) / 3600.0 AS gap_hours FROM ("
+            "  SELECT person, event_time, lag(event_time) OVER (PARTITION BY person ORDER BY event_time) AS prev_time"
+            f"  FROM punches WHERE {cls.RANGE_FILTER}"
+            ") WHERE prev_time IS NOT NULL AND epoch(event_time - prev_time) / 3600.0 > ? "
+            "ORDER BY person, time1",
+            cls._range_params(start_date, end_date) + [threshold_hours],
+        )
+
+
+class SnapshotManager:
+    """
+    Process-wide holder of the current DataSnapshot.
+    Replaces per-repository st.cache_data: every session reads the same
+    frames, and a single refresh (background on TTL expiry, or the
+    SnapshotPoller thread) replaces them. Frames are shared: treat as read-only.
+    
+    Stale-while-revalidate: readers never wait for the network once any
+    snapshot exists. On a cold start the last good snapshot is restored
+    from SnapshotStore; failed refreshes back off exponentially.
+    """
+    
+    _attendance_repo: Optional[DataRepository] = None
+    _status_repo: Optional[DataRepository] = None
+    _snapshot: Optional[DataSnapshot] = None
+    _day_generation: Dict[Any, int] = {}
+    _pending_punches: Optional[pd.DataFrame] = None  # streamed, not yet in a full load
+    _lock = threading.Lock()
+    _refresh_lock = threading.Lock()
+    _worker: Optional[threading.Thread] = None
+    _worker_lock = threading.Lock()
+    _fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="source-fetch")
+    _inflight: Dict[str, Any] = {}  # label -> Future of the source's running fetch
+    _shared_version: Optional[str] = None  # SharedSnapshot version adopted (readers) / published (refresher)
+    _shared_versions: Optional[Dict[Any, str]] = None  # day versions last published (refresher)
+    _failures = 0
+    _retry_at = 0.0  # time_module.monotonic() before which no retry is attempted
+    _fetched_last_refresh = False  # did the last refresh() hit the sources
+    _share_pending = False  # live punches applied but not yet published (refresher)
+    last_error: Optional[str] = None
+    
+    @classmethod
+    def configure(cls, attendance_repo: DataRepository, status_repo: DataRepository) -> None:
+        """Register the repositories the snapshot is loaded from."""
+        cls._attendance_repo = attendance_repo
+        cls._status_repo = status_repo
+    
+    @classmethod
+    def current(cls) -> DataSnapshot:
+        """
+        Return the current snapshot without waiting on the sources.
+        An expired snapshot (older than the cache TTL with no poller running)
+        is still returned while a background refresh runs. Blocks only on a
+        first start with no persisted copy.
+        """
+        snapshot = cls._snapshot
+        if snapshot is None:
+            snapshot = cls._restore_persisted()
+            if snapshot is None:
+                PerfMonitor.cache_event("snapshot", hit=False)
+                return cls.refresh()
+            cls.refresh_async()
+        expired = (
+            (datetime.now() - snapshot.loaded_at).total_seconds() > AppConstants.CACHE_TTL_SECONDS
+            and not SnapshotPoller.is_running()
+        )
+        if expired:
+            cls.refresh_async()
+        PerfMonitor.cache_event("snapshot", hit=not expired)
+        return snapshot
+    
+    @classmethod
+    def refresh_async(cls) -> None:
+        """Start one background refresh unless one is running or we are backing off."""
+        if time_module.monotonic() < cls._retry_at:
+            return
+        with cls._worker_lock:
+            if cls._worker is not None and cls._worker.is_alive():
+                return
+            cls._worker = threading.Thread(target=cls._refresh_quietly, name="snapshot-refresh", daemon=True)
+            cls._worker.start()
+    
+    @classmethod
+    def _refresh_quietly(cls) -> None:
+        try:
+            cls.refresh()
+        except Exception as e:
+            cls._record_outcome(str(e))
+    
+    @classmethod
+    def retry_delay(cls) -> float:
+        """Seconds until the next attempt is allowed (0 when not backing off)."""
+        return max(0.0, cls._retry_at - time_module.monotonic())
+    
+    @classmethod
+    def failures(cls) -> int:
+        """Consecutive failed refreshes."""
+        return cls._failures
+    
+    @classmethod
+    def _record_outcome(cls, error: Optional[str]) -> None:
+        """Reset or extend the exponential backoff after a refresh."""
+        if error is None:
+            cls._failures = 0
+            cls._retry_at = 0.0
+            cls.last_error = None
+            return
+        cls._failures += 1
+        cls.last_error = error
+        delay = min(
+            AppConstants.AUTO_REFRESH_INTERVAL * 2 ** (cls._failures - 1),
+            AppConstants.REFRESH_BACKOFF_MAX,
+        )
+        cls._retry_at = time_module.monotonic() + delay
+    
+    @classmethod
+    def _sources(cls) -> List[Tuple[str, Optional[DataRepository]]]:
+        return [("attendance", cls._attendance_repo), ("status", cls._status_repo)]
+    
+    @classmethod
+    def _store_key(cls) -> str:
+        sources = [repo.source.describe() if repo is not None else "" for _, repo in cls._sources()]
+        return hashlib.md5("|".join(sources).encode()).hexdigest()[:16]
+    
+    @classmethod
+    @PerfMonitor.timed("snapshot.fetch_sources")
+    def _fetch_sources(cls) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Fetch all configured sources concurrently, waiting at most
+        source.wait_seconds for each (retries included), so a refresh takes
+        as long as the slowest source rather than the sum. A timed-out
+        source counts as failed for this round; its fetch keeps running and
+        its result, once finished, is used by the next round instead of
+        starting a new fetch.
+        """
+        started = time_module.monotonic()
+        repos = {label: repo for label, repo in cls._sources() if repo is not None}
+        futures = {}
+        for label, repo in repos.items():
+            future = cls._inflight.get(label)
+            if future is None:
+                future = cls._fetch_pool.submit(repo.fetch)
+                cls._inflight[label] = future
+            futures[label] = future
+        
+        frames: Dict[str, Optional[pd.DataFrame]] = {}
+        for label, future in futures.items():
+            wait = repos[label].source.wait_seconds
+            try:
+                frames[label] = future.result(timeout=max(0.0, started + wait - time_module.monotonic()))
+            except FutureTimeout:
+                AppMetrics.fetch_failures.inc(source=label)
+                repos[label].last_error = f"timed out after {wait:g}s"
+                frames[label] = None
+                continue  # still in flight
+            except Exception as e:
+                repos[label].last_error = str(e)
+                frames[label] = None
+            cls._inflight.pop(label, None)  # consumed: the next round fetches anew
+        return frames
+    
+    @classmethod
+    def _restore_persisted(cls) -> Optional[DataSnapshot]:
+        """Publish the last good snapshot from disk, if there is one."""
+        payload = SnapshotStore.load(cls._store_key())
+        if payload is None or payload.get("attendance") is None:
+            return None
+        if AppConstants.COL_SHIFT_DAY not in payload["attendance"].columns:
+            return None  # written before shift sessionization: wait for a live load
+        with cls._refresh_lock:
+            if cls._snapshot is not None:
+                return cls._snapshot
+            # loaded_at in the past so the first reader schedules a refresh
+            return cls._publish(
+                payload["attendance"], payload["status"], payload["day_versions"],
+                loaded_at=datetime.min, fetched_at=payload["fetched_at"], origin="disk",
+            )
+    
+    @classmethod
+    @PerfMonitor.timed("snapshot.refresh")
+    def refresh(cls) -> DataSnapshot:
+        """Reload all sources concurrently and publish one new snapshot (single-flight)."""
+        started = datetime.now()
+        with cls._refresh_lock:
+            # Another thread refreshed while we waited for the lock
+            cls._fetched_last_refresh = False
+            if cls._snapshot is not None and cls._snapshot.loaded_at >= started:
+                return cls._snapshot
+            
+            # Only this process may write the columnar store and the
+            # persisted snapshot; readers share them with the refresher
+            owns_store = cls.fetches_sources()
+            if not owns_store:
+                shared = cls._adopt_shared()
+                if shared is not None:
+                    return shared
+                if cls._snapshot is not None:
+                    return cls._snapshot  # keep serving it until the refresher publishes
+                # Nothing published and nothing loaded: load once ourselves, read-only
+            
+            previous = cls._snapshot
+            cls._fetched_last_refresh = True
+            frames = cls._fetch_sources()
+            attendance, status = frames.get("attendance"), frames.get("status")
+            fresh_attendance = attendance is not None
+            errors = [
+                f"{label}: {repo.last_error}"
+                for label, repo in cls._sources()
+                if repo is not None and frames.get(label) is None
+            ]
+            cls._record_outcome("; ".join(errors) if errors else None)
+            
+            # Keep the last frames of a source that failed this round
+            if previous is not None:
+                attendance = attendance if attendance is not None else previous.attendance
+                status = status if status is not None else previous.status
+            
+            attendance = cls._merge_pending(attendance)
+            day_versions = cls._compute_day_versions(attendance, status)
+            if errors:
+                fetched_at = previous.fetched_at if previous is not None else None
+                origin = previous.origin if previous is not None else "live"
+            else:
+                fetched_at, origin = started, "live"
+            # Only a full history fetched this round may rewrite the store: the
+            # previous frame is already trimmed to the window, and syncing it
+            # would rewrite or delete every older month
+            if SqlAnalytics.enabled() and fresh_attendance and owns_store:
+                try:
+                    ColumnarStore.sync(attendance, day_versions)
+                    attendance = cls._trim_to_window(attendance)
+                except OSError:
+                    pass  # keep full history in memory when the store is not writable
+            snapshot = cls._publish(attendance, status, day_versions, fetched_at=fetched_at, origin=origin)
+            
+            unchanged = previous is not None and previous.origin == "live" and previous.day_versions == day_versions
+            if not errors and not unchanged and owns_store:
+                try:
+                    SnapshotStore.save(cls._store_key(), snapshot)
+                except OSError:
+                    pass  # read-only disk: keep serving from memory
+            cls._share(snapshot)
+            return snapshot
+    
+    @staticmethod
+    def fetches_sources() -> bool:
+        """False in worker processes that read the SharedSnapshot instead."""
+        return not SharedSnapshot.enabled() or SharedSnapshot.is_refresher()
+    
+    @classmethod
+    def fetched_last_refresh(cls) -> bool:
+        """True when the last refresh() fetched the sources (a reader's fallback load included)."""
+        return cls._fetched_last_refresh
+    
+    @classmethod
+    def _share(cls, snapshot: DataSnapshot) -> None:
+        """
+        Refresher: publish a changed snapshot for the other processes;
+        otherwise only refresh the pointer's sync state, so readers do not
+        report quiet data as stale.
+        """
+        if not SharedSnapshot.enabled() or not SharedSnapshot.is_refresher():
+            return
+        cls._share_pending = False
+        if snapshot.attendance is None:
+            return
+        try:
+            if snapshot.day_versions != cls._shared_versions or cls._shared_version is None:
+                cls._shared_version = SharedSnapshot.publish(snapshot, cls.last_error, cls._failures)
+                cls._shared_versions = snapshot.day_versions
+            else:
+                SharedSnapshot.update_state(cls._shared_version, snapshot.fetched_at, cls.last_error, cls._failures)
+        except OSError as e:
+            cls.last_error = f"shared snapshot: {e}"
+    
+    @classmethod
+    def share_pending(cls) -> None:
+        """Refresher: publish live punches applied since the last publish."""
+        if not cls._share_pending:
+            return
+        with cls._refresh_lock:
+            if cls._share_pending and cls._snapshot is not None:
+                cls._share(cls._snapshot)
+    
+    @classmethod
+    def _adopt_shared(cls) -> Optional[DataSnapshot]:
+        """Reader: switch to the refresher's latest snapshot (None when none is published)."""
+        pointer = SharedSnapshot.pointer()
+        if pointer is None:
+            return None
+        version = pointer["version"]
+        fetched_at = pointer.get("fetched_at")
+        if version == cls._shared_version and cls._snapshot is not None:
+            cls._adopt_state(pointer)
+            with cls._lock:
+                cls._snapshot = replace(
+                    cls._snapshot, loaded_at=datetime.now(), fetched_at=fetched_at or cls._snapshot.fetched_at
+                )
+            return cls._snapshot
+        try:
+            payload = SharedSnapshot.load(version)
+        except (OSError, ValueError) as e:
+            cls._record_outcome(f"shared snapshot: {e}")
+            return cls._snapshot
+        cls._adopt_state(pointer)
+        cls._shared_version = version
+        return cls._publish(
+            payload["attendance"], payload["status"], payload["day_versions"],
+            fetched_at=fetched_at or payload["fetched_at"], origin="shared",
+        )
+    
+    @classmethod
+    def _adopt_state(cls, pointer: Dict[str, Any]) -> None:
+        """Reader: mirror the refresher's error state (readers never back off themselves)."""
+        cls._failures = int(pointer.get("failures") or 0)
+        cls.last_error = pointer.get("last_error")
+        cls._retry_at = 0.0
+    
+    @classmethod
+    def apply_punches(cls, records: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Incrementally append streamed punch events (dicts with the sheet's
+        Person Name / Event Time columns) to the current snapshot.
+        Only the affected days are re-hashed. Returns the changed dates.
+        """
+        if not records or cls._attendance_repo is None:
+            return []
+        raw = pd.DataFrame.from_records(records)
+        if not cls._attendance_repo.validate(raw):
+            return []
+        new_rows = cls._attendance_repo.transform(raw)
+        if new_rows.empty:
+            return []
+        
+        with cls._refresh_lock:
+            previous = cls._snapshot
+            base = previous.attendance if previous is not None else None
+            key = [AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME]
+            
+            attendance = PunchLog.concat([base, new_rows]).drop_duplicates(subset=key).reset_index(drop=True)
+            pending = cls._pending_punches
+            cls._pending_punches = PunchLog.concat([pending, new_rows]).drop_duplicates(subset=key)
+            
+            # Re-sessionize the people who punched: a checkout can join last night's shift
+            punched = attendance[AppConstants.COL_PERSON_NAME].isin(new_rows[AppConstants.COL_PERSON_NAME].unique()).to_numpy()
+            before = attendance[AppConstants.COL_SHIFT_DAY].to_numpy()[punched]
+            after = ShiftSessionizer.shift_days(attendance[punched])
+            attendance.loc[punched, AppConstants.COL_SHIFT_DAY] = after
+            moved = before != after
+            
+            status = previous.status if previous is not None else None
+            affected_days = pd.unique(np.concatenate([
+                new_rows[AppConstants.COL_SHIFT_DAY].to_numpy(), before[moved], after[moved]
+            ]))
+            affected = set(PunchLog.dates(affected_days))
+            day_versions = dict(previous.day_versions) if previous is not None else {}
+            affected_rows = attendance[attendance[AppConstants.COL_SHIFT_DAY].isin(affected_days)]
+            for day in affected:
+                day_versions.pop(day, None)
+            day_versions.update(cls._compute_day_versions(affected_rows, status, days=affected))
+            
+            snapshot = cls._publish(
+                attendance, status, day_versions,
+                loaded_at=previous.loaded_at if previous else None,
+                fetched_at=previous.fetched_at if previous else None,
+                origin=previous.origin if previous else "live",
+            )
+            # Published by SnapshotPoller, at most once per LIVE_CHECK_INTERVAL
+            cls._share_pending = True
+            return sorted(affected)
+    
+    @classmethod
+    def _publish(
+        cls,
+        attendance: Optional[pd.DataFrame],
+        status: Optional[pd.DataFrame],
+        day_versions: Dict[Any, str],
+        loaded_at: Optional[datetime] = None,
+        fetched_at: Optional[datetime] = None,
+        origin: str = "live"
+    ) -> DataSnapshot:
+        """Swap in a new snapshot and bump the generation of changed days."""
+        previous = cls._snapshot
+        generation = previous.generation + 1 if previous else 1
+        snapshot = DataSnapshot(
+            attendance, status, loaded_at or datetime.now(), generation, day_versions, fetched_at, origin
+        )
+        
+        old_versions = previous.day_versions if previous else {}
+        changed = [
+            day for day in set(day_versions) | set(old_versions)
+            if day_versions.get(day) != old_versions.get(day)
+        ]
+        with cls._lock:
+            for day in changed:
+                cls._day_generation[day] = generation
+            cls._snapshot = snapshot
+        DailySummaryStore.invalidate(changed)
+        return snapshot
+    
+    @classmethod
+    def _merge_pending(cls, attendance: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        Re-add streamed punches the full load does not contain yet, so a poll
+        never makes live punches disappear. Pending rows that the source now
+        has are dropped.
+        """
+        pending = cls._pending_punches
+        if pending is None or pending.empty or attendance is None:
+            return attendance
+        key = [AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME]
+        present = pending.merge(attendance[key].drop_duplicates(), on=key, how='left', indicator=True)
+        missing = pending[(present['_merge'] == 'left_only').values]
+        cls._pending_punches = missing.reset_index(drop=True)
+        if missing.empty:
+            return attendance
+        merged = PunchLog.concat([attendance, missing])
+        merged[AppConstants.COL_SHIFT_DAY] = ShiftSessionizer.shift_days(merged)
+        return merged
+    
+    @staticmethod
+    def _trim_to_window(attendance: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """Keep only the last SNAPSHOT_WINDOW_DAYS in memory (older days via SqlAnalytics)."""
+        if attendance is None or attendance.empty:
+            return attendance
+        days = attendance[AppConstants.COL_SHIFT_DAY]
+        cutoff = days.max() - (AppConstants.SNAPSHOT_WINDOW_DAYS - 1)
+        return attendance[(days >= cutoff).values].reset_index(drop=True)
+    
+    @classmethod
+    def resident_since(cls) -> Optional[Any]:
+        """First date held in memory when history is trimmed (None = everything)."""
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.attendance is None or snapshot.attendance.empty:
+            return None
+        if not SqlAnalytics.has_data():
+            return None
+        return PunchLog.to_date(snapshot.attendance[AppConstants.COL_SHIFT_DAY].min())
+    
+    @classmethod
+    def day_generation(cls, day) -> int:
+        """Generation of the last snapshot that changed the given day."""
+        return cls._day_generation.get(day, 0)
+    
+    @staticmethod
+    def _compute_day_versions(
+        attendance: Optional[pd.DataFrame], status: Optional[pd.DataFrame], days=None
+    ) -> Dict[Any, str]:
+        """
+        Per-date content hash of punches and resolved statuses (vectorized).
+        days limits the status part to those dates (incremental updates).
+        """
+        versions: Dict[Any, str] = {}
+        if attendance is not None and not attendance.empty:
+            hashed = pd.util.hash_pandas_object(
+                attendance[[AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME]], index=False
+            )
+            for day, value in hashed.groupby(attendance[AppConstants.COL_SHIFT_DAY].values).sum().items():
+                versions[PunchLog.to_date(day)] = f"a{value}"
+        if status is not None and not status.empty:
+            resolved = StatusIndex.of(status).expanded()
+            if days is not None:
+                resolved = resolved[resolved["day"].isin(days)]
+            hashed = pd.util.hash_pandas_object(resolved[["name", "status"]], index=False)
+            for day, value in hashed.groupby(resolved["day"].values).sum().items():
+                versions[day] = versions.get(day, "") + f"s{value}"
+        return versions
+
+
+class SnapshotPoller:
+    """
+    Background thread refreshing SnapshotManager every AUTO_REFRESH_INTERVAL.
+    One per process; viewers never block on the network while it runs.
+    The refresher's poller also publishes streamed punches to the shared
+    snapshot, at most once per LIVE_CHECK_INTERVAL.
+    """
+    
+    _thread: Optional[threading.Thread] = None
+    _stop_event = threading.Event()
+    _start_lock = threading.Lock()
+    
+    @classmethod
+    def ensure_started(cls, interval: int = AppConstants.AUTO_REFRESH_INTERVAL) -> None:
+        """Start the poller once per process."""
+        with cls._start_lock:
+            if cls.is_running():
+                return
+            cls._stop_event.clear()
+            cls._thread = threading.Thread(
+                target=cls._loop, args=(interval,), name="snapshot-poller", daemon=True
+            )
+            cls._thread.start()
+    
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._thread is not None and cls._thread.is_alive()
+    
+    @classmethod
+    def stop(cls) -> None:
+        cls._stop_event.set()
+    
+    @classmethod
+    def _loop(cls, interval: int) -> None:
+        # Ticks every LIVE_CHECK_INTERVAL to publish streamed punches; refreshes when due
+        due = time_module.monotonic() + interval
+        while not cls._stop_event.wait(
+            max(0.0, min(AppConstants.LIVE_CHECK_INTERVAL, due - time_module.monotonic()))
+        ):
+            SnapshotManager.share_pending()
+            if time_module.monotonic() < due:
+                continue
+            try:
+                SnapshotManager.refresh()
+            except Exception as e:
+                SnapshotManager._record_outcome(str(e))  # keep the previous snapshot
+            if SnapshotManager.fetches_sources() or SnapshotManager.fetched_last_refresh():
+                due = time_module.monotonic() + max(interval, SnapshotManager.retry_delay())
+            else:
+                # Readers only checked the shared pointer
+                due = time_module.monotonic() + AppConstants.LIVE_CHECK_INTERVAL
+
+
+class PunchEventStream:
+    """
+    Push ingestion of new punches from DataSourceConfig.WEBSOCKET_URL.
+    Supports Server-Sent Events (http/https, stdlib only) and websockets
+    (ws/wss, needs the optional `websocket-client` package). Each message is
+    a JSON object, or list of objects, with the attendance sheet columns.
+    Events are applied to SnapshotManager in small batches.
+    """
+    
+    _thread: Optional[threading.Thread] = None
+    _stop_event = threading.Event()
+    _start_lock = threading.Lock()
+    _events: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+    last_error: Optional[str] = None
+    received: int = 0
+    
+    @classmethod
+    def ensure_started(cls, url: str) -> None:
+        """Start the consumer once per process."""
+        with cls._start_lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return
+            cls._stop_event.clear()
+            cls._thread = threading.Thread(
+                target=cls._run, args=(url,), name="punch-event-stream", daemon=True
+            )
+            cls._thread.start()
+    
+    @classmethod
+    def stop(cls) -> None:
+        cls._stop_event.set()
+    
+    @classmethod
+    def _run(cls, url: str) -> None:
+        """Connect / reconnect with exponential backoff; apply batches in between."""
+        applier = threading.Thread(target=cls._apply_loop, name="punch-event-apply", daemon=True)
+        applier.start()
+        backoff = 1.0
+        while not cls._stop_event.is_set():
+            try:
+                if url.startswith(("ws://", "wss://")):
+                    cls._consume_websocket(url)
+                else:
+                    cls._consume_sse(url)
+                backoff = 1.0
+            except Exception as e:
+                cls.last_error = str(e)
+            if cls._stop_event.wait(backoff):
+                break
+            backoff = min(backoff * 2, 60.0)
+    
+    @classmethod
+    def _consume_sse(cls, url: str) -> None:
+        request = urllib.request.Request(url, headers={'Accept': 'text/event-stream'})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            data_lines: List[str] = []
+            for raw in response:
+                if cls._stop_event.is_set():
+                    return
+                line = raw.decode('utf-8').rstrip('\r\n')
+                if line.startswith('data:'):
+                    data_lines.append(line[5:].strip())
+                elif line == '' and data_lines:
+                    cls._enqueue('\n'.join(data_lines))
+                    data_lines = []
+    
+    @classmethod
+    def _consume_websocket(cls, url: str) -> None:
+        import websocket  # optional dependency: websocket-client
+        
+        connection = websocket.create_connection(url, timeout=60)
+        try:
+            while not cls._stop_event.is_set():
+                cls._enqueue(connection.recv())
+        finally:
+            connection.close()
+    
+    @classmethod
+    def _enqueue(cls, message: str) -> None:
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+        for record in payload if isinstance(payload, list) else [payload]:
+            if isinstance(record, dict):
+                cls._events.put(record)
+                cls.received += 1
+    
+    @classmethod
+    def _apply_loop(cls) -> None:
+        while not cls._stop_event.is_set():
+            try:
+                batch = [cls._events.get(timeout=AppConstants.EVENT_BATCH_SECONDS)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    batch.append(cls._events.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                SnapshotManager.apply_punches(batch)
+            except Exception as e:
+                cls.last_error = str(e)
+
+
+class DailySummaryStore:
+    """
+    Process-wide store of per-day reports (output of build_complete_report).
+    Entries are keyed by date and validated against a fingerprint of the
+    day's punches and statuses, so range reports and exports reuse days
+    that have not changed. Stored frames are shared: treat them as read-only.
+    """
+    
+    _summaries: "OrderedDict[Any, Tuple[str, pd.DataFrame, Dict[str, str]]]" = OrderedDict()
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def fingerprint(df_day: Optional[pd.DataFrame], status_dict: Dict[str, str], day=None) -> str:
+        """Cheap content hash of one day's inputs (and the shift rules that apply to it)."""
+        digest = hashlib.md5(str(DivisionRegistry.version()).encode())
+        if day is not None:
+            digest.update(ShiftRuleEngine.day_signature(day).encode())
+        if df_day is not None and not df_day.empty:
+            hashed = pd.util.hash_pandas_object(
+                df_day[[AppConstants.COL_PERSON_NAME, AppConstants.COL_EVENT_TIME]],
+                index=False
+            )
+            digest.update(hashed.values.tobytes())
+        digest.update(json.dumps(sorted(status_dict.items())).encode())
+        return digest.hexdigest()
+    
+    @classmethod
+    def get(cls, day, fingerprint: str) -> Optional[Tuple[pd.DataFrame, Dict[str, str]]]:
+        """Return the cached report for a day if its fingerprint still matches."""
+        with cls._lock:
+            entry = cls._summaries.get(day)
+            hit = entry is not None and entry[0] == fingerprint
+            if hit:
+                cls._summaries.move_to_end(day)
+        PerfMonitor.cache_event("summary_store", hit)
+        return (entry[1], entry[2]) if hit else None
+    
+    @classmethod
+    def put(cls, day, fingerprint: str, df: pd.DataFrame, status_dict: Dict[str, str]) -> None:
+        """Store a day's report, evicting the least recently used days."""
+        with cls._lock:
+            cls._summaries[day] = (fingerprint, df, status_dict)
+            cls._summaries.move_to_end(day)
+            while len(cls._summaries) > AppConstants.SUMMARY_STORE_MAX_DAYS:
+                cls._summaries.popitem(last=False)
+    
+    @classmethod
+    def invalidate(cls, days=None) -> None:
+        """Drop the given days (or everything)."""
+        with cls._lock:
+            if days is None:
+                cls._summaries.clear()
+            else:
+                for day in days:
+                    cls._summaries.pop(day, None)
+
+
 # ================================================================================
 # SECTION 3: BUSINESS LOGIC LAYER (SERVICE CLASSES)
 # ================================================================================
@@ -496,19 +3197,37 @@ class TimeService:
             return False
     
     @staticmethod
-    def calculate_duration(start_time: str, end_time: str) -> Optional[timedelta]:
+    def late_mask(time_strs: pd.Series, threshold: time = AppConstants.LATE_THRESHOLD) -> pd.Series:
+        """
+        Vectorized is_late() for a column of 'HH:MM' strings.
+        Empty / unparsable values are never late.
+        """
+        parsed = pd.to_datetime(time_strs, format=AppConstants.TIME_FORMAT, errors='coerce')
+        seconds = parsed.dt.hour * 3600 + parsed.dt.minute * 60
+        limit = threshold.hour * 3600 + threshold.minute * 60 + threshold.second
+        return (seconds > limit).fillna(False).astype(bool)
+    
+    @staticmethod
+    def duty_slots(shift: str = '') -> List[str]:
+        """Slots a complete shift records: all four by day, check-in and checkout at night."""
+        if shift == AppConstants.SHIFT_NIGHT:
+            return [TimeRanges.MORNING.label, TimeRanges.EVENING.label]
+        return ShiftRuleEngine.SLOTS
+    
+    @staticmethod
+    def calculate_duration(start_time: str, end_time: str, overnight: bool = False) -> Optional[timedelta]:
         """
         Calculate duration between two times.
+        overnight: the shift crosses midnight (Shift=MALAM from ShiftSessionizer).
         """
         try:
             start = datetime.strptime(start_time, AppConstants.TIME_FORMAT)
             end = datetime.strptime(end_time, AppConstants.TIME_FORMAT)
             
-            # Handle overnight shifts
-            if end < start:
+            if overnight:
                 end += timedelta(days=1)
             
-            return end - start
+            return end - start if end >= start else None
         except (ValueError, TypeError):
             return None
     
@@ -536,6 +3255,133 @@ class TimeService:
         return "UNKNOWN"
 
 
+@dataclass(frozen=True)
+class SearchHit:
+    """One ranked personnel search result."""
+    employee_id: int
+    name: str
+    division: str
+    score: float
+
+
+class PersonnelSearchIndex:
+    """
+    Cross-division personnel search, built once per registry version over
+    the NameResolver keys of all members:
+    
+        tokens    sorted (token, id) pairs; exact and prefix lookups by bisect
+        trigrams  trigram -> ids, for substrings and misspellings
+    
+    Ranking: exact name, then whole-token and prefix matches per query
+    token, substring, and trigram overlap; ties keep registry order.
+    """
+    
+    _lock = threading.Lock()
+    _version: Optional[int] = None
+    _entries: List[Tuple[str, str, str]] = []  # id -> (name, division, key)
+    _tokens: List[Tuple[str, int]] = []
+    _trigrams: Dict[str, List[int]] = {}
+    
+    @staticmethod
+    def _grams(text: str) -> List[str]:
+        padded = f"  {text} "
+        return [padded[i:i + 3] for i in range(len(padded) - 2)]
+    
+    @classmethod
+    def _ensure(cls) -> None:
+        version = DivisionRegistry.version()
+        if version == cls._version:
+            return
+        with cls._lock:
+            if version == cls._version:
+                return
+            member_index = DivisionRegistry.get_member_index()
+            entries, tokens, trigrams = [], [], {}
+            for employee_id, name in enumerate(DivisionRegistry.get_all_members()):
+                key = NameResolver.normalize(name)
+                division = member_index.get(name)
+                entries.append((name, division.name if division else "", key))
+                tokens.extend((token, employee_id) for token in set(key.split()))
+                for gram in set(cls._grams(key)):
+                    trigrams.setdefault(gram, []).append(employee_id)
+            tokens.sort()
+            cls._entries, cls._tokens, cls._trigrams = entries, tokens, trigrams
+            cls._version = version
+    
+    @classmethod
+    def _prefixed(cls, prefix: str) -> Dict[int, int]:
+        """id -> 3 when a name token equals prefix, 2 when it only starts with it."""
+        found: Dict[int, int] = {}
+        tokens = cls._tokens
+        i = bisect.bisect_left(tokens, (prefix, -1))
+        while i < len(tokens) and tokens[i][0].startswith(prefix):
+            token, employee_id = tokens[i]
+            found[employee_id] = max(found.get(employee_id, 0), 3 if token == prefix else 2)
+            i += 1
+        return found
+    
+    @classmethod
+    def _substring(cls, query: str) -> List[int]:
+        """Ids whose key contains query (trigram postings, verified)."""
+        entries = cls._entries
+        if len(query) < 3:
+            return [i for i, entry in enumerate(entries) if query in entry[2]]
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        postings = sorted((cls._trigrams.get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return [i for i in candidates if query in entries[i][2]]
+    
+    @classmethod
+    @PerfMonitor.timed("search.personnel")
+    def search(cls, query: str, limit: Optional[int] = AppConstants.SEARCH_MAX_RESULTS) -> List[SearchHit]:
+        """Ranked matches across all divisions (empty for an empty query)."""
+        query = NameResolver.normalize(query)
+        if not query:
+            return []
+        cls._ensure()
+        entries = cls._entries
+        scores: Dict[int, float] = {}
+        
+        # Every query token must match a name token (exactly or as a prefix)
+        token_hits = [cls._prefixed(token) for token in query.split()]
+        for employee_id in set(token_hits[0]).intersection(*token_hits[1:]):
+            scores[employee_id] = float(sum(hits[employee_id] for hits in token_hits))
+        for employee_id in cls._substring(query):
+            scores[employee_id] = scores.get(employee_id, 0.0) + 1.0
+        
+        # Trigram overlap ranks the matches; misspelled queries (no token or
+        # substring match at all) fall back to it, above SEARCH_MIN_SIMILARITY
+        fuzzy = not scores
+        grams = set(cls._grams(query))
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(cls._trigrams.get(gram, ()))
+        for employee_id, common in shared.items():
+            similarity = common / len(grams)
+            if employee_id in scores or (fuzzy and similarity >= AppConstants.SEARCH_MIN_SIMILARITY):
+                scores[employee_id] = scores.get(employee_id, 0.0) + similarity
+        
+        for employee_id in scores:
+            if entries[employee_id][2] == query:
+                scores[employee_id] += 100.0
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [
+            SearchHit(employee_id, entries[employee_id][0], entries[employee_id][1], round(score, 3))
+            for employee_id, score in ranked
+        ]
+    
+    @classmethod
+    def matching_names(cls, query: str) -> set:
+        """All member names matching query (for filtering the division tabs)."""
+        if not NameResolver.normalize(query):
+            # Punctuation-only query ("." / "-"): plain substring scan
+            needle = query.lower()
+            return {name for name in DivisionRegistry.get_all_members() if needle in name.lower()}
+        return {hit.name for hit in cls.search(query, limit=None)}
+
+
 class AttendanceService:
     """
     Core business logic service for attendance processing.
@@ -546,124 +3392,253 @@ class AttendanceService:
         self.status_repo = status_repo
         self.time_service = TimeService()
     
+    @PerfMonitor.timed("service.attendance_for_date")
     def get_attendance_for_date(self, target_date: datetime.date) -> Optional[pd.DataFrame]:
-        df = self.attendance_repo.fetch()
+        df = SnapshotManager.current().attendance
         if df is None: return None
-        return df[df['Tanggal'] == target_date].copy()
+        resident_since = SnapshotManager.resident_since()
+        if resident_since is not None and target_date < resident_since:
+            return self.get_attendance_between(target_date, target_date)
+        return df[PunchLog.day_mask(df, target_date).values].copy()
     
+    def get_attendance_between(self, start_date: datetime.date, end_date: datetime.date) -> Optional[pd.DataFrame]:
+        """Punches in a date range; days older than the in-memory window come from SqlAnalytics."""
+        df = SnapshotManager.current().attendance
+        if df is None: return None
+        resident_since = SnapshotManager.resident_since()
+        if resident_since is not None and start_date < resident_since:
+            raw = SqlAnalytics.punches_between(start_date, end_date)
+            return self.attendance_repo.transform(raw)
+        return df[PunchLog.day_mask(df, start_date, end_date).values].copy()
+    
+    @PerfMonitor.timed("service.employee_punches")
+    def get_employee_punches(self, name: str, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
+        """
+        One employee's punches in a date range, sliced through PersonIndex;
+        days older than the in-memory window come from SqlAnalytics.
+        """
+        df = SnapshotManager.current().attendance
+        if df is None: return pd.DataFrame()
+        parts = []
+        resident_since = SnapshotManager.resident_since()
+        if resident_since is not None and start_date < resident_since:
+            older_end = min(end_date, resident_since - timedelta(days=1))
+            raw = SqlAnalytics.employee_punches(NameResolver.canonical(name), start_date, older_end)
+            if not raw.empty:
+                parts.append(self.attendance_repo.transform(raw))
+            start_date = resident_since
+        if start_date <= end_date:
+            parts.append(PersonIndex.of(df).punches(NameResolver.employee_id(name), start_date, end_date))
+        return PunchLog.concat(parts)
+    
+    @PerfMonitor.timed("service.status_for_date")
     def get_status_for_date(self, target_date: datetime.date) -> Dict[str, str]:
-        df = self.status_repo.fetch()
+        df = SnapshotManager.current().status
+        if df is None: return {}
+        return StatusIndex.of(df).on(target_date)
+    
+    @PerfMonitor.timed("service.status_between")
+    def get_status_between(self, start_date: datetime.date, end_date: datetime.date) -> Dict[Any, Dict[str, str]]:
+        """Statuses for every day of a range in one lookup (days without any are absent)."""
+        df = SnapshotManager.current().status
         if df is None: return {}
-        date_str = target_date.strftime(AppConstants.DATE_FORMAT)
-        df_filtered = df[df['Tanggal_Str'] == date_str]
-        if df_filtered.empty: return {}
-        return pd.Series(
-            df_filtered[AppConstants.COL_STATUS].values,
-            index=df_filtered[AppConstants.COL_EMPLOYEE_NAME]
-        ).to_dict()
+        return StatusIndex.of(df).between(start_date, end_date)
     
+    @PerfMonitor.timed("service.extract_time_ranges")
     def extract_time_ranges(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        LOGIKA SMART RANGE (NO GAPS) - REVISI JUMAT STRICT:
+        Slot punches (Pagi / Siang_1 / Siang_2 / Sore) per person and shift
+        using the compiled ShiftRuleEngine tables. Vectorized: one lookup
+        for all punches, then first/last time per slot via groupby on
+        integer person codes. Shifts crossing midnight (ShiftSessionizer)
+        keep their first punch as Pagi and last as Sore, with Shift=MALAM.
         """
         if df.empty: return pd.DataFrame()
 
-        df_clean = df.dropna(subset=[AppConstants.COL_PERSON_NAME, 'Tanggal'])
-        if df_clean.empty: return pd.DataFrame()
-
-        # Pastikan Waktu dalam format datetime yang benar
-        df_clean['Waktu_Obj'] = pd.to_datetime(df_clean[AppConstants.COL_EVENT_TIME]).dt.time
-
-        grouped = df_clean.groupby([AppConstants.COL_PERSON_NAME, 'Tanggal'])
-        
-        def process_group(group):
-            result = {
-                'Pagi': '',
-                'Siang_1': '',
-                'Siang_2': '',
-                'Sore': ''
-            }
-            
-            # 1. Cek Hari (0=Senin, 4=Jumat, 6=Minggu)
-            current_date = group['Tanggal'].iloc[0]
-            is_friday = (current_date.weekday() == 4)
-
-            # 2. Tentukan Batas Waktu (Thresholds)
-            if is_friday:
-                # --- JUMAT ---
-                limit_pagi    = time(12, 0, 0) # Batas akhir pagi
-                limit_siang1  = time(13, 0, 0) # Batas akhir siang 1 (mulai siang 2)
-                limit_siang2  = time(14, 0, 0) # Batas akhir siang 2 (STRICT)
-                start_sore    = time(17, 0, 0) # Mulai sore
-            else:
-                # --- HARI BIASA ---
-                limit_pagi    = time(11, 30, 0)
-                limit_siang1  = time(12, 30, 0)
-                limit_siang2  = time(16, 0, 0)
-                start_sore    = time(16, 0, 0)
-
-            # Sortir waktu
-            sorted_group = group.sort_values(AppConstants.COL_EVENT_TIME)
-            
-            for _, row in sorted_group.iterrows():
-                t = row['Waktu_Obj'] 
-                val_str = row[AppConstants.COL_EVENT_TIME].strftime(AppConstants.TIME_FORMAT)
-                
-                # --- LOGIKA PEMBAGIAN WAKTU ---
-                
-                # 1. PAGI
-                if t < limit_pagi:
-                    if result['Pagi'] == '': 
-                        result['Pagi'] = val_str
-                
-                # 2. SIANG 1
-                elif limit_pagi <= t < limit_siang1:
-                    if result['Siang_1'] == '':
-                        result['Siang_1'] = val_str
-                        
-                # 3. SIANG 2 (Berhenti tepat di limit_siang2)
-                elif limit_siang1 <= t <= limit_siang2: # Pakai <= agar 14:00 pas masuk
-                    if result['Siang_2'] == '':
-                        result['Siang_2'] = val_str
-                        
-                # 4. SORE
-                elif t >= start_sore:
-                    result['Sore'] = val_str # Overwrite (ambil terakhir)
-
-            return pd.Series(result)
-
-        if grouped.ngroups == 0: return pd.DataFrame()
-
-        result_df = grouped.apply(process_group).reset_index()
-        result_df.rename(columns={AppConstants.COL_PERSON_NAME: AppConstants.COL_EMPLOYEE_NAME}, inplace=True)
+        person_codes, persons = pd.factorize(df[AppConstants.COL_PERSON_NAME])
+        work = pd.DataFrame({
+            'person': person_codes,
+            'day': df[AppConstants.COL_SHIFT_DAY].to_numpy(),
+            'slot': ShiftRuleEngine.slot_codes(df),
+            'time': df[AppConstants.COL_EVENT_TIME].to_numpy(),
+            'carried': (df[AppConstants.COL_EPOCH_DAY].to_numpy() != df[AppConstants.COL_SHIFT_DAY].to_numpy()),
+        })
         
-        return result_df
+        result_df = work[['person', 'day']].drop_duplicates().set_index(['person', 'day'])
+        slotted = work[work['slot'] >= 0]
+        for index, slot in enumerate(ShiftRuleEngine.SLOTS):
+            times = slotted.loc[slotted['slot'] == index].groupby(['person', 'day'])['time']
+            picked = times.max() if ShiftRuleEngine.SLOT_PICK[slot] == "last" else times.min()
+            result_df[slot] = picked.dt.strftime(AppConstants.TIME_FORMAT).reindex(result_df.index).fillna('')
+        
+        # Night shifts: check-in and checkout only, no break slots
+        result_df[AppConstants.COL_SHIFT] = ''
+        if work['carried'].any():
+            night = work[work.groupby(['person', 'day'])['carried'].transform('any').to_numpy()]
+            span = night.groupby(['person', 'day'])['time'].agg(['min', 'max'])
+            result_df.loc[span.index, ShiftRuleEngine.SLOTS] = ''
+            result_df.loc[span.index, TimeRanges.MORNING.label] = span['min'].dt.strftime(AppConstants.TIME_FORMAT)
+            result_df.loc[span.index, TimeRanges.EVENING.label] = span['max'].dt.strftime(AppConstants.TIME_FORMAT)
+            result_df.loc[span.index, AppConstants.COL_SHIFT] = AppConstants.SHIFT_NIGHT
+        
+        result_df = result_df.reset_index()
+        result_df.insert(0, AppConstants.COL_EMPLOYEE_NAME, np.asarray(persons, dtype=object)[result_df['person'].to_numpy()])
+        result_df['Tanggal'] = result_df['day'].map(PunchLog.to_date)
+        result_df = result_df.sort_values([AppConstants.COL_EMPLOYEE_NAME, 'day'], kind='stable')
+        columns = [AppConstants.COL_EMPLOYEE_NAME, 'Tanggal'] + ShiftRuleEngine.SLOTS + [AppConstants.COL_SHIFT]
+        return result_df[columns].reset_index(drop=True)
 
-    def build_complete_report(self, target_date: datetime.date) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    @PerfMonitor.timed("service.build_complete_report")
+    def build_complete_report(
+        self,
+        target_date: datetime.date,
+        df_attendance: Optional[pd.DataFrame] = None,
+        status_dict: Optional[Dict[str, str]] = None
+    ) -> Tuple[pd.DataFrame, Dict[str, str]]:
         """
         Builds the master dataframe merging attendance times with employee list.
+        Served from DailySummaryStore when the day's inputs are unchanged.
+        df_attendance / status_dict may be passed when the caller already has them.
         """
-        df_attendance = self.get_attendance_for_date(target_date)
-        status_dict = self.get_status_for_date(target_date)
+        if df_attendance is None:
+            df_attendance = self.get_attendance_for_date(target_date)
+        if status_dict is None:
+            status_dict = self.get_status_for_date(target_date)
         
+        fingerprint = DailySummaryStore.fingerprint(df_attendance, status_dict, target_date)
+        cached = DailySummaryStore.get(target_date, fingerprint)
+        if cached is not None:
+            return cached
+        
+        build_started = time_module.perf_counter()
         if df_attendance is not None and not df_attendance.empty:
             df_times = self.extract_time_ranges(df_attendance)
         else:
             df_times = pd.DataFrame()
         
+        # Joined on integer employee ids (NameResolver), not on name strings
         all_employees = DivisionRegistry.get_all_members()
         df_all = pd.DataFrame({AppConstants.COL_EMPLOYEE_NAME: all_employees})
         
         if not df_times.empty:
-            df_final = pd.merge(df_all, df_times, on=AppConstants.COL_EMPLOYEE_NAME, how='left')
+            df_all['employee_id'] = NameResolver.employee_ids(all_employees)
+            ids = NameResolver.employee_ids(df_times[AppConstants.COL_EMPLOYEE_NAME])
+            df_times = df_times.drop(columns=AppConstants.COL_EMPLOYEE_NAME)
+            df_times.insert(0, 'employee_id', ids)
+            # Unmatched punches are reported by NameResolver.unmatched, not here
+            df_times = df_times[ids != NameResolver.UNMATCHED].drop_duplicates('employee_id')
+            df_final = pd.merge(df_all, df_times, on='employee_id', how='left').drop(columns='employee_id')
         else:
             df_final = df_all.copy()
-            for col in ['Pagi', 'Siang_1', 'Siang_2', 'Sore']:
+            for col in ['Pagi', 'Siang_1', 'Siang_2', 'Sore', AppConstants.COL_SHIFT]:
                 df_final[col] = ''
 
         df_final.fillna('', inplace=True)
+        AppMetrics.report_build.observe(time_module.perf_counter() - build_started)
+        DailySummaryStore.put(target_date, fingerprint, df_final, status_dict)
         return df_final, status_dict
 
+    def iter_range_reports(self, start_date: datetime.date, end_date: datetime.date):
+        """
+        Generator over (date, report_df, status_dict) for every day in the range.
+        Only one day is materialized at a time.
+        """
+        # Older history: one range query instead of one per day
+        resident_since = SnapshotManager.resident_since()
+        preloaded = None
+        if resident_since is not None and start_date < resident_since:
+            preloaded = self.get_attendance_between(start_date, end_date)
+        statuses = self.get_status_between(start_date, end_date)
+        
+        current_date = start_date
+        while current_date <= end_date:
+            df_punches = None
+            if preloaded is not None:
+                df_punches = preloaded[PunchLog.day_mask(preloaded, current_date).values]
+            df_day, status_dict = self.build_complete_report(
+                current_date, df_punches, statuses.get(current_date, {})
+            )
+            yield current_date, df_day, status_dict
+            current_date += timedelta(days=1)
+
+    def iter_range_table(self, start_date: datetime.date, end_date: datetime.date):
+        """Generator over per-day table frames (with a Tanggal column) for a range."""
+        for day, df_day, status_dict in self.iter_range_reports(start_date, end_date):
+            df_display = self.build_table_frame(df_day, status_dict)
+            df_display.insert(0, AppConstants.COL_DATE, day.strftime(AppConstants.DATE_FORMAT))
+            yield df_display
+
+    @PerfMonitor.timed("service.employee_history")
+    def build_employee_history(
+        self, name: str, start_date: datetime.date, end_date: datetime.date
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Day-by-day timeline of one employee (slot times, shift, lateness,
+        permit, duty status and hours) for every day of the range, plus the
+        punches it was built from.
+        """
+        punches = self.get_employee_punches(name, start_date, end_date)
+        columns = ['Tanggal'] + ShiftRuleEngine.SLOTS + [AppConstants.COL_SHIFT]
+        if not punches.empty:
+            df_times = self.extract_time_ranges(punches)[columns].drop_duplicates('Tanggal')
+        else:
+            df_times = pd.DataFrame(columns=columns)
+        
+        timeline = pd.DataFrame({'Tanggal': pd.date_range(start_date, end_date).date})
+        timeline = timeline.merge(df_times, on='Tanggal', how='left').fillna('')
+        timeline.insert(1, 'Hari', [day.strftime('%a') for day in timeline['Tanggal']])
+        
+        df_status = SnapshotManager.current().status
+        permits = StatusIndex.of(df_status).for_employee(name, start_date, end_date) if df_status is not None else {}
+        timeline[AppConstants.COL_STATUS] = timeline['Tanggal'].map(permits).fillna('')
+        
+        # Same rules as the cards / calculate_metrics, vectorized over days
+        night = (timeline[AppConstants.COL_SHIFT] == AppConstants.SHIFT_NIGHT).values
+        filled = timeline[ShiftRuleEngine.SLOTS] != ''
+        night_slots = self.time_service.duty_slots(AppConstants.SHIFT_NIGHT)
+        recorded = np.where(night, filled[night_slots].sum(axis=1), filled.sum(axis=1))
+        required = np.where(night, len(night_slots), len(ShiftRuleEngine.SLOTS))
+        timeline['Status'] = np.select(
+            [timeline[AppConstants.COL_STATUS].values != '', recorded == 0, recorded < required],
+            [AttendanceStatus.PERMIT.display_text, AttendanceStatus.ABSENT.display_text,
+             AttendanceStatus.PARTIAL_DUTY.display_text],
+            AttendanceStatus.FULL_DUTY.display_text,
+        )
+        timeline['Late'] = self.time_service.late_mask(timeline['Pagi']).values & ~night
+        durations = [
+            self.time_service.calculate_duration(start, end, overnight=is_night) if start and end else None
+            for start, end, is_night in zip(timeline['Pagi'], timeline['Sore'], night)
+        ]
+        timeline['Duty Hours'] = [round(d.total_seconds() / 3600, 2) if d else np.nan for d in durations]
+        counts = punches[AppConstants.COL_SHIFT_DAY].value_counts() if not punches.empty else pd.Series(dtype=int)
+        timeline['Punches'] = [int(counts.get(PunchLog.epoch_day(day), 0)) for day in timeline['Tanggal']]
+        return timeline, punches
+
+    @PerfMonitor.timed("service.build_table_frame")
+    def build_table_frame(self, df: pd.DataFrame, status_dict: Dict[str, str]) -> pd.DataFrame:
+        """
+        Builds the display frame for the table view with vectorized columns.
+        Late flags are precomputed so the grid needs no per-cell styling.
+        """
+        names = df[AppConstants.COL_EMPLOYEE_NAME]
+        member_index = DivisionRegistry.get_member_index()
+        division_codes = {name: div.code for name, div in member_index.items()}
+        
+        df_display = pd.DataFrame({
+            AppConstants.COL_EMPLOYEE_NAME: names.values,
+            'Division': names.map(division_codes).fillna("N/A").values,
+            'Jam Datang': df['Pagi'].values,
+            'Siang 1': df['Siang_1'].values,
+            'Siang 2': df['Siang_2'].values,
+            'Jam Pulang': df['Sore'].values,
+            'Status': names.map(status_dict).fillna("").values,
+            'Shift': df[AppConstants.COL_SHIFT].values,
+        })
+        night = (df_display['Shift'] == AppConstants.SHIFT_NIGHT).values
+        df_display['Late'] = self.time_service.late_mask(df_display['Jam Datang']).values & ~night
+        return df_display
+
+    @PerfMonitor.timed("service.calculate_metrics")
     def calculate_metrics(self, df: pd.DataFrame, status_dict: Dict[str, str]) -> Dict[str, Any]:
         """
         Calculates daily statistics (Present, Absent, Late, etc.)
@@ -674,21 +3649,21 @@ class AttendanceService:
         
         for idx, row in df.iterrows():
             name = row[AppConstants.COL_EMPLOYEE_NAME]
-            times = [row.get('Pagi', ''), row.get('Siang_1', ''), 
-                     row.get('Siang_2', ''), row.get('Sore', '')]
+            shift = row.get(AppConstants.COL_SHIFT, '')
+            times = [row.get(slot, '') for slot in self.time_service.duty_slots(shift)]
             empty_count = sum(1 for t in times if t == '')
             manual_status = status_dict.get(name, "")
             
             if manual_status:
                 permit_count += 1
                 permit_list.append((name, manual_status))
-            elif empty_count == 4:
+            elif empty_count == len(times):
                 absent_count += 1
                 absent_list.append(name)
             else:
                 present_count += 1
                 morning_time = row.get('Pagi', '')
-                if morning_time and self.time_service.is_late(morning_time):
+                if morning_time and shift != AppConstants.SHIFT_NIGHT and self.time_service.is_late(morning_time):
                     late_count += 1
                     late_list.append((name, morning_time))
                 if empty_count > 0:
@@ -711,17 +3686,20 @@ class AnalyticsService:
     def __init__(self, attendance_repo: AttendanceRepository):
         self.attendance_repo = attendance_repo
     
+    @PerfMonitor.timed("analytics.weekly_trends")
     def get_weekly_trends(self, end_date: datetime.date, weeks: int = 4) -> pd.DataFrame:
         """
         Get attendance trends over multiple weeks.
         """
-        df = self.attendance_repo.fetch()
+        start_date = end_date - timedelta(weeks=weeks)
+        if SqlAnalytics.has_data():
+            return SqlAnalytics.weekly_trends(start_date, end_date)
+        
+        df = SnapshotManager.current().attendance
         if df is None:
             return pd.DataFrame()
         
-        start_date = end_date - timedelta(weeks=weeks)
-        mask = (df['Tanggal'] >= start_date) & (df['Tanggal'] <= end_date)
-        df_period = df[mask].copy()
+        df_period = df[PunchLog.day_mask(df, start_date, end_date).values].copy()
         
         # Group by week
         df_period['Week'] = df_period[AppConstants.COL_EVENT_TIME].dt.isocalendar().week
@@ -736,22 +3714,35 @@ class AnalyticsService:
         
         return weekly_stats
     
+    @PerfMonitor.timed("analytics.division_statistics")
     def get_division_statistics(self, target_date: datetime.date) -> Dict[str, Dict]:
         """
         Calculate statistics per division.
         """
-        df = self.attendance_repo.fetch()
+        df = SnapshotManager.current().attendance
         if df is None:
             return {}
         
-        df_day = df[df['Tanggal'] == target_date]
+        divisions = DivisionRegistry.get_all()
+        resident_since = SnapshotManager.resident_since()
+        sql_presence = None
+        if resident_since is not None and target_date < resident_since:
+            members = pd.DataFrame(
+                [(name, div_name) for div_name, div in divisions.items() for name in div.members],
+                columns=['name', 'division'],
+            )
+            sql_presence = SqlAnalytics.division_presence(target_date, members)
+        else:
+            df_day = df[PunchLog.day_mask(df, target_date).values]
         stats = {}
         
-        for division_name, division_config in DivisionRegistry.get_all().items():
+        for division_name, division_config in divisions.items():
             members = division_config.members
-            df_div = df_day[df_day[AppConstants.COL_PERSON_NAME].isin(members)]
-            
-            present = df_div[AppConstants.COL_PERSON_NAME].nunique()
+            if sql_presence is not None:
+                present = int(sql_presence.get(division_name, 0))
+            else:
+                df_div = df_day[df_day[AppConstants.COL_PERSON_NAME].isin(members)]
+                present = df_div[AppConstants.COL_PERSON_NAME].nunique()
             total = len(members)
             
             stats[division_name] = {
@@ -765,29 +3756,53 @@ class AnalyticsService:
         
         return stats
     
+    @PerfMonitor.timed("analytics.scan_anomalies")
+    def scan_anomalies(self, start_date: datetime.date, end_date: datetime.date, threshold_hours: int = 12) -> List[Dict]:
+        """
+        LARGE_GAP anomalies over a date range, pushed down to SqlAnalytics
+        when the columnar store is available.
+        """
+        if SqlAnalytics.has_data():
+            gaps = SqlAnalytics.large_gaps(start_date, end_date, threshold_hours)
+            return [
+                {'employee': row.person, 'type': 'LARGE_GAP', 'gap_hours': row.gap_hours,
+                 'time1': row.time1, 'time2': row.time2}
+                for row in gaps.itertuples(index=False)
+            ]
+        df = SnapshotManager.current().attendance
+        if df is None:
+            return []
+        df_range = df[PunchLog.day_mask(df, start_date, end_date).values]
+        return self.detect_anomalies(df_range, threshold_hours)
+    
+    @PerfMonitor.timed("analytics.detect_anomalies")
     def detect_anomalies(self, df: pd.DataFrame, threshold_hours: int = 12) -> List[Dict]:
         """
         Detect anomalous attendance patterns.
+        Gaps are computed in one pass over (person code, time)-sorted rows.
         """
         anomalies = []
-        
-        for name in df[AppConstants.COL_PERSON_NAME].unique():
-            person_data = df[df[AppConstants.COL_PERSON_NAME] == name].sort_values(AppConstants.COL_EVENT_TIME)
-            
-            if len(person_data) > 1:
-                times = person_data[AppConstants.COL_EVENT_TIME].tolist()
-                
-                for i in range(len(times) - 1):
-                    gap = (times[i+1] - times[i]).total_seconds() / 3600
-                    
-                    if gap > threshold_hours:
-                        anomalies.append({
-                            'employee': name,
-                            'type': 'LARGE_GAP',
-                            'gap_hours': gap,
-                            'time1': times[i],
-                            'time2': times[i+1]
-                        })
+        if df.empty:
+            return anomalies
+        
+        # Person codes in order of first appearance, so output order matches the per-name scan
+        codes, names = pd.factorize(df[AppConstants.COL_PERSON_NAME])
+        times = df[AppConstants.COL_EVENT_TIME].values
+        order = pd.DataFrame({'code': codes, 'time': times}).sort_values(['code', 'time'], kind='stable')
+        sorted_codes = order['code'].to_numpy()
+        sorted_times = order['time']
+        gaps = sorted_times.diff().dt.total_seconds().to_numpy() / 3600
+        same_person = sorted_codes[1:] == sorted_codes[:-1]
+        hits = (same_person & (gaps[1:] > threshold_hours)).nonzero()[0] + 1
+        
+        for i in hits:
+            anomalies.append({
+                'employee': names[sorted_codes[i]],
+                'type': 'LARGE_GAP',
+                'gap_hours': float(gaps[i]),
+                'time1': sorted_times.iloc[i - 1],
+                'time2': sorted_times.iloc[i]
+            })
         
         return anomalies
 
@@ -800,6 +3815,8 @@ class ExcelExporter:
     def __init__(self):
         self.workbook = None
         self.formats = {}
+        # The exporter is a process-wide singleton; workbook state is per call
+        self._lock = threading.Lock()
 
     def _init_formats(self, workbook):
         """Helper to initialize formats only once per workbook"""
@@ -828,9 +3845,10 @@ class ExcelExporter:
             siang1 = row.get('Siang_1', '')
             siang2 = row.get('Siang_2', '')
             sore = row.get('Sore', '')
+            night = row.get(AppConstants.COL_SHIFT, '') == AppConstants.SHIFT_NIGHT
             
             manual_stat = status_dict.get(nm, "")
-            times = [pagi, siang1, siang2, sore]
+            times = [pagi, sore] if night else [pagi, siang1, siang2, sore]
             empty = sum(1 for t in times if t == '')
             
             # Tulis Nama & Keterangan Normal Dulu
@@ -842,7 +3860,7 @@ class ExcelExporter:
                 # Izin/Sakit: Kosongkan waktu dengan format normal
                 for i in range(4): ws.write(row_num, i+1, "", self.fmt_norm)
                 
-            elif empty == 4:
+            elif empty == len(times):
                 # Alpha (4 Bolong): Isi waktu dengan format FULL KUNING
                 for i in range(4): ws.write(row_num, i+1, "", self.fmt_full)
                 
@@ -852,7 +3870,7 @@ class ExcelExporter:
                 if pagi == '': 
                     ws.write(row_num, 1, "", self.fmt_miss) 
                 else:
-                    if TimeService.is_late(pagi): 
+                    if not night and TimeService.is_late(pagi): 
                         ws.write(row_num, 1, pagi, self.fmt_late) 
                     else: 
                         ws.write(row_num, 1, pagi, self.fmt_norm) 
@@ -861,65 +3879,264 @@ class ExcelExporter:
                 rest_times = [siang1, siang2, sore]
                 for i, t in enumerate(rest_times):
                     col_idx = i + 2
-                    if t == '': 
+                    if t == '' and night and i < 2:
+                        ws.write(row_num, col_idx, "", self.fmt_norm)  # shift malam: tanpa istirahat
+                    elif t == '': 
                         ws.write(row_num, col_idx, "", self.fmt_miss) 
                     else: 
                         ws.write(row_num, col_idx, t, self.fmt_norm)
 
+    @PerfMonitor.timed("export.excel_daily")
     def create_attendance_report(self, df: pd.DataFrame, status_dict: Dict[str, str], date: datetime.date, metrics: Any = None):
         """Creates a single sheet report"""
-        output = io.BytesIO()
-        self.workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        self._init_formats(self.workbook)
-        
-        sheet_name = date.strftime('%d-%b') # e.g., 29-Nov
-        ws = self.workbook.add_worksheet(sheet_name)
+        import xlsxwriter
         
-        self._write_sheet_content(ws, df, status_dict)
-        
-        self.workbook.close()
-        output.seek(0)
+        started = time_module.perf_counter()
+        with self._lock:
+            output = io.BytesIO()
+            self.workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+            self._init_formats(self.workbook)
+            
+            sheet_name = date.strftime('%d-%b') # e.g., 29-Nov
+            ws = self.workbook.add_worksheet(sheet_name)
+            
+            self._write_sheet_content(ws, df, status_dict)
+            
+            self.workbook.close()
+            output.seek(0)
+        AppMetrics.export_duration.observe(time_module.perf_counter() - started, format="xlsx")
         return output
 
+    @PerfMonitor.timed("export.excel_range")
     def create_range_report(self, data_map: Dict[datetime.date, Tuple[pd.DataFrame, Dict]]):
         """
         Creates a multi-sheet Excel report for a date range.
         data_map: Dictionary where Key = Date, Value = (DataFrame, StatusDict)
         """
-        output = io.BytesIO()
-        self.workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        self._init_formats(self.workbook)
+        import xlsxwriter
+        
+        started = time_module.perf_counter()
+        with self._lock:
+            output = io.BytesIO()
+            self.workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+            self._init_formats(self.workbook)
 
-        # Sort dates to ensure tabs are in order
-        sorted_dates = sorted(data_map.keys())
+            # Sort dates to ensure tabs are in order
+            sorted_dates = sorted(data_map.keys())
 
-        for date in sorted_dates:
-            df, status_dict = data_map[date]
-            # Sheet name cannot handle special chars or be too long
-            sheet_name = date.strftime('%d-%b') 
-            ws = self.workbook.add_worksheet(sheet_name)
-            self._write_sheet_content(ws, df, status_dict)
+            for date in sorted_dates:
+                df, status_dict = data_map[date]
+                # Sheet name cannot handle special chars or be too long
+                sheet_name = date.strftime('%d-%b') 
+                ws = self.workbook.add_worksheet(sheet_name)
+                self._write_sheet_content(ws, df, status_dict)
 
-        self.workbook.close()
-        output.seek(0)
+            self.workbook.close()
+            output.seek(0)
+        AppMetrics.export_duration.observe(time_module.perf_counter() - started, format="xlsx_range")
         return output
 
+class StreamingExporter:
+    """
+    Chunk-by-chunk CSV / Parquet writers for range exports.
+    Consumes an iterator of frames (one per day) and yields encoded bytes.
+    Memory stays bounded by one chunk only when the consumer streams them
+    (the ASGI range export); st.download_button holds the whole file.
+    """
+    
+    @staticmethod
+    def iter_csv(frames) -> Any:
+        """Yield UTF-8 CSV bytes, header written once."""
+        header = True
+        for frame in frames:
+            yield frame.to_csv(index=False, header=header).encode('utf-8')
+            header = False
+    
+    @staticmethod
+    def iter_parquet(frames) -> Any:
+        """Yield Parquet bytes, one row group per frame."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        sink = _ByteChunkSink()
+        writer = None
+        try:
+            for frame in frames:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, table.schema, compression='snappy')
+                writer.write_table(table)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            if writer is not None:
+                writer.close()
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    
+    @staticmethod
+    def collect(chunks, export_format: str = "stream") -> bytes:
+        """Join streamed chunks into one payload (Streamlit downloads need the full file)."""
+        started = time_module.perf_counter()
+        data = b"".join(chunks)
+        AppMetrics.export_duration.observe(time_module.perf_counter() - started, format=export_format)
+        return data
+
+
+class _ByteChunkSink(io.RawIOBase):
+    """Write-only file object that hands buffered bytes back on drain()."""
+    
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
+
+
 # ================================================================================
 # SECTION 5: UI STYLING LAYER
 # ================================================================================
 
+class AssetPipeline:
+    """
+    Static assets served by Streamlit from ./static (server.enableStaticServing
+    in .streamlit/config.toml). Derived files go to static/_build with a
+    content hash in the name, so browsers can keep them across reruns and
+    deploys only invalidate what changed.
+    
+    Fonts are bundled by dropping woff2 files named like FONT_FILES into
+    static/fonts; missing files fall back to locally installed fonts.
+    """
+    
+    APP_DIR = os.path.dirname(os.path.abspath(__file__))
+    STATIC_DIR = os.path.join(APP_DIR, "static")
+    BUILD_DIR = os.path.join(STATIC_DIR, "_build")
+    STATIC_URL_PREFIX = "app/static/"
+    BACKGROUND_SOURCE = os.path.join(APP_DIR, "Background.jpg")
+    BACKGROUND_MAX_WIDTH = 1920
+    BACKGROUND_WEBP_QUALITY = 78
+    
+    # (family, weight, file in static/fonts)
+    FONT_FILES = [
+        ("Rajdhani", 400, "Rajdhani-Regular.woff2"),
+        ("Rajdhani", 600, "Rajdhani-SemiBold.woff2"),
+        ("Rajdhani", 700, "Rajdhani-Bold.woff2"),
+        ("Inter", 300, "Inter-Light.woff2"),
+        ("Inter", 400, "Inter-Regular.woff2"),
+        ("Inter", 600, "Inter-SemiBold.woff2"),
+        ("Inter", 800, "Inter-ExtraBold.woff2"),
+        ("JetBrains Mono", 400, "JetBrainsMono-Regular.woff2"),
+        ("JetBrains Mono", 700, "JetBrainsMono-Bold.woff2"),
+    ]
+    
+    @staticmethod
+    def static_serving_enabled() -> bool:
+        try:
+            return bool(st.get_option("server.enableStaticServing"))
+        except Exception:
+            return False
+    
+    @staticmethod
+    def minify_css(css: str) -> str:
+        """Strip comments and redundant whitespace."""
+        css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+        css = re.sub(r"\s+", " ", css)
+        css = re.sub(r"\s*([{};,])\s*", r"\1", css)
+        css = re.sub(r":\s+", ":", css)
+        return css.replace(";}", "}").strip()
+    
+    @staticmethod
+    def _content_hash(data: bytes) -> str:
+        return hashlib.md5(data).hexdigest()[:10]
+    
+    @classmethod
+    def _write_build_file(cls, name: str, data: bytes, stale_pattern: str) -> Optional[str]:
+        """Write a build artifact once; returns its path relative to static/."""
+        path = os.path.join(cls.BUILD_DIR, name)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(cls.BUILD_DIR, exist_ok=True)
+                for stale in glob.glob(os.path.join(cls.BUILD_DIR, stale_pattern)):
+                    os.remove(stale)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        except OSError:
+            return None
+        return f"_build/{name}"
+    
+    @classmethod
+    @lru_cache(maxsize=1)
+    def background_asset(cls) -> Optional[str]:
+        """Resized WebP copy of Background.jpg, built once per source version."""
+        try:
+            with open(cls.BACKGROUND_SOURCE, "rb") as f:
+                source = f.read()
+        except OSError:
+            return None
+        name = f"background-{cls._content_hash(source)}.webp"
+        if os.path.exists(os.path.join(cls.BUILD_DIR, name)):
+            return f"_build/{name}"
+        
+        from PIL import Image
+        
+        image = Image.open(io.BytesIO(source)).convert("RGB")
+        if image.width > cls.BACKGROUND_MAX_WIDTH:
+            height = round(image.height * cls.BACKGROUND_MAX_WIDTH / image.width)
+            image = image.resize((cls.BACKGROUND_MAX_WIDTH, height), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="WEBP", quality=cls.BACKGROUND_WEBP_QUALITY, method=6)
+        return cls._write_build_file(name, output.getvalue(), "background-*.webp")
+    
+    @classmethod
+    def font_face_css(cls, with_files: bool) -> str:
+        """@font-face rules preferring installed fonts, then bundled files."""
+        rules = []
+        for family, weight, filename in cls.FONT_FILES:
+            sources = [f"local('{family}')"]
+            if with_files and os.path.exists(os.path.join(cls.STATIC_DIR, "fonts", filename)):
+                # Relative to the stylesheet in static/_build
+                sources.append(f"url('../fonts/{filename}') format('woff2')")
+            rules.append(
+                f"@font-face {{ font-family: '{family}'; font-weight: {weight}; "
+                f"font-display: swap; src: {', '.join(sources)}; }}"
+            )
+        return "\n".join(rules)
+    
+    @classmethod
+    def publish_stylesheet(cls, css: str) -> Optional[str]:
+        """Write the minified stylesheet and return its URL (None if not writable)."""
+        data = css.encode("utf-8")
+        relative = cls._write_build_file(f"theme-{cls._content_hash(data)}.css", data, "theme-*.css")
+        return f"{cls.STATIC_URL_PREFIX}{relative}" if relative else None
+
+
 class ThemeManager:
     """
     Centralized theme and styling management.
     """
     
-    @staticmethod
-    def apply_global_styles():
-        """Apply comprehensive CSS styling."""
-        st.markdown("""
-        <style>
-            /* ========== FONT IMPORTS ========== */
-            @import url('https://fonts.googleapis.com/css2?family=Rajdhani:wght@400;600;700&family=Inter:wght@300;400;600;800&family=JetBrains+Mono:wght@400;700&display=swap');
+    GLOBAL_CSS = """
+            /* ========== FONT FACES (bundled, see AssetPipeline) ========== */
+            __FONT_FACES__
             
             /* ========== CSS VARIABLES ========== */
             :root {
@@ -1368,7 +4585,7 @@ class ThemeManager:
                 justify-content: center;
                 align-items: center;
                 height: 100vh;
-                background-image: url('https://images.unsplash.com/photo-1464037866556-6812c9d1c72e?q=80&w=2070&auto=format&fit=crop');
+                background-image: __BACKGROUND_URL__;
                 background-size: cover;
                 background-position: center;
             }
@@ -1409,14 +4626,95 @@ class ThemeManager:
             .login-card .stButton button:hover {
                 background: #0052cc !important;
             }
-        </style>
-        """, unsafe_allow_html=True)
+    """
+    
+    @staticmethod
+    def apply_global_styles():
+        """
+        Apply comprehensive CSS styling.
+        The stylesheet is minified once per process; with static serving on,
+        each rerun only sends a <link> to the cached file instead of the CSS.
+        """
+        css, stylesheet_url = ThemeManager._compiled_styles()
+        if stylesheet_url:
+            st.markdown(f'<link rel="stylesheet" href="{stylesheet_url}">', unsafe_allow_html=True)
+        else:
+            st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _compiled_styles() -> Tuple[str, Optional[str]]:
+        """Minified CSS and, when it could be published, its static URL."""
+        serve_static = AssetPipeline.static_serving_enabled()
+        
+        # Without static serving nothing can be referenced by URL, and the
+        # image is never inlined into the page.
+        background = AssetPipeline.background_asset() if serve_static else None
+        background_css = f"url('{os.path.basename(background)}')" if background else "none"
+        css = (
+            ThemeManager.GLOBAL_CSS
+            .replace("__FONT_FACES__", AssetPipeline.font_face_css(with_files=serve_static))
+            .replace("__BACKGROUND_URL__", background_css)
+        )
+        css = AssetPipeline.minify_css(css)
+        
+        if not serve_static:
+            return css, None
+        return css, AssetPipeline.publish_stylesheet(css)
     
     @staticmethod
     def get_avatar_url(name: str) -> str:
-        """Generate avatar URL for employee."""
-        encoded_name = name.replace(' ', '+')
-        return f"https://ui-avatars.com/api/?name={encoded_name}&background=random&color=fff&size=128&bold=true&rounded=true"
+        """Generate avatar URL for employee (inline SVG, no external request)."""
+        return AvatarService.data_uri(name)
+
+
+class AvatarService:
+    """
+    Renders initials-on-color avatars locally.
+    Output is deterministic per name and cached in-process, so cards need
+    no network round-trip and work offline.
+    """
+    
+    PALETTE = [
+        "#00a8ff", "#9c88ff", "#e1b12c", "#44bd32", "#c23616", "#0097e6",
+        "#8c7ae6", "#e17055", "#00cec9", "#6c5ce7", "#0984e3", "#d63031",
+        "#fd79a8", "#e84393", "#00b894", "#fdcb6e",
+    ]
+    SIZE = 128
+    
+    @staticmethod
+    def initials(name: str) -> str:
+        """Up to two initials from the first and last word."""
+        words = [w for w in re.split(r"[\s.]+", name) if w and w[0].isalnum()]
+        if not words:
+            return "?"
+        if len(words) == 1:
+            return words[0][0].upper()
+        return (words[0][0] + words[-1][0]).upper()
+    
+    @staticmethod
+    def color(name: str) -> str:
+        digest = hashlib.md5(name.encode("utf-8")).digest()
+        return AvatarService.PALETTE[digest[0] % len(AvatarService.PALETTE)]
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def svg(name: str) -> str:
+        size = AvatarService.SIZE
+        half = size // 2
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" viewBox="0 0 {size} {size}">'
+            f'<circle cx="{half}" cy="{half}" r="{half}" fill="{AvatarService.color(name)}"/>'
+            f'<text x="50%" y="50%" dy=".1em" fill="#fff" font-family="Rajdhani, Inter, sans-serif" '
+            f'font-size="{int(size * 0.42)}" font-weight="700" text-anchor="middle" dominant-baseline="middle">'
+            f'{html.escape(AvatarService.initials(name))}</text></svg>'
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def data_uri(name: str) -> str:
+        encoded = base64.b64encode(AvatarService.svg(name).encode("utf-8")).decode("ascii")
+        return f"data:image/svg+xml;base64,{encoded}"
 
 
 # ================================================================================
@@ -1445,6 +4743,7 @@ class ComponentRenderer:
         break_out = employee_data.get('Siang_1', '')
         break_in = employee_data.get('Siang_2', '')
         evening = employee_data.get('Sore', '')
+        shift = employee_data.get(AppConstants.COL_SHIFT, '')
         
         # Get division info
         division = DivisionRegistry.find_by_member(name)
@@ -1461,13 +4760,13 @@ class ComponentRenderer:
         
         # Determine status
         manual_status = status_dict.get(name, "")
-        times = [morning, break_out, break_in, evening]
+        times = [employee_data.get(slot, '') for slot in self.time_service.duty_slots(shift)]
         empty_count = sum(1 for t in times if t == '')
         
         if manual_status:
             status = AttendanceStatus.PERMIT
             status_text = f"PERMIT: {manual_status}"
-        elif empty_count == 4:
+        elif empty_count == len(times):
             status = AttendanceStatus.ABSENT
             status_text = status.display_text
         elif empty_count > 0:
@@ -1478,7 +4777,7 @@ class ComponentRenderer:
             status_text = status.display_text
         
         # Check if late
-        is_late = morning and self.time_service.is_late(morning)
+        is_late = morning and shift != AppConstants.SHIFT_NIGHT and self.time_service.is_late(morning)
         late_indicator = "<span style='color:#e84118; font-weight:bold; margin-left:8px;'>⚠ DELAY</span>" if is_late else ""
         
         # Get avatar
@@ -1526,7 +4825,7 @@ class ComponentRenderer:
         # Detail popover
         with st.popover("📋 DETAILED FLIGHT LOG", use_container_width=True):
             self._render_detail_popover(name, morning, break_out, break_in, evening, 
-                                        status_text, status.color, div_name, is_late)
+                                        status_text, status.color, div_name, is_late, shift)
     
     def _render_detail_popover(
         self, 
@@ -1538,11 +4837,14 @@ class ComponentRenderer:
         status_text: str,
         status_color: str,
         division: str,
-        is_late: bool
+        is_late: bool,
+        shift: str = ''
     ) -> None:
         """Render detailed attendance information in popover."""
         st.markdown(f"### ✈️ FLIGHT RECORD: {name}")
         st.markdown(f"**DIVISION:** {division}")
+        if shift:
+            st.markdown(f"**SHIFT:** {shift} (pulang hari berikutnya)")
         st.markdown(f"**STATUS:** <span style='color:{status_color}; font-weight:bold'>{status_text}</span>", 
                     unsafe_allow_html=True)
         st.divider()
@@ -1572,7 +4874,9 @@ class ComponentRenderer:
         
         # Calculate work duration
         if morning and evening:
-            duration = self.time_service.calculate_duration(morning, evening)
+            duration = self.time_service.calculate_duration(
+                morning, evening, overnight=shift == AppConstants.SHIFT_NIGHT
+            )
             if duration:
                 formatted_duration = self.time_service.format_duration(duration)
                 st.divider()
@@ -1583,6 +4887,7 @@ class ComponentRenderer:
                 if duration.seconds / 3600 > 9:
                     st.warning("⚠️ Extended duty hours detected")
     
+    @PerfMonitor.timed("ui.metric_cards")
     def render_metric_cards(self, metrics: Dict[str, Any]) -> None:
         """Render key metrics in card format."""
         col1, col2, col3, col4 = st.columns(4)
@@ -1620,6 +4925,7 @@ class ComponentRenderer:
                 help="Unexplained absences"
             )
     
+    @PerfMonitor.timed("ui.anomaly_section")
     def render_anomaly_section(self, metrics: Dict[str, Any]) -> None:
         """Render anomaly detection section."""
         col1, col2, col3 = st.columns(3)
@@ -1675,6 +4981,7 @@ class ComponentRenderer:
             else:
                 st.success("✓ FULL ATTENDANCE")
     
+    @PerfMonitor.timed("ui.division_tabs")
     def render_division_tabs(
         self, 
         df: pd.DataFrame, 
@@ -1689,6 +4996,7 @@ class ComponentRenderer:
         
         tab_names = [f"{div[1].icon} {div[0]}" for div in divisions]
         tabs = st.tabs(tab_names)
+        matched = PersonnelSearchIndex.matching_names(search_query) if search_query else None
         
         for tab, (div_name, div_config) in zip(tabs, divisions):
             with tab:
@@ -1710,11 +5018,8 @@ class ComponentRenderer:
                 st.markdown("<br>", unsafe_allow_html=True)
                 
                 # Apply search filter if exists
-                if search_query:
-                    ordered_members = [
-                        m for m in ordered_members 
-                        if search_query.lower() in m.lower()
-                    ]
+                if matched is not None:
+                    ordered_members = [m for m in ordered_members if m in matched]
                 
                 # Create grid
                 cols = st.columns(AppConstants.CARDS_PER_ROW)
@@ -1734,6 +5039,58 @@ class ComponentRenderer:
                 if card_count == 0:
                     st.info(f"No personnel found in {div_name}")
 
+    @PerfMonitor.timed("ui.search_results")
+    def render_search_results(
+        self,
+        hits: List[SearchHit],
+        df: pd.DataFrame,
+        status_dict: Dict[str, str]
+    ) -> None:
+        """Ranked cross-division search results, best match first."""
+        if not hits:
+            st.info("No personnel match the search.")
+            return
+        rows = df.set_index(AppConstants.COL_EMPLOYEE_NAME, drop=False)
+        st.caption(" · ".join(f"{hit.name} ({hit.division or 'N/A'})" for hit in hits))
+        cols = st.columns(AppConstants.CARDS_PER_ROW)
+        for position, hit in enumerate(hits[:AppConstants.CARDS_PER_ROW * 2]):
+            if hit.name not in rows.index:
+                continue
+            with cols[position % AppConstants.CARDS_PER_ROW]:
+                self.render_employee_card(rows.loc[hit.name], status_dict)
+                st.button(
+                    "📈 HISTORY", key=f"search_history_{hit.employee_id}",
+                    on_click=self.open_history, args=(hit.name,), use_container_width=True
+                )
+    
+    @staticmethod
+    def open_history(name: str) -> None:
+        """Button callback: switch the dashboard to the history of one employee."""
+        st.session_state['history_employee'] = name
+        st.session_state['view_mode'] = "Employee History"
+    
+    @PerfMonitor.timed("ui.calendar_strip")
+    def render_calendar_strip(self, timeline: pd.DataFrame) -> None:
+        """One colored cell per day (duty status), a row per month; late days outlined."""
+        colors = {status.display_text: status.color for status in AttendanceStatus}
+        late_outline = f"outline:2px solid {AttendanceStatus.LATE.color};"
+        months: Dict[str, List[str]] = {}
+        for day, status, late, hours in zip(
+            timeline['Tanggal'], timeline['Status'], timeline['Late'], timeline['Duty Hours']
+        ):
+            label = f"{day} · {status}" + (f" · {hours:.1f} h" if pd.notna(hours) else "")
+            months.setdefault(day.strftime('%b %Y'), []).append(
+                f"<span title='{html.escape(label)}' style='display:inline-block; width:14px; height:14px; "
+                f"margin:1px; border-radius:3px; background:{colors.get(status, '#666')}; "
+                f"{late_outline if late else ''}'></span>"
+            )
+        st.markdown("".join(
+            f"<div style='display:flex; align-items:center; margin-bottom:4px;'>"
+            f"<span style='width:80px; font-size:0.8em; color:#aaa;'>{month}</span>"
+            f"<div>{''.join(cells)}</div></div>"
+            for month, cells in months.items()
+        ), unsafe_allow_html=True)
+
     def render_login_page(self, login_callback):
         """Render tampilan login Clean Card."""
         col1, col2, col3 = st.columns([1, 1, 1])
@@ -1797,8 +5154,11 @@ class ChartBuilder:
     """
     
     @staticmethod
-    def create_attendance_pie_chart(metrics: Dict[str, Any]) -> go.Figure:
+    @PerfMonitor.timed("chart.attendance_pie")
+    def create_attendance_pie_chart(metrics: Dict[str, Any]) -> "go.Figure":
         """Create pie chart for attendance distribution."""
+        import plotly.graph_objects as go
+        
         labels = ['Present', 'Permit', 'Absent']
         values = [metrics['present'], metrics['permit'], metrics['absent']]
         colors = ['#4cd137', '#9c88ff', '#e84118']
@@ -1830,8 +5190,11 @@ class ChartBuilder:
         return fig
     
     @staticmethod
-    def create_division_bar_chart(division_stats: Dict[str, Dict]) -> go.Figure:
+    @PerfMonitor.timed("chart.division_bar")
+    def create_division_bar_chart(division_stats: Dict[str, Dict]) -> "go.Figure":
         """Create bar chart for division-wise attendance."""
+        import plotly.graph_objects as go
+        
         divisions = []
         present = []
         absent = []
@@ -1889,15 +5252,18 @@ class ChartBuilder:
         return fig
     
     @staticmethod
-    def create_time_distribution_chart(df: pd.DataFrame) -> go.Figure:
+    @PerfMonitor.timed("chart.time_distribution")
+    def create_time_distribution_chart(df: pd.DataFrame) -> "go.Figure":
         """Create histogram of arrival times."""
-        if df.empty or 'Jam' not in df.columns:
+        import plotly.graph_objects as go
+        
+        if df.empty or AppConstants.COL_MINUTE not in df.columns:
             return go.Figure()
         
         fig = go.Figure()
         
         fig.add_trace(go.Histogram(
-            x=df['Jam'],
+            x=df[AppConstants.COL_MINUTE] // 60,
             nbinsx=24,
             marker=dict(
                 color='#00a8ff',
@@ -1950,8 +5316,21 @@ class AttendanceController:
     
     def __init__(self):
         # Initialize repositories
-        self.attendance_repo = AttendanceRepository(DataSourceConfig.ATTENDANCE_SHEET_URL)
-        self.status_repo = StatusRepository(DataSourceConfig.STATUS_SHEET_URL)
+        self.attendance_repo = AttendanceRepository(
+            DataSourceConfig.ATTENDANCE_SOURCE, timeout=DataSourceConfig.ATTENDANCE_TIMEOUT_SECONDS
+        )
+        self.status_repo = StatusRepository(
+            DataSourceConfig.STATUS_SOURCE, timeout=DataSourceConfig.STATUS_TIMEOUT_SECONDS
+        )
+        
+        # Shared snapshot (refreshed in the background)
+        SnapshotManager.configure(self.attendance_repo, self.status_repo)
+        SnapshotPoller.ensure_started()
+        MetricsServer.ensure_started(
+            DataSourceConfig.METRICS_HOST, DataSourceConfig.METRICS_PORT, DataSourceConfig.METRICS_PORT_SPAN
+        )
+        if DataSourceConfig.EVENT_STREAM_ENABLED and SnapshotManager.fetches_sources():
+            PunchEventStream.ensure_started(DataSourceConfig.WEBSOCKET_URL)
         
         # Initialize services
         self.attendance_service = AttendanceService(self.attendance_repo, self.status_repo)
@@ -1995,6 +5374,7 @@ class AttendanceController:
             st.session_state['logged_in'] = False
             
         # 2. Routing Page
+        st.session_state['perf_page_label'] = "login"
         if not st.session_state['logged_in']:
             self.component_renderer.render_login_page(self.handle_login)
         else:
@@ -2007,24 +5387,32 @@ class AttendanceController:
                 # Unique Key for Logout to prevent Duplicate Widget
                 # Kita pakai on_click agar fungsi dijalankan SEBELUM halaman refresh
                 st.button("🚪 Logout", key="logout_btn", on_click=self.handle_logout, use_container_width=True)
-                    self.handle_logout()
+                st.toggle(
+                    "📡 Live Mode", key="live_mode",
+                    help="Auto-refresh when new data arrives for the visible date"
+                )
                 st.markdown("---")
             
             # Logic Admin
             if user_role == 'admin':
                 menu_selection = st.sidebar.radio(
                     "Menu Admin", 
-                    ["📊 Monitoring Dashboard", "🛡️ User Management", "⚙️ Settings"]
+                    ["📊 Monitoring Dashboard", "🛡️ User Management", "⏱️ Performance", "⚙️ Settings"]
                 )
+                st.session_state['perf_page_label'] = menu_selection
                 
                 if menu_selection == "🛡️ User Management":
                     self.component_renderer.render_admin_dashboard(self.auth_service.repo)
                     return 
+                elif menu_selection == "⏱️ Performance":
+                    render_performance_page()
+                    return
                 elif menu_selection == "⚙️ Settings":
                     render_settings_page()
                     return
             
             # Render Dashboard Absensi
+            st.session_state['perf_page_label'] = "📊 Monitoring Dashboard"
             self.run_dashboard_content()
 
     def run_dashboard_content(self) -> None:
@@ -2035,18 +5423,18 @@ class AttendanceController:
                     unsafe_allow_html=True)
         
         # 2. Check data availability
-        df_attendance = self.attendance_repo.fetch()
+        snapshot = SnapshotManager.current()
+        df_attendance = snapshot.attendance
         if df_attendance is None:
             st.error("⚠️ SYSTEM OFFLINE - Unable to connect to attendance database")
             st.stop()
+        self._render_staleness_badge(snapshot)
         
         # 3. Filters & Date Selection
         col1, col2, col3 = st.columns([2, 3, 2])
         
         with col1:
-            unfiltered_dates = df_attendance['Tanggal'].unique()
-            clean_dates = [d for d in unfiltered_dates if pd.notna(d)]
-            available_dates = sorted(clean_dates, reverse=True)
+            available_dates = PunchLog.dates(df_attendance[AppConstants.COL_SHIFT_DAY])[::-1]
             if not available_dates:
                 st.error("No attendance data available")
                 st.stop()
@@ -2056,7 +5444,13 @@ class AttendanceController:
             search_query = st.text_input("🔍 PERSONNEL SEARCH", placeholder="Search by name...")
         
         with col3:
-            view_mode = st.selectbox("👁️ VIEW MODE", ["Cards", "Table", "Analytics"])
+            view_mode = st.selectbox(
+                "👁️ VIEW MODE", ["Cards", "Table", "Range Table", "Analytics", "Employee History"],
+                key="view_mode"
+            )
+        
+        if st.session_state.get('live_mode'):
+            self._live_refresh_fragment(selected_date)
         
         st.markdown("---")
         
@@ -2065,6 +5459,14 @@ class AttendanceController:
             df_final, status_dict = self.attendance_service.build_complete_report(selected_date)
             metrics = self.attendance_service.calculate_metrics(df_final, status_dict)
         
+        # Global search: ranked matches across all divisions
+        if search_query:
+            st.markdown("### 🔎 SEARCH RESULTS")
+            self.component_renderer.render_search_results(
+                PersonnelSearchIndex.search(search_query), df_final, status_dict
+            )
+            st.markdown("---")
+        
         # 5. Metrics section UI
         self.component_renderer.render_metric_cards(metrics)
         st.markdown("<br>", unsafe_allow_html=True)
@@ -2086,13 +5488,13 @@ class AttendanceController:
             with col_ex1:
                 st.info(f"Download report for selected date: **{selected_date.strftime('%d %B %Y')}**")
                 
-                excel_file = self.excel_exporter.create_attendance_report(
-                    df_final, status_dict, selected_date, metrics
-                )
-                
+                # Built on click only, not on every rerun
+                exporter = self.excel_exporter
                 st.download_button(
                     "📥 DOWNLOAD DAILY EXCEL",
-                    data=excel_file,
+                    data=lambda: exporter.create_attendance_report(
+                        df_final, status_dict, selected_date, metrics
+                    ),
                     file_name=f"Attendance_{selected_date.strftime('%Y%m%d')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
@@ -2149,74 +5551,228 @@ class AttendanceController:
         elif view_mode == "Table":
             self._render_table_view(df_final, status_dict)
         
+        elif view_mode == "Range Table":
+            self._render_range_table_view(selected_date)
+        
         elif view_mode == "Analytics":
             self._render_analytics_view(df_final, status_dict, metrics, selected_date)
         
+        elif view_mode == "Employee History":
+            self._render_employee_history_view(selected_date)
+        
         # Additional analytics modal
         if st.session_state.get('show_analytics', False):
             with st.expander("📈 ADVANCED ANALYTICS", expanded=True):
                 self._render_analytics_view(df_final, status_dict, metrics, selected_date)
 
+    @staticmethod
+    def _render_staleness_badge(snapshot: DataSnapshot) -> None:
+        """Warn when serving a restored or outdated snapshot (source unreachable)."""
+        age = snapshot.age_seconds()
+        if snapshot.origin != "disk" and SnapshotManager.failures() == 0 and (
+            age is None or age <= AppConstants.SNAPSHOT_STALE_AFTER
+        ):
+            return
+        if snapshot.fetched_at is not None:
+            minutes = int(age // 60)
+            synced = f"last synced {snapshot.fetched_at.strftime('%d %b %H:%M')} ({minutes} min ago)"
+        else:
+            synced = "sync time unknown"
+        retry = SnapshotManager.retry_delay()
+        if SnapshotManager.failures():
+            reason = f"data source unreachable, retrying in {int(retry)}s" if retry > 0 else "data source unreachable"
+        else:
+            reason = "refreshing in background"
+        st.warning(f"🕒 STALE DATA — {synced}; {reason}.")
+        if SnapshotManager.last_error:
+            st.caption(f"Last error: {SnapshotManager.last_error}")
+
+    @staticmethod
+    @st.fragment(run_every=AppConstants.LIVE_CHECK_INTERVAL)
+    def _live_refresh_fragment(selected_date: datetime.date) -> None:
+        """
+        Cheap periodic check; reruns the whole page only when the poller
+        published a snapshot that changed the visible date.
+        """
+        generation = SnapshotManager.day_generation(selected_date)
+        seen = st.session_state.get('live_seen_generation')
+        st.session_state['live_seen_generation'] = (selected_date, generation)
+        
+        snapshot = SnapshotManager.current()
+        st.caption(f"📡 LIVE · last sync {snapshot.loaded_at.strftime('%H:%M:%S')}")
+        
+        if seen is not None and seen[0] == selected_date and generation > seen[1]:
+            st.rerun(scope="app")
+
+    @PerfMonitor.timed("ui.table_view")
     def _render_table_view(self, df: pd.DataFrame, status_dict: Dict[str, str]) -> None:
         """Render table view of attendance."""
         st.markdown("### 📊 DETAILED ATTENDANCE TABLE")
         
-        df_display = df.copy()
-        
-        df_display['Division'] = df_display[AppConstants.COL_EMPLOYEE_NAME].apply(
-            lambda x: DivisionRegistry.find_by_member(x).code 
-            if DivisionRegistry.find_by_member(x) else "N/A"
-        )
-        
-        df_display['Status'] = df_display[AppConstants.COL_EMPLOYEE_NAME].apply(
-            lambda x: status_dict.get(x, "")
-        )
-        
-        df_display = df_display.rename(columns={
-            'Pagi': 'Jam Datang',
-            'Siang_1': 'Siang 1',
-            'Siang_2': 'Siang 2',
-            'Sore': 'Jam Pulang'
-        })
-        
-        display_columns = [
-            AppConstants.COL_EMPLOYEE_NAME, 
-            'Division', 
-            'Jam Datang', 
-            'Siang 1', 
-            'Siang 2', 
-            'Jam Pulang', 
-            'Status'
-        ]
-        
-        final_cols = [c for c in display_columns if c in df_display.columns]
-        df_display = df_display[final_cols]
-        
-        def highlight_late(val):
-            if isinstance(val, str) and ':' in val:
-                if TimeService.is_late(val):
-                    return 'color: #e84118; font-weight: bold'
-            return ''
-        
-        try:
-            st.dataframe(
-                df_display.style.applymap(highlight_late, subset=['Jam Datang']),
-                use_container_width=True,
-                height=600,
-                hide_index=True
-            )
-        except Exception:
-            st.dataframe(df_display, use_container_width=True, height=600)
+        df_display = self.attendance_service.build_table_frame(df, status_dict)
+        self._render_paginated_table(df_display, key="table_view")
         
-        csv = df_display.to_csv(index=False)
         st.download_button(
             "💾 DOWNLOAD CSV",
-            data=csv,
+            data=lambda: df_display.to_csv(index=False),
             file_name=f"attendance_table_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv",
             use_container_width=True
         )
 
+    @PerfMonitor.timed("ui.range_table_view")
+    def _render_range_table_view(self, selected_date: datetime.date) -> None:
+        """Render a multi-day table; pages are whole days so only visible days are built."""
+        st.markdown("### 🗓️ RANGE ATTENDANCE TABLE")
+        
+        col_start, col_end = st.columns(2)
+        with col_start:
+            start_date = st.date_input("From", value=selected_date - timedelta(days=6), key="range_table_start")
+        with col_end:
+            end_date = st.date_input("To", value=selected_date, key="range_table_end")
+        
+        if start_date > end_date:
+            st.error("Error: Start Date must be before End Date")
+            return
+        
+        total_days = (end_date - start_date).days + 1
+        members_per_day = max(1, len(DivisionRegistry.get_all_members()))
+        days_per_page = max(1, AppConstants.TABLE_PAGE_SIZE // members_per_day)
+        total_pages = -(-total_days // days_per_page)
+        
+        page = 1
+        if total_pages > 1:
+            page = st.number_input(
+                f"Page (1-{total_pages}, {days_per_page} day(s) per page)",
+                min_value=1, max_value=total_pages, value=1, step=1,
+                key="range_table_page"
+            )
+        page_start = start_date + timedelta(days=(int(page) - 1) * days_per_page)
+        page_end = min(end_date, page_start + timedelta(days=days_per_page - 1))
+        
+        with st.spinner(f"🔄 Loading {page_start} - {page_end}..."):
+            df_page = pd.concat(
+                list(self.attendance_service.iter_range_table(page_start, page_end)),
+                ignore_index=True
+            )
+        self._render_paginated_table(df_page, key="range_table_view")
+        
+        service = self.attendance_service
+        file_stem = f"attendance_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}"
+        col_csv, col_parquet = st.columns(2)
+        with col_csv:
+            st.download_button(
+                "💾 DOWNLOAD RANGE CSV",
+                data=lambda: StreamingExporter.collect(
+                    StreamingExporter.iter_csv(service.iter_range_table(start_date, end_date)), "csv_range"
+                ),
+                file_name=f"{file_stem}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+        with col_parquet:
+            st.download_button(
+                "💾 DOWNLOAD RANGE PARQUET",
+                data=lambda: StreamingExporter.collect(
+                    StreamingExporter.iter_parquet(service.iter_range_table(start_date, end_date)), "parquet_range"
+                ),
+                file_name=f"{file_stem}.parquet",
+                mime="application/vnd.apache.parquet",
+                use_container_width=True
+            )
+
+    def _render_employee_history_view(self, selected_date: datetime.date) -> None:
+        """Timeline of one employee over any range, sliced from PersonIndex."""
+        st.markdown("### 📈 EMPLOYEE HISTORY")
+        
+        members = DivisionRegistry.get_all_members()
+        if not members:
+            st.info("No personnel registered.")
+            return
+        if st.session_state.get('history_employee') not in members:
+            st.session_state['history_employee'] = members[0]
+        
+        default_start = selected_date - timedelta(days=AppConstants.HISTORY_DEFAULT_DAYS - 1)
+        df_attendance = SnapshotManager.current().attendance
+        if SnapshotManager.resident_since() is None and df_attendance is not None and not df_attendance.empty:
+            default_start = max(default_start, PunchLog.to_date(df_attendance[AppConstants.COL_SHIFT_DAY].min()))
+        
+        col_name, col_start, col_end = st.columns([2, 1, 1])
+        with col_name:
+            name = st.selectbox("Personnel", members, key="history_employee")
+        with col_start:
+            start_date = st.date_input("From", value=min(default_start, selected_date), key="history_start")
+        with col_end:
+            end_date = st.date_input("To", value=selected_date, key="history_end")
+        
+        if start_date > end_date:
+            st.error("Error: Start Date must be before End Date")
+            return
+        
+        with st.spinner(f"🔄 Loading history of {name}..."):
+            timeline, punches = self.attendance_service.build_employee_history(name, start_date, end_date)
+        
+        division = DivisionRegistry.find_by_member(name)
+        st.caption(f"{division.icon} {division.name}" if division else "N/A")
+        
+        status_counts = timeline['Status'].value_counts()
+        hours = timeline['Duty Hours'].dropna()
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Full duty", int(status_counts.get(AttendanceStatus.FULL_DUTY.display_text, 0)))
+        col2.metric("Partial", int(status_counts.get(AttendanceStatus.PARTIAL_DUTY.display_text, 0)))
+        col3.metric("Permit", int(status_counts.get(AttendanceStatus.PERMIT.display_text, 0)))
+        col4.metric("Late", int(timeline['Late'].sum()))
+        col5.metric("Avg duty", f"{hours.mean():.1f} h" if not hours.empty else "N/A")
+        
+        self.component_renderer.render_calendar_strip(timeline)
+        
+        st.dataframe(
+            timeline.rename(columns={'Pagi': 'Jam Datang', 'Siang_1': 'Siang 1', 'Siang_2': 'Siang 2', 'Sore': 'Jam Pulang'}),
+            use_container_width=True, hide_index=True, height=400
+        )
+        with st.expander(f"🕒 ALL PUNCHES ({len(punches):,})"):
+            if punches.empty:
+                st.info("No punches in this range.")
+            else:
+                st.dataframe(pd.DataFrame({
+                    'Shift Date': [PunchLog.to_date(d) for d in punches[AppConstants.COL_SHIFT_DAY]],
+                    AppConstants.COL_EVENT_TIME: punches[AppConstants.COL_EVENT_TIME].values,
+                }), use_container_width=True, hide_index=True)
+
+    def _render_paginated_table(self, df_display: pd.DataFrame, key: str) -> None:
+        """
+        Render a display frame with Arrow-native column_config instead of a Styler.
+        Frames larger than TABLE_PAGE_SIZE are split into pages so only one
+        page is serialized to the browser per rerun.
+        """
+        page_size = AppConstants.TABLE_PAGE_SIZE
+        total_rows = len(df_display)
+        total_pages = max(1, -(-total_rows // page_size))
+        
+        if total_pages > 1:
+            page = st.number_input(
+                f"Page (1-{total_pages}, {total_rows} rows)",
+                min_value=1, max_value=total_pages, value=1, step=1,
+                key=f"{key}_page"
+            )
+            offset = (int(page) - 1) * page_size
+            df_page = df_display.iloc[offset:offset + page_size]
+        else:
+            df_page = df_display
+        
+        st.dataframe(
+            df_page,
+            use_container_width=True,
+            height=600,
+            hide_index=True,
+            column_config={
+                AppConstants.COL_EMPLOYEE_NAME: st.column_config.TextColumn("Nama Karyawan", width="large"),
+                'Division': st.column_config.TextColumn("Division", width="small"),
+                'Late': st.column_config.CheckboxColumn("⚠ Late", help="Jam Datang after the late threshold"),
+            }
+        )
+
+    @PerfMonitor.timed("ui.analytics_view")
     def _render_analytics_view(
         self, 
         df: pd.DataFrame, 
@@ -2327,6 +5883,9 @@ class ConfigurationManager:
         
         if 'notifications_enabled' not in st.session_state:
             st.session_state['notifications_enabled'] = True
+        
+        if 'live_mode' not in st.session_state:
+            st.session_state['live_mode'] = False
 
 
 def configure_page() -> None:
@@ -2351,13 +5910,84 @@ def configure_page() -> None:
     )
 
 
+def render_performance_page() -> None:
+    """Admin-only view of per-rerun span timings, cache stats and profiles."""
+    st.markdown('<div class="brand-title">PERFORMANCE</div>', unsafe_allow_html=True)
+    st.markdown('<div class="brand-subtitle">RERUN TIMINGS & PROFILING</div>', 
+                unsafe_allow_html=True)
+    
+    history = list(st.session_state.get('perf_history', []))
+    
+    tab1, tab2, tab3 = st.tabs(["⏱️ Reruns", "🗄️ Caches", "🔬 Profiler"])
+    
+    with tab1:
+        if not history:
+            st.info("No reruns recorded yet. Open the dashboard, then come back.")
+        else:
+            labels = [
+                f"{run['at'].strftime('%H:%M:%S')} · {run['label']} · {run['total_ms']:.0f} ms"
+                for run in reversed(history)
+            ]
+            choice = st.selectbox("Rerun", range(len(labels)), format_func=lambda i: labels[i])
+            run = list(reversed(history))[choice]
+            df_spans = pd.DataFrame([
+                {
+                    'Span': ("  " * span.depth) + span.name,
+                    'Start (ms)': round(span.start_ms, 1),
+                    'Duration (ms)': round(span.duration_ms, 1),
+                    'Rows': span.rows,
+                    'Cache': span.cache or "",
+                }
+                for span in sorted(run['spans'], key=lambda x: x.start_ms)
+            ])
+            st.metric("Total rerun time", f"{run['total_ms']:.0f} ms")
+            st.dataframe(df_spans, use_container_width=True, hide_index=True, height=500)
+        
+        background = PerfMonitor.background_spans()
+        if background:
+            st.markdown("#### Background tasks")
+            st.dataframe(pd.DataFrame([
+                {'Span': span.name, 'Duration (ms)': round(span.duration_ms, 1), 'Rows': span.rows}
+                for span in reversed(background)
+            ]), use_container_width=True, hide_index=True)
+    
+    with tab2:
+        counters = PerfMonitor.cache_counters()
+        if counters:
+            st.dataframe(pd.DataFrame([
+                {
+                    'Cache': name, 'Hits': c['hit'], 'Misses': c['miss'],
+                    'Hit ratio': f"{c['hit'] / max(1, c['hit'] + c['miss']) * 100:.1f}%"
+                }
+                for name, c in counters.items()
+            ]), use_container_width=True, hide_index=True)
+        else:
+            st.info("No cache lookups recorded yet.")
+        
+        attendance = SnapshotManager.current().attendance
+        if attendance is not None and not attendance.empty:
+            col_a, col_b = st.columns(2)
+            col_a.metric("Punches in memory", f"{len(attendance):,}")
+            col_b.metric("Bytes per punch", f"{PunchLog.bytes_per_punch(attendance):.1f}")
+    
+    with tab3:
+        st.write("Capture a profile of your next rerun (e.g. switch back to the dashboard).")
+        engine = st.radio("Profiler", ["cprofile", "pyinstrument"], horizontal=True)
+        if st.button("🔬 PROFILE NEXT RERUN", use_container_width=True):
+            st.session_state['perf_profile_next'] = engine
+            st.success(f"{engine} armed for the next rerun.")
+        report = st.session_state.get('perf_profile_report')
+        if report:
+            st.code(report, language="text")
+
+
 def render_settings_page() -> None:
     """Render settings and configuration page."""
     st.markdown('<div class="brand-title">SETTINGS</div>', unsafe_allow_html=True)
     st.markdown('<div class="brand-subtitle">SYSTEM CONFIGURATION</div>', 
                 unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["⚙️ General", "👥 Division Management", "📊 Reports"])
+    tab1, tab2, tab3, tab4 = st.tabs(["⚙️ General", "👥 Division Management", "📊 Reports", "🔗 Names"])
     
     with tab1:
         st.markdown("### General Settings")
@@ -2382,12 +6012,58 @@ def render_settings_page() -> None:
         st.markdown("### Report Configuration")
         st.selectbox("Default Export Format", ["Excel (.xlsx)", "CSV (.csv)", "JSON (.json)", "PDF (.pdf)"])
         st.checkbox("Include Charts in Reports", value=True)
+    
+    with tab4:
+        st.markdown("### Name Reconciliation")
+        snapshot = SnapshotManager.current()
+        df_unmatched = NameResolver.unmatched(snapshot.attendance, snapshot.status)
+        if NameResolver.last_error:
+            st.warning(f"⚠️ Alias file ignored: {NameResolver.last_error}")
+        if df_unmatched.empty:
+            st.success("All punch and status names match a division member.")
+        else:
+            st.caption(
+                "These names match no division member and are left out of the reports. "
+                "Suggestions come from the offline pass: python name_aliases.py suggest"
+            )
+            st.dataframe(df_unmatched, use_container_width=True, hide_index=True)
+            pending = df_unmatched[df_unmatched['Suggestion'] != '']
+            if not pending.empty:
+                targets = dict(zip(pending['Name'], pending['Suggestion']))
+                accepted = st.multiselect(
+                    "Accept suggestions as aliases", list(targets),
+                    format_func=lambda name: f"{name} → {targets[name]}"
+                )
+                if st.button("✅ SAVE ALIASES", use_container_width=True) and accepted:
+                    count = NameResolver.accept(accepted)
+                    SnapshotManager.refresh_async()
+                    st.success(f"{count} alias(es) saved; they apply from the next data refresh.")
+        
+        aliases, _ = NameResolver.load_aliases()
+        if aliases:
+            st.markdown("#### Aliases")
+            st.dataframe(
+                pd.DataFrame(list(aliases.items()), columns=['Variant', 'Registry Name']),
+                use_container_width=True, hide_index=True
+            )
 
 
 # ================================================================================
 # SECTION 10: MAIN APPLICATION ENTRY POINT
 # ================================================================================
 
+@st.cache_resource
+def get_controller() -> "AttendanceController":
+    """
+    Process-scoped controller singleton.
+    Division registry, repositories, services and the user store are built
+    once per server process instead of on every rerun.
+    """
+    initialize_divisions()
+    initialize_shift_rules()
+    return AttendanceController()
+
+
 def main() -> None:
     """
     Main application entry point.
@@ -2396,16 +6072,26 @@ def main() -> None:
     # 1. Konfigurasi Halaman & State
     configure_page()
     ConfigurationManager.initialize_session_state()
-    initialize_divisions()
     
     # 2. Apply CSS Theme
     ThemeManager.apply_global_styles()
     
-    # 3. Inisialisasi Controller Baru
-    controller = AttendanceController()
+    # 3. Controller (registry, repositories & services dibuat sekali per proses)
+    controller = get_controller()
     
-    # 4. JALANKAN APLIKASI (Login -> Dashboard)
-    controller.run()
+    # 4. JALANKAN APLIKASI (Login -> Dashboard), dengan instrumentasi per rerun
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        AppMetrics.touch_session(ctx.session_id)
+    PerfMonitor.begin_run()
+    profiler = PerfMonitor.start_profiler(st.session_state.pop('perf_profile_next', None))
+    try:
+        controller.run()
+    finally:
+        report = PerfMonitor.stop_profiler(profiler)
+        if report:
+            st.session_state['perf_profile_report'] = report
+        PerfMonitor.end_run(st.session_state.get('perf_page_label', 'app'))
 
 
 if __name__ == "__main__":